@@ -0,0 +1,50 @@
+import asyncio
+from typing import Optional
+
+import asyncpg
+
+from app.config import settings
+from app.services.timeouts import connection_timeouts
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_asyncpg_pool() -> asyncpg.Pool:
+    """
+    Общий для процесса пул соединений asyncpg. Через него идут только
+    горячие чтения и операции одним запросом вне явной транзакции,
+    поэтому таймауты класса operation заданы соединениям.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                settings.asyncpg_dsn,
+                min_size=1,
+                max_size=(
+                    settings.database_pool_size
+                    + settings.database_max_overflow
+                ),
+                max_inactive_connection_lifetime=(
+                    settings.database_pool_recycle
+                ),
+                statement_cache_size=settings.database_statement_cache_size,
+                server_settings={
+                    'default_transaction_isolation': (
+                        settings.database_isolation_level.lower()
+                    ),
+                    **connection_timeouts('operation'),
+                }
+            )
+    return _pool
+
+
+async def close_asyncpg_pool() -> None:
+    """Закрыть пул asyncpg, если он был создан."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
@@ -0,0 +1,70 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    """
+    Интерфейс хранилища кеша.
+    Значения должны сериализоваться в JSON, чтобы локальное хранилище
+    можно было заменить общим (например, Redis) без изменения вызывающих.
+    """
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Получить значение или None, если его нет или оно устарело."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        """Сохранить значение."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удалить значение."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        """Счетчики хранилища (размер, вытеснения)."""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Кеш в памяти процесса с TTL и вытеснением по LRU.
+    Объем памяти ограничен числом записей max_entries.
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -0,0 +1,82 @@
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from app.cache.backends import CacheBackend, InMemoryCacheBackend
+from app.config import settings
+from app.schemas.wallet import WalletResponse
+
+
+class WalletCache:
+    """
+    Read-through кеш кошельков по uuid.
+
+    После каждой записи в кошелек значение инвалидируется. Чтение,
+    начатое до инвалидации, не сохраняет результат в кеш, поэтому
+    из кеша не читается баланс старше последней записи этого процесса.
+    Чтения с реплик (store=False) берут значение из кеша, но не
+    сохраняют в него свое: реплика может еще не получить запись.
+    """
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._loads: dict[UUID, object] = {}
+
+    async def get_or_load(
+        self,
+        wallet_uuid: UUID,
+        loader: Callable[[UUID], Awaitable[WalletResponse]],
+        store: bool = True
+    ) -> WalletResponse:
+        """
+        Вернуть кошелек из кеша или загрузить его и при store сохранить.
+        """
+        balance = await self.backend.get(str(wallet_uuid))
+        if balance is not None:
+            self.hits += 1
+            return WalletResponse.of(wallet_uuid, balance)
+        self.misses += 1
+        if not store:
+            return await loader(wallet_uuid)
+        token = self._loads[wallet_uuid] = object()
+        try:
+            wallet = await loader(wallet_uuid)
+        finally:
+            current = self._loads.get(wallet_uuid)
+            if current is token:
+                del self._loads[wallet_uuid]
+        if current is token:
+            await self.backend.set(str(wallet_uuid), wallet.balance)
+        return wallet
+
+    async def put(self, wallet: WalletResponse) -> None:
+        """Сохранить только что созданный кошелек."""
+        await self.backend.set(str(wallet.id), wallet.balance)
+
+    async def invalidate(self, wallet_uuid: UUID) -> None:
+        """Сбросить кошелек после записи и отменить начатые загрузки."""
+        self._loads.pop(wallet_uuid, None)
+        await self.backend.delete(str(wallet_uuid))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            **self.backend.stats(),
+        }
+
+
+_wallet_cache: Optional[WalletCache] = None
+
+
+def get_wallet_cache() -> Optional[WalletCache]:
+    """Кеш кошельков процесса или None, если кеш выключен."""
+    global _wallet_cache
+    if not settings.wallet_cache_enabled:
+        return None
+    if _wallet_cache is None:
+        _wallet_cache = WalletCache(InMemoryCacheBackend(
+            ttl=settings.wallet_cache_ttl_seconds,
+            max_entries=settings.wallet_cache_max_entries
+        ))
+    return _wallet_cache
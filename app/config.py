@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,8 +8,8 @@ class Settings(BaseSettings):
 
     app_name: str = 'ITK Wallet Service'
     secret_key: str = 'DEV_KEY_CHANGE_IN_PROD'
-    debug: bool = True
-    database_echo: bool = True
+    debug: bool = False
+    database_echo: bool = False
 
     postgres_user: str = 'dev_user'
     postgres_password: str = 'dev_password'
@@ -15,6 +17,130 @@ class Settings(BaseSettings):
     postgres_port: int = 5432
     postgres_db: str = 'mydatabase'
 
+    # Сервер uvicorn (run.py). Рабочих процессов по умолчанию столько,
+    # сколько CPU; uvloop и httptools используются, если установлены
+    server_host: str = '0.0.0.0'
+    server_port: int = 8000
+    server_workers: Optional[int] = None
+    server_loop: Literal['auto', 'asyncio', 'uvloop'] = 'auto'
+    server_http: Literal['auto', 'h11', 'httptools'] = 'auto'
+    server_backlog: int = 2048
+    server_keep_alive_timeout: int = 5
+    server_limit_concurrency: Optional[int] = None
+    server_graceful_shutdown_timeout: int = 30
+
+    # Замеры запросов: гистограммы /metrics и заголовок Server-Timing
+    request_metrics_enabled: bool = True
+
+    # Ответы эндпоинтов кошельков собираются в сервисе и сериализуются
+    # через orjson (если установлен) без повторной валидации response_model
+    fast_json_responses: bool = True
+
+    # Пул соединений
+    database_pool_size: int = 10
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = False
+    database_statement_cache_size: int = 100
+    # Таймауты Postgres (lock_timeout, statement_timeout) по классам
+    # запросов, мс, 0 - без ограничения: read - по умолчанию для
+    # соединений пула, operation и bulk - на транзакцию операции над
+    # кошельком и пакетной работы, stats_refresh - на пересчет сводки
+    database_read_lock_timeout_ms: int = 1000
+    database_read_statement_timeout_ms: int = 5000
+    database_operation_lock_timeout_ms: int = 1000
+    database_operation_statement_timeout_ms: int = 5000
+    database_bulk_lock_timeout_ms: int = 10_000
+    database_bulk_statement_timeout_ms: int = 60_000
+    database_stats_refresh_lock_timeout_ms: int = 10_000
+    database_stats_refresh_statement_timeout_ms: int = 0
+    # Соединений, открываемых и прогреваемых при запуске до /ready (0 - без
+    # прогрева); не больше database_pool_size
+    database_warmup_connections: int = 5
+
+    # Реплики для чтения (GET /wallets/{uuid}): список URL в формате
+    # database_url. Клиент, недавно писавший в API, читает с основной
+    # базы в течение read_your_writes_window_seconds
+    database_replica_urls: list[str] = []
+    read_your_writes_window_seconds: float = 5
+
+    # Уровень изоляции транзакций и повтор транзакций, отмененных базой
+    # (40001 serialization_failure, 40P01 deadlock_detected): число
+    # попыток, экспоненциальная пауза со случайным разбросом и бюджет
+    # повторов - доля от числа транзакций и предельный запас
+    database_isolation_level: Literal[
+        'READ COMMITTED', 'REPEATABLE READ', 'SERIALIZABLE'
+    ] = 'READ COMMITTED'
+    transaction_retry_max_attempts: int = 5
+    transaction_retry_base_delay_ms: float = 2
+    transaction_retry_max_delay_ms: float = 100
+    transaction_retry_budget_ratio: float = 0.2
+    transaction_retry_budget_capacity: float = 100
+
+    # Реализация горячих эндпоинтов (получение кошелька и операция):
+    # orm - SQLAlchemy, asyncpg - прямой доступ через пул asyncpg
+    wallet_repository_backend: Literal['orm', 'asyncpg'] = 'orm'
+
+    # pessimistic - SELECT ... FOR UPDATE + UPDATE,
+    # atomic - один условный UPDATE ... RETURNING,
+    # optimistic - чтение без блокировки и UPDATE с проверкой версии
+    # (compare-and-swap), конфликт повторяется как транзакция
+    balance_update_mode: Literal[
+        'pessimistic', 'atomic', 'optimistic'
+    ] = 'atomic'
+
+    # Группировка операций над горячими кошельками (group commit)
+    operation_coalescing_enabled: bool = False
+    operation_coalescing_window_ms: float = 2
+    operation_coalescing_max_batch: int = 100
+
+    # Контроль допуска операций (POST /wallets/{uuid}/operation): сколько
+    # операций над одним кошельком выполняются одновременно и сколько ждут
+    # в очереди процесса (сверх - 429), всего операций в процессе (сверх -
+    # 503)
+    admission_control_enabled: bool = False
+    admission_max_in_flight: int = 256
+    admission_wallet_concurrency: int = 1
+    admission_wallet_max_queue: int = 16
+
+    # Максимальное число операций в одном пакетном запросе
+    wallet_batch_max_operations: int = 1000
+
+    # Максимальное число uuid в одном запросе POST /wallets:lookup
+    wallet_lookup_max_ids: int = 500
+
+    # Версия uuid новых кошельков: v4 - случайные, v7 - упорядоченные по
+    # времени создания (вставки идут в конец индекса первичного ключа)
+    wallet_id_version: Literal['v4', 'v7'] = 'v4'
+
+    # Массовое создание кошельков: предельный размер запроса и порог,
+    # начиная с которого вставка идет через COPY
+    wallet_bulk_max_wallets: int = 100_000
+    wallet_bulk_copy_threshold: int = 5000
+
+    # Предельное число шардов баланса горячего кошелька
+    wallet_max_balance_shards: int = 64
+
+    # Интервал пересчета сводки GET /wallets/stats (0 - не пересчитывать)
+    wallet_stats_refresh_interval_seconds: float = 60
+
+    # Кеш GET /wallets/{uuid} в памяти процесса
+    wallet_cache_enabled: bool = False
+    wallet_cache_ttl_seconds: float = 5
+    wallet_cache_max_entries: int = 100_000
+
+    # Движок балансов: database - каждая операция идет в Postgres,
+    # memory - узел держит в памяти балансы своей части кошельков
+    # (консистентный хеш по engine_node_count узлам), пишет операции
+    # в журнал предзаписи и сохраняет их в базу в фоне
+    wallet_engine_mode: Literal['database', 'memory'] = 'database'
+    engine_node_index: int = 0
+    engine_node_count: int = 1
+    engine_wal_dir: str = 'wal'
+    engine_wal_fsync_interval_ms: float = 2
+    engine_persist_interval_ms: float = 200
+
     @property
     def database_url(self) -> str:
         user_pass = f'{self.postgres_user}:{self.postgres_password}'
@@ -23,5 +149,11 @@ class Settings(BaseSettings):
 
         return f'postgresql+asyncpg://{user_pass}@{host_port}/{db_name}'
 
+    @property
+    def asyncpg_dsn(self) -> str:
+        return self.database_url.replace(
+            'postgresql+asyncpg://', 'postgresql://'
+        )
+
 
 settings = Settings()
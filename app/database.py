@@ -1,21 +1,60 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
+from app.instrumentation import instrument_engine
+from app.pool import InstrumentedAsyncPool
+from app.services.timeouts import connection_timeouts
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.database_echo
-)
+
+def create_database_engine(url: str) -> AsyncEngine:
+    """
+    Движок с пулом по настройкам DATABASE_POOL_* и замерами запросов.
+    Таймауты соединений - класса read, транзакции операций и пакетной
+    работы задают свои через set_transaction_timeouts.
+    """
+    database_engine = create_async_engine(
+        url,
+        echo=settings.database_echo,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        isolation_level=settings.database_isolation_level,
+        connect_args={
+            'prepared_statement_cache_size': (
+                settings.database_statement_cache_size
+            ),
+            'server_settings': connection_timeouts('read'),
+        }
+    )
+    instrument_engine(database_engine)
+    return database_engine
+
+
+engine = create_database_engine(settings.database_url)
+replica_engines = [
+    create_database_engine(url) for url in settings.database_replica_urls
+]
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
+ReplicaSessionLocals = [
+    async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    for replica_engine in replica_engines
+]
 
 
 class Base(DeclarativeBase):
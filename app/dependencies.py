@@ -0,0 +1,47 @@
+from typing import Union
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.asyncpg_pool import get_asyncpg_pool
+from app.config import settings
+from app.database import get_db
+from app.read_routing import get_read_db
+from app.services.asyncpg_wallet_service import AsyncpgWalletService
+from app.services.wallet_service import WalletService
+
+HotPathWalletService = Union[WalletService, AsyncpgWalletService]
+
+
+async def get_hot_path_service(
+    db: AsyncSession = Depends(get_db)
+) -> HotPathWalletService:
+    """
+    Сервис для горячих эндпоинтов (получение кошелька и операция)
+    согласно WALLET_REPOSITORY_BACKEND. В режиме движка в памяти
+    операции идут через WalletService.
+    """
+    return await _hot_path_service(db, replica=False)
+
+
+async def get_read_service(
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
+) -> HotPathWalletService:
+    """
+    Сервис для получения кошелька: то же, что get_hot_path_service, но
+    с сессией реплики (get_read_db), если чтение ушло на реплику.
+    Бэкенд asyncpg читает с основной базы.
+    """
+    return await _hot_path_service(db, replica=db is not primary_db)
+
+
+async def _hot_path_service(
+    db: AsyncSession, replica: bool
+) -> HotPathWalletService:
+    if (
+        settings.wallet_engine_mode == 'database'
+        and settings.wallet_repository_backend == 'asyncpg'
+    ):
+        return AsyncpgWalletService(await get_asyncpg_pool())
+    return WalletService(db, replica=replica)
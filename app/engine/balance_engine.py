@@ -0,0 +1,368 @@
+import asyncio
+import logging
+from bisect import bisect_right
+from typing import Iterable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.engine.partitioning import ConsistentHashRing
+from app.engine.wal import WalRecord, WriteAheadLog
+from app.models.wallet import WALLET_BALANCE_MIN
+from app.repositories.balance_engine_checkpoint_repository import \
+    BalanceEngineCheckpointRepository
+from app.repositories.wallet_repository import WalletRepository
+from app.repositories.wallet_transaction_repository import (
+    WalletTransactionRepository, transaction_values)
+from app.schemas.wallet import (OperationType, WalletOperationRequest,
+                                WalletResponse, balance_delta)
+from app.services.idempotency import check_replay
+from app.services.timeouts import set_transaction_timeouts
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceEngine:
+    """
+    Движок балансов в памяти для кошельков своей части кольца.
+
+    Узел владеет кошельками, которые консистентный хеш относит к
+    node_index; баланс такого кошелька после первой загрузки из базы
+    хранится только в памяти и меняется только этим узлом. Операция
+    применяется в памяти синхронно (порядок операций кошелька - порядок
+    их поступления), дописывается в журнал предзаписи и подтверждается
+    после fsync группы записей; если запись в журнал не удалась, операция
+    и все более поздние откатываются в памяти. Фоновая задача раз в
+    persist_interval переносит записи закрытых сегментов журнала в wallets
+    и wallet_transactions одной транзакцией вместе с номером последней
+    записи (контрольной точкой).
+    При запуске записи журнала после контрольной точки досохраняются
+    в базу, поэтому повтор после сбоя не дублирует операции.
+    """
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        wal: WriteAheadLog,
+        ring: ConsistentHashRing,
+        node_index: int,
+        persist_interval: float
+    ):
+        self.session_factory = session_factory
+        self.wal = wal
+        self.ring = ring
+        self.node_index = node_index
+        self.persist_interval = persist_interval
+        self._balances: dict[UUID, int] = {}
+        self._loading: dict[UUID, asyncio.Task] = {}
+        self._unpersisted: list[WalRecord] = []
+        self._unpersisted_keys: dict[tuple[UUID, str], WalRecord] = {}
+        self._forgotten_generation = 0
+        self._seq = 0
+        self._persist_lock = asyncio.Lock()
+        self._persister: Optional[asyncio.Task] = None
+        self.wal.on_discard = self._discard
+
+    async def start(self) -> None:
+        """
+        Восстановиться после остановки или сбоя: сохранить в базу записи
+        журнала после контрольной точки и начать новый сегмент.
+        """
+        async with self.session_factory() as session:
+            last_seq = await BalanceEngineCheckpointRepository(
+                session
+            ).get_last_seq(self.node_index)
+        records = list(self.wal.read())
+        self._seq = max([last_seq] + [record.seq for record in records])
+        segment = self.wal.open()
+        recovered = [record for record in records if record.seq > last_seq]
+        if recovered:
+            await self._persist_records(recovered)
+        self.wal.remove_through(segment - 1)
+        self._persister = asyncio.create_task(self._persist_periodically())
+
+    async def stop(self) -> None:
+        """Сохранить накопленные операции в базу и закрыть журнал."""
+        if self._persister is not None:
+            self._persister.cancel()
+            await asyncio.wait([self._persister])
+        await self.persist()
+        await self.wal.close()
+
+    def owns(self, wallet_uuid: UUID) -> bool:
+        """Принадлежит ли кошелек этому узлу."""
+        return self.ring.owner(wallet_uuid) == self.node_index
+
+    async def get(self, wallet_uuid: UUID) -> WalletResponse:
+        """Получить кошелек (баланс из памяти)."""
+        balance = await self._balance(wallet_uuid)
+        return WalletResponse.of(wallet_uuid, balance)
+
+    async def apply(
+        self,
+        wallet_uuid: UUID,
+        wallet_request: WalletOperationRequest,
+        idempotency_key: Optional[str] = None
+    ) -> WalletResponse:
+        """
+        Применить операцию к балансу в памяти и дождаться записи
+        в журнал. Следующие операции кошелька видят новый баланс сразу,
+        а их ответы отправляются только после fsync их собственных
+        (более поздних) записей. Если fsync не удался, журнал отбрасывает
+        запись вместе с более поздними, и _discard откатывает их в памяти
+        до того, как на них опрется следующая операция.
+        """
+        await self._balance(wallet_uuid)
+        if idempotency_key is not None:
+            stored = await self._stored_operation(wallet_uuid, idempotency_key)
+            if stored is not None:
+                return self._replay(wallet_uuid, wallet_request, *stored)
+        new_balance = self._balances[wallet_uuid] + balance_delta(
+            wallet_request.operation_type, wallet_request.amount
+        )
+        if new_balance < WALLET_BALANCE_MIN:
+            raise HTTPException(status_code=400, detail='Not enough balance')
+        self._seq += 1
+        record = WalRecord(
+            self._seq,
+            wallet_uuid,
+            wallet_request.operation_type.value,
+            wallet_request.amount,
+            new_balance,
+            idempotency_key
+        )
+        durable = self.wal.append(record)
+        self._balances[wallet_uuid] = new_balance
+        self._unpersisted.append(record)
+        if idempotency_key is not None:
+            self._unpersisted_keys[(wallet_uuid, idempotency_key)] = record
+        try:
+            await asyncio.shield(durable)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            raise HTTPException(status_code=500)
+        return WalletResponse.of(wallet_uuid, new_balance)
+
+    async def persist(self) -> None:
+        """Перенести накопленные записи журнала в базу."""
+        async with self._persist_lock:
+            # В базу уходят только записи закрытых сегментов: операции,
+            # примененные во время rotate, попадают в следующий сегмент
+            # и дождутся следующего сохранения
+            sealed, sealed_seq = await self.wal.rotate()
+            split = bisect_right(
+                self._unpersisted, sealed_seq, key=lambda record: record.seq
+            )
+            records = self._unpersisted[:split]
+            self._unpersisted = self._unpersisted[split:]
+            if records:
+                try:
+                    await self._persist_records(records)
+                except Exception:
+                    self._unpersisted = records + self._unpersisted
+                    raise
+                self._forget_keys(records)
+            self.wal.remove_through(sealed)
+
+    async def _persist_records(self, records: list[WalRecord]) -> None:
+        """
+        Записать балансы, журнал операций и контрольную точку одной
+        транзакцией. Записи идут по возрастанию seq, поэтому итоговый
+        баланс кошелька - balance_after его последней записи.
+        """
+        balances = {
+            record.wallet_id: record.balance_after for record in records
+        }
+        async with self.session_factory() as session:
+            await set_transaction_timeouts(session, 'bulk')
+            await WalletRepository(session).set_balances(balances)
+            await WalletTransactionRepository(session).add_many([
+                transaction_values(
+                    record.wallet_id,
+                    OperationType(record.operation_type),
+                    record.amount,
+                    record.balance_after,
+                    record.idempotency_key
+                )
+                for record in records
+            ])
+            await BalanceEngineCheckpointRepository(session).save(
+                self.node_index, records[-1].seq
+            )
+            await session.commit()
+
+    async def _persist_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            try:
+                await self.persist()
+            except Exception:
+                logger.exception('Failed to persist balance engine records')
+
+    def _discard(self, records: list[WalRecord]) -> None:
+        """
+        Откатить в памяти записи, отброшенные журналом: это все записи
+        начиная с неудачной группы, поэтому баланс кошелька возвращается
+        к значению до самой ранней из них.
+        """
+        discarded = {record.seq for record in records}
+        for record in reversed(records):
+            self._balances[record.wallet_id] = (
+                record.balance_after - balance_delta(
+                    OperationType(record.operation_type), record.amount
+                )
+            )
+            if record.idempotency_key is not None:
+                key = (record.wallet_id, record.idempotency_key)
+                if self._unpersisted_keys.get(key) is record:
+                    del self._unpersisted_keys[key]
+        self._unpersisted = [
+            record for record in self._unpersisted
+            if record.seq not in discarded
+        ]
+
+    def _forget_keys(self, records: Iterable[WalRecord]) -> None:
+        """Ключи сохраненных записей дальше ищутся в базе."""
+        self._forgotten_generation += 1
+        for record in records:
+            if record.idempotency_key is None:
+                continue
+            key = (record.wallet_id, record.idempotency_key)
+            if self._unpersisted_keys.get(key) is record:
+                del self._unpersisted_keys[key]
+
+    async def _balance(self, wallet_uuid: UUID) -> int:
+        """
+        Баланс кошелька из памяти. Первое обращение загружает его
+        из базы; параллельные обращения ждут одну загрузку.
+        """
+        if not self.owns(wallet_uuid):
+            raise HTTPException(
+                status_code=421,
+                detail='Wallet is owned by another engine node',
+                headers={
+                    'X-Wallet-Owner-Node': str(self.ring.owner(wallet_uuid))
+                }
+            )
+        balance = self._balances.get(wallet_uuid)
+        if balance is not None:
+            return balance
+        task = self._loading.get(wallet_uuid)
+        if task is None:
+            task = asyncio.create_task(self._load(wallet_uuid))
+            self._loading[wallet_uuid] = task
+            task.add_done_callback(
+                lambda _: self._loading.pop(wallet_uuid, None)
+            )
+        return await asyncio.shield(task)
+
+    async def _load(self, wallet_uuid: UUID) -> int:
+        """
+        Загрузить баланс из базы. Шарды баланса кошелька сливаются
+        в основную строку: дальше баланс меняет только движок.
+        """
+        try:
+            async with self.session_factory() as session:
+                await set_transaction_timeouts(session, 'operation')
+                repository = WalletRepository(session)
+                wallet = await repository.get_by_uuid_with_lock(wallet_uuid)
+                if wallet is not None and wallet.balance_shards > 1:
+                    wallet = await repository.merge_shards(wallet)
+                await session.commit()
+        except Exception:
+            raise HTTPException(status_code=500)
+        if wallet is None:
+            raise HTTPException(status_code=404, detail='Wallet not found')
+        return self._balances.setdefault(wallet_uuid, wallet.balance)
+
+    async def _stored_operation(
+        self, wallet_uuid: UUID, idempotency_key: str
+    ) -> Optional[tuple[str, int, int]]:
+        """
+        Операция с ключом идемпотентности: из несохраненных записей или
+        из базы. Если во время запроса к базе записи с ключами ушли
+        в базу, запрос повторяется, иначе ключ мог бы не найтись нигде.
+        """
+        while True:
+            record = self._unpersisted_keys.get((wallet_uuid, idempotency_key))
+            if record is not None:
+                return (
+                    record.operation_type,
+                    record.amount,
+                    record.balance_after
+                )
+            generation = self._forgotten_generation
+            try:
+                async with self.session_factory() as session:
+                    transaction = await WalletTransactionRepository(
+                        session
+                    ).get_by_idempotency_key(wallet_uuid, idempotency_key)
+            except Exception:
+                raise HTTPException(status_code=500)
+            if transaction is not None:
+                return (
+                    transaction.operation_type,
+                    transaction.amount,
+                    transaction.balance_after
+                )
+            if generation == self._forgotten_generation:
+                record = self._unpersisted_keys.get(
+                    (wallet_uuid, idempotency_key)
+                )
+                if record is None:
+                    return None
+
+    def _replay(
+        self,
+        wallet_uuid: UUID,
+        wallet_request: WalletOperationRequest,
+        operation_type: str,
+        amount: int,
+        balance_after: int
+    ) -> WalletResponse:
+        """Результат повтора операции с тем же ключом идемпотентности."""
+        check_replay(
+            wallet_request.operation_type,
+            wallet_request.amount,
+            operation_type,
+            amount
+        )
+        return WalletResponse.of(wallet_uuid, balance_after)
+
+
+_engine: Optional[BalanceEngine] = None
+_engine_lock = asyncio.Lock()
+
+
+async def get_balance_engine() -> BalanceEngine:
+    """Запущенный движок балансов этого узла (WALLET_ENGINE_MODE=memory)."""
+    global _engine
+    if _engine is not None:
+        return _engine
+    async with _engine_lock:
+        if _engine is None:
+            engine = BalanceEngine(
+                AsyncSessionLocal,
+                WriteAheadLog(
+                    settings.engine_wal_dir,
+                    f'wallets-{settings.engine_node_index}',
+                    settings.engine_wal_fsync_interval_ms / 1000
+                ),
+                ConsistentHashRing(settings.engine_node_count),
+                settings.engine_node_index,
+                settings.engine_persist_interval_ms / 1000
+            )
+            await engine.start()
+            _engine = engine
+    return _engine
+
+
+async def close_balance_engine() -> None:
+    """Остановить движок балансов, если он был запущен."""
+    global _engine
+    if _engine is not None:
+        engine, _engine = _engine, None
+        await engine.stop()
@@ -0,0 +1,30 @@
+import bisect
+import hashlib
+from uuid import UUID
+
+
+def _hash(value: bytes) -> int:
+    digest = hashlib.blake2b(value, digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class ConsistentHashRing:
+    """
+    Консистентное хеширование кошельков по узлам движка.
+    Каждый узел представлен virtual_nodes точками на кольце, поэтому при
+    изменении числа узлов переезжает лишь ~1/N кошельков.
+    """
+    def __init__(self, node_count: int, virtual_nodes: int = 64):
+        self.node_count = node_count
+        points = sorted(
+            (_hash(f'{node}:{replica}'.encode()), node)
+            for node in range(node_count)
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, wallet_uuid: UUID) -> int:
+        """Номер узла, владеющего кошельком."""
+        index = bisect.bisect(self._hashes, _hash(wallet_uuid.bytes))
+        return self._nodes[index % len(self._nodes)]
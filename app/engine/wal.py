@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+from uuid import UUID
+
+
+class WalRecord(NamedTuple):
+    seq: int
+    wallet_id: UUID
+    operation_type: str
+    amount: int
+    balance_after: int
+    idempotency_key: Optional[str]
+
+    def encode(self) -> str:
+        return json.dumps([
+            self.seq, str(self.wallet_id), self.operation_type,
+            self.amount, self.balance_after, self.idempotency_key
+        ]) + '\n'
+
+    @classmethod
+    def decode(cls, line: str) -> 'WalRecord':
+        seq, wallet_id, operation_type, amount, balance, key = json.loads(line)
+        return cls(seq, UUID(wallet_id), operation_type, amount, balance, key)
+
+
+class WriteAheadLog:
+    """
+    Журнал предзаписи из сегментов-файлов.
+
+    Записи копятся в буфере и сбрасываются на диск с одним fsync на
+    группу раз в fsync_interval секунд. append возвращает future, который
+    завершается, когда запись гарантированно на диске. После сохранения
+    записей в базу закрытые сегменты удаляются.
+
+    Если запись группы не удалась, сегмент обрезается до ее начала, а
+    группа и все записи, добавленные после нее, отбрасываются: их future
+    завершаются ошибкой, а on_discard получает их синхронно, до того как
+    следующая запись попадет в журнал.
+    """
+    def __init__(self, directory: str, name: str, fsync_interval: float):
+        self.directory = Path(directory)
+        self.name = name
+        self.fsync_interval = fsync_interval
+        self._buffer: list[WalRecord] = []
+        self._waiters: list[asyncio.Future] = []
+        self._written_seq = 0
+        self.on_discard: Optional[Callable[[list[WalRecord]], None]] = None
+        self._lock = asyncio.Lock()
+        self._file = None
+        self._segment = 0
+        self._flusher: Optional[asyncio.Task] = None
+
+    def segments(self) -> list[Path]:
+        """Сегменты журнала в порядке записи."""
+        return sorted(
+            self.directory.glob(f'{self.name}.*.wal'),
+            key=_segment_number
+        )
+
+    def read(self) -> Iterator[WalRecord]:
+        """
+        Прочитать все записи. Оборванная последняя строка сегмента
+        (сбой во время записи) пропускается.
+        """
+        for path in self.segments():
+            with open(path, encoding='utf-8') as segment:
+                for line in segment:
+                    if line.endswith('\n'):
+                        yield WalRecord.decode(line)
+
+    def open(self) -> int:
+        """
+        Открыть новый сегмент для записи после существующих.
+        Возвращает его номер.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        if segments:
+            self._segment = _segment_number(segments[-1]) + 1
+        self._open_segment()
+        return self._segment
+
+    def append(self, record: WalRecord) -> asyncio.Future:
+        """Добавить запись; future завершится после fsync."""
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append(record)
+        self._waiters.append(future)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+        return future
+
+    async def rotate(self) -> tuple[int, int]:
+        """
+        Сбросить буфер, закрыть текущий сегмент и начать новый.
+        Возвращает номер закрытого сегмента и seq последней записи в нем:
+        в закрытом и более ранних сегментах лежат ровно записи с seq не
+        больше этого.
+        """
+        async with self._lock:
+            await self._flush_buffer()
+            sealed = self._segment
+            self._file.close()
+            self._segment += 1
+            self._open_segment()
+            return sealed, self._written_seq
+
+    def remove_through(self, segment: int) -> None:
+        """Удалить сегменты до segment включительно."""
+        for path in self.segments():
+            if _segment_number(path) <= segment:
+                path.unlink()
+
+    async def close(self) -> None:
+        """Сбросить буфер и закрыть журнал."""
+        async with self._lock:
+            await self._flush_buffer()
+            self._file.close()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.fsync_interval)
+        async with self._lock:
+            try:
+                await self._flush_buffer()
+            except Exception:
+                # Ошибка уже передана future отброшенных записей
+                pass
+
+    async def _flush_buffer(self) -> None:
+        if not self._buffer:
+            return
+        records, waiters = self._buffer, self._waiters
+        self._buffer, self._waiters = [], []
+        data = ''.join(record.encode() for record in records).encode()
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as error:
+            # Записи, добавленные во время неудачной записи, могли опираться
+            # на отброшенные, поэтому отбрасываются вместе с ними
+            records += self._buffer
+            waiters += self._waiters
+            self._buffer, self._waiters = [], []
+            if self.on_discard is not None:
+                self.on_discard(records)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(error)
+            raise
+        self._written_seq = records[-1].seq
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        """
+        Дописать группу и сделать fsync. При ошибке сегмент обрезается
+        до начала группы, чтобы восстановление не повторило записи,
+        клиенты которых получили ошибку.
+        """
+        offset = self._file.tell()
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[self._file.write(view):]
+            os.fsync(self._file.fileno())
+        except Exception:
+            try:
+                os.ftruncate(self._file.fileno(), offset)
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            raise
+
+    def _open_segment(self) -> None:
+        # Без буфера Python: после неудачной записи в нем не остается
+        # данных, которые попали бы в сегмент со следующей группой
+        self._file = open(
+            self._segment_path(self._segment), 'ab', buffering=0
+        )
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f'{self.name}.{segment}.wal'
+
+
+def _segment_number(path: Path) -> int:
+    """Номер сегмента из имени файла <name>.<номер>.wal."""
+    return int(path.suffixes[-2][1:])
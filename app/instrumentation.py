@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import Histogram
+
+STATEMENT_BUCKETS = (1, 2, 3, 4, 5, 8, 13, 21, 34, 55)
+PHASES = ('pool', 'db', 'lock', 'serialize')
+
+request_duration = Histogram(
+    'wallet_http_request_duration_seconds',
+    'Время обработки HTTP-запроса до отправки заголовков ответа.',
+    ('method', 'route', 'status')
+)
+request_phase_duration = Histogram(
+    'wallet_http_request_phase_seconds',
+    'Время запроса по фазам: ожидание соединения из пула (pool), '
+    'выполнение SQL (db), из него SELECT ... FOR UPDATE (lock), '
+    'валидация и сериализация ответа (serialize).',
+    ('route', 'phase')
+)
+request_statements = Histogram(
+    'wallet_http_request_db_statements',
+    'Число SQL-выражений на HTTP-запрос.',
+    ('route',),
+    buckets=STATEMENT_BUCKETS
+)
+
+
+class RequestTimings:
+    """Время фаз одного запроса в секундах и число SQL-выражений."""
+    __slots__ = (
+        'pool', 'db', 'lock', 'serialize', 'statements', 'endpoint_done'
+    )
+
+    def __init__(self):
+        self.pool = 0.0
+        self.db = 0.0
+        self.lock = 0.0
+        self.serialize = 0.0
+        self.statements = 0
+        self.endpoint_done: Optional[float] = None
+
+    def server_timing(self, total: float) -> str:
+        """Значение заголовка Server-Timing (длительности в мс)."""
+        return ', '.join([
+            f'pool;dur={self.pool * 1000:.3f}',
+            f'db;dur={self.db * 1000:.3f};desc="{self.statements} statements"',
+            f'lock;dur={self.lock * 1000:.3f}',
+            f'serialize;dur={self.serialize * 1000:.3f}',
+            f'total;dur={total * 1000:.3f}',
+        ])
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    'request_timings', default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """
+    Замеры текущего запроса или None вне запроса. Контекст доходит и до
+    greenlet, в котором SQLAlchemy выполняет синхронный код драйвера.
+    """
+    return _timings.get()
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware замеров запроса: собирает фазы в RequestTimings,
+    добавляет заголовок Server-Timing и пишет гистограммы /metrics.
+    Отключается настройкой REQUEST_METRICS_ENABLED.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not settings.request_metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = '500'
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = str(message['status'])
+                total = time.perf_counter() - started
+                message['headers'] = list(message.get('headers', [])) + [(
+                    b'server-timing', timings.server_timing(total).encode()
+                )]
+                _observe(scope, timings, status, total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _timings.reset(token)
+
+
+def _observe(
+    scope: Scope, timings: RequestTimings, status: str, total: float
+) -> None:
+    route = scope.get('route')
+    path = route.path if route is not None else 'unmatched'
+    request_duration.observe(total, scope['method'], path, status)
+    for phase in PHASES:
+        request_phase_duration.observe(getattr(timings, phase), path, phase)
+    request_statements.observe(timings.statements, path)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute, замеряющий валидацию и сериализацию ответа: время от
+    возврата из функции эндпоинта до готового объекта Response.
+    """
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _mark_endpoint_done(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = current_timings()
+            if timings is not None and timings.endpoint_done is not None:
+                timings.serialize += (
+                    time.perf_counter() - timings.endpoint_done
+                )
+            return response
+
+        return timed_handler
+
+
+def _mark_endpoint_done(call: Callable) -> Callable:
+    """Обертка эндпоинта, отмечающая момент его возврата."""
+    if getattr(call, '_marks_endpoint_done', False):
+        return call
+
+    def mark() -> None:
+        timings = current_timings()
+        if timings is not None:
+            timings.endpoint_done = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                mark()
+    else:
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                mark()
+    wrapper._marks_endpoint_done = True
+    return wrapper
+
+
+def record_pool_wait(seconds: float) -> None:
+    """Учесть ожидание соединения из пула в текущем запросе."""
+    timings = current_timings()
+    if timings is not None:
+        timings.pool += seconds
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключить замеры SQL-выражений к событиям движка SQLAlchemy."""
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
+    event.listen(engine.sync_engine, 'handle_error', _handle_error)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    if _timings.get() is not None:
+        conn.info.setdefault('statement_started', []).append(
+            time.perf_counter()
+        )
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    timings = _timings.get()
+    started = conn.info.get('statement_started')
+    if timings is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    timings.db += elapsed
+    timings.statements += 1
+    if 'FOR UPDATE' in statement:
+        timings.lock += elapsed
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None:
+        started = connection.info.get('statement_started')
+        if started:
+            started.pop()
@@ -1,13 +1,59 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.asyncpg_pool import close_asyncpg_pool
+from app.cache.wallet_cache import get_wallet_cache
 from app.config import settings
+from app.database import engine, replica_engines
+from app.engine.balance_engine import close_balance_engine, get_balance_engine
+from app.instrumentation import TimingMiddleware
+from app.metrics import render_metrics
+from app.read_routing import ReadYourWritesMiddleware, read_routing_stats
 from app.routers.v1 import router as v1_router
+from app.services.admission import get_admission_controller
+from app.services.operation_coalescer import close_operation_coalescer
+from app.services.retry import retry_stats
+from app.services.timeouts import timeout_stats
+from app.services.wallet_stats_service import (close_wallet_stats_refresher,
+                                               start_wallet_stats_refresher)
+from app.warmup import close_warmup, start_warmup, warmup_state
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения: восстановление движка балансов, прогрев
+    пула соединений (в фоне, до готовности в /ready) и запуск пересчета
+    сводки по кошелькам при запуске, освобождение ресурсов при
+    остановке. К остановке uvicorn уже
+    дождался текущих запросов; здесь применяются операции, накопленные
+    группировщиком, сохраняется движок балансов и закрываются пулы.
+    """
+    if settings.wallet_engine_mode == 'memory':
+        await get_balance_engine()
+    start_warmup(engine)
+    start_wallet_stats_refresher()
+    yield
+    await close_warmup()
+    await close_wallet_stats_refresher()
+    await close_operation_coalescer()
+    await close_balance_engine()
+    await close_asyncpg_pool()
+    await engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
+
 
 app = FastAPI(
     title=settings.app_name,
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(TimingMiddleware)
 app.include_router(v1_router, prefix='/api')
 
 
@@ -25,3 +71,49 @@ async def root():
 async def health():
     """Health check."""
     return {'status': 'OK'}
+
+
+@app.get('/ready')
+async def ready():
+    """
+    Готовность принимать трафик: 503, пока при запуске не прогреты
+    соединения с базой. В отличие от /health, зависит от базы.
+    """
+    if not warmup_state.ready:
+        return JSONResponse(
+            {'status': 'starting'},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return {'status': 'ready'}
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    """Гистограммы замеров запросов в формате Prometheus."""
+    return PlainTextResponse(
+        render_metrics(), media_type='text/plain; version=0.0.4'
+    )
+
+
+@app.get('/stats')
+async def stats():
+    """Внутренние счетчики сервиса."""
+    cache = get_wallet_cache()
+    admission = get_admission_controller()
+    return {
+        'database_pool': {
+            'primary': engine.pool.snapshot(),
+            'replicas': [
+                replica_engine.pool.snapshot()
+                for replica_engine in replica_engines
+            ],
+        },
+        'wallet_cache': cache.stats() if cache is not None else None,
+        'transaction_retries': retry_stats.snapshot(),
+        'database_timeouts': timeout_stats.snapshot(),
+        'read_routing': read_routing_stats.snapshot(),
+        'warmup': warmup_state.snapshot(),
+        'admission': (
+            admission.snapshot() if admission is not None else None
+        ),
+    }
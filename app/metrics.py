@@ -0,0 +1,94 @@
+import bisect
+import math
+from typing import Sequence
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class _Series:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus. Счетчики хранятся по корзинам
+    без накопления и суммируются только при выводе, поэтому observe -
+    один bisect и три сложения.
+    """
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, ...], _Series] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = _Series(
+                len(self.buckets) + 1
+            )
+        series.buckets[bisect.bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for label_values, series in sorted(self._series.items()):
+            labels = [
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, label_values)
+            ]
+            cumulative = 0
+            for bound, count in zip(
+                self.buckets + (math.inf,), series.buckets
+            ):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else repr(float(bound))
+                bucket_labels = _labels(labels + [f'le="{le}"'])
+                lines.append(
+                    f'{self.name}_bucket{bucket_labels} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{_labels(labels)} {series.sum}')
+            lines.append(f'{self.name}_count{_labels(labels)} {series.count}')
+        return lines
+
+
+REGISTRY: list[Histogram] = []
+
+
+def render_metrics() -> str:
+    """Все зарегистрированные метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(labels: list[str]) -> str:
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
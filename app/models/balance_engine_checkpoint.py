@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class BalanceEngineCheckpoint(Base):
+    """Последняя запись журнала узла движка, сохраненная в базу."""
+    __tablename__ = 'balance_engine_checkpoints'
+
+    node_index: Mapped[int] = mapped_column(
+        primary_key=True,
+        autoincrement=False
+    )
+    last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return (
+            f'<BalanceEngineCheckpoint(node_index={self.node_index}, '
+            f'last_seq={self.last_seq})>'
+        )
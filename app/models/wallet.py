@@ -1,14 +1,17 @@
 from datetime import datetime
 import uuid
 
-from sqlalchemy import UUID, CheckConstraint, DateTime
+from sqlalchemy import UUID, BigInteger, CheckConstraint, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from app.database import Base
+from app.wallet_ids import new_wallet_uuid
 
 WALLET_BALANCE_DEFAULT = 2000   # Баланс по умолчанию
 WALLET_BALANCE_MIN = 0          # Минимальный баланс
+WALLET_BALANCE_SHARDS_DEFAULT = 1   # Баланс без шардирования
+WALLET_VERSION_INITIAL = 1          # Версия нового кошелька
 
 
 class Wallet(Base):
@@ -17,12 +20,25 @@ class Wallet(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=new_wallet_uuid
     )
     balance: Mapped[int] = mapped_column(
         nullable=False,
         default=WALLET_BALANCE_DEFAULT
     )
+    balance_shards: Mapped[int] = mapped_column(
+        nullable=False,
+        default=WALLET_BALANCE_SHARDS_DEFAULT,
+        server_default=str(WALLET_BALANCE_SHARDS_DEFAULT)
+    )
+    # Растет при каждом изменении баланса в строке wallets;
+    # оптимистичный режим обновления сравнивает ее при записи
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=WALLET_VERSION_INITIAL,
+        server_default=str(WALLET_VERSION_INITIAL)
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -0,0 +1,34 @@
+import uuid
+
+from sqlalchemy import UUID, CheckConstraint, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.wallet import WALLET_BALANCE_MIN
+
+
+class WalletBalanceShard(Base):
+    """
+    Часть баланса шардированного кошелька. Баланс такого кошелька -
+    wallets.balance плюс сумма его шардов.
+    """
+    __tablename__ = 'wallet_balance_shards'
+
+    wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey('wallets.id'),
+        primary_key=True
+    )
+    shard: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    balance: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    __table_args__ = (CheckConstraint(
+        f'balance >= {WALLET_BALANCE_MIN}',
+        name='wallet_balance_shard_non_negative'
+    ),)
+
+    def __repr__(self):
+        return (
+            f'<WalletBalanceShard(wallet_id={self.wallet_id}, '
+            f'shard={self.shard}, balance={self.balance})>'
+        )
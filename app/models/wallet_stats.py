@@ -0,0 +1,74 @@
+from sqlalchemy import DDL, BigInteger, DateTime, Float, column, event, table
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+from app.database import Base
+
+# Перцентили баланса в представлении, в том же порядке, что в SQL
+WALLET_STATS_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Сводка по всем кошелькам одной строкой: число кошельков, сумма,
+# минимум, максимум и среднее балансов (с учетом шардов), перцентили и
+# число кошельков по десятичным порядкам баланса (0 - нулевой баланс,
+# k - от 10^(k-1) до 10^k - 1). refreshed_at - время обновления.
+WALLET_STATS_VIEW_SQL = '''
+CREATE MATERIALIZED VIEW IF NOT EXISTS wallet_stats AS
+WITH balances AS (
+    SELECT wallets.balance + coalesce(shards.balance, 0) AS balance
+    FROM wallets
+    LEFT JOIN (
+        SELECT wallet_id, sum(balance) AS balance
+        FROM wallet_balance_shards
+        GROUP BY wallet_id
+    ) AS shards ON shards.wallet_id = wallets.id
+),
+buckets AS (
+    SELECT
+        CASE WHEN balance = 0 THEN 0
+        ELSE floor(log(balance))::integer + 1 END AS bucket,
+        count(*) AS wallets
+    FROM balances
+    GROUP BY 1
+)
+SELECT
+    1 AS id,
+    count(*) AS wallets_count,
+    coalesce(sum(balance), 0)::bigint AS total_balance,
+    coalesce(min(balance), 0)::bigint AS min_balance,
+    coalesce(max(balance), 0)::bigint AS max_balance,
+    coalesce(avg(balance), 0)::double precision AS avg_balance,
+    percentile_disc(ARRAY[0.5, 0.9, 0.99]::double precision[])
+        WITHIN GROUP (ORDER BY balance)::bigint[] AS percentiles,
+    (
+        SELECT coalesce(jsonb_object_agg(bucket, wallets), '{}'::jsonb)
+        FROM buckets
+    ) AS distribution,
+    now() AS refreshed_at
+FROM balances
+WITH DATA
+'''
+# Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+WALLET_STATS_INDEX_SQL = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS wallet_stats_id ON wallet_stats (id)'
+)
+
+wallet_stats = table(
+    'wallet_stats',
+    column('wallets_count', BigInteger),
+    column('total_balance', BigInteger),
+    column('min_balance', BigInteger),
+    column('max_balance', BigInteger),
+    column('avg_balance', Float),
+    column('percentiles', ARRAY(BigInteger)),
+    column('distribution', JSONB),
+    column('refreshed_at', DateTime(timezone=True)),
+)
+
+# Представление не входит в metadata как таблица: создается и удаляется
+# вместе со схемой (create_all / drop_all), в миграциях - отдельно
+event.listen(Base.metadata, 'after_create', DDL(WALLET_STATS_VIEW_SQL))
+event.listen(Base.metadata, 'after_create', DDL(WALLET_STATS_INDEX_SQL))
+event.listen(
+    Base.metadata,
+    'before_drop',
+    DDL('DROP MATERIALIZED VIEW IF EXISTS wallet_stats')
+)
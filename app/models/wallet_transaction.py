@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (UUID, BigInteger, DateTime, ForeignKey, String,
+                        UniqueConstraint)
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class WalletTransaction(Base):
+    """Запись журнала операций над кошельком (только добавление)."""
+    __tablename__ = 'wallet_transactions'
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True
+    )
+    wallet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey('wallets.id'),
+        nullable=False
+    )
+    operation_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    amount: Mapped[int] = mapped_column(nullable=False)
+    balance_after: Mapped[int] = mapped_column(nullable=False)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(
+        String(IDEMPOTENCY_KEY_MAX_LENGTH)
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    __table_args__ = (UniqueConstraint(
+        'wallet_id', 'idempotency_key',
+        name='wallet_transactions_idempotency_key'
+    ),)
+
+    def __repr__(self):
+        return (
+            f'<WalletTransaction(id={self.id}, wallet_id={self.wallet_id}, '
+            f'operation_type={self.operation_type}, amount={self.amount})>'
+        )
@@ -0,0 +1,76 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.instrumentation import record_pool_wait
+
+
+class PoolMetrics:
+    """Счетчики выдачи соединений из пула."""
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_max = 0
+
+    def record_checkout(self, wait_seconds: float, overflow: int) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        self.overflow_max = max(self.overflow_max, overflow)
+
+    def snapshot(self, pool: Pool) -> dict:
+        """Текущее состояние пула и накопленные счетчики."""
+        stats = {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': round(self.wait_seconds_total, 6),
+            'wait_seconds_max': round(self.wait_seconds_max, 6),
+            'wait_seconds_avg': round(
+                self.wait_seconds_total / self.checkouts, 6
+            ) if self.checkouts else 0.0,
+            'overflow_max': self.overflow_max,
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(0, pool.overflow()),
+            })
+        return stats
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool со сбором метрик: время ожидания соединения,
+    использование overflow и таймауты. Счетчики у каждого пула свои, так
+    что основная база и реплики видны в /stats по отдельности.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> 'InstrumentedAsyncPool':
+        # engine.dispose() пересоздает пул, счетчики переходят в новый
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def snapshot(self) -> dict:
+        """Текущее состояние пула и накопленные счетчики."""
+        return self.metrics.snapshot(self)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        wait_seconds = time.perf_counter() - started
+        self.metrics.record_checkout(wait_seconds, max(0, self.overflow()))
+        record_pool_wait(wait_seconds)
+        return connection
@@ -0,0 +1,115 @@
+import math
+import random
+import time
+from typing import AsyncGenerator
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import database
+from app.config import settings
+from app.database import get_db
+
+LAST_WRITE_COOKIE = 'wallet_last_write'
+WRITE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+API_PREFIX = '/api/'
+# POST-эндпоинты только на чтение: после них клиент не считается писавшим
+READ_ONLY_PATH_SUFFIXES = (':lookup',)
+
+
+class ReadRoutingStats:
+    """Счетчики выбора базы для чтения."""
+    def __init__(self):
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.read_your_writes = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'replicas': len(database.ReplicaSessionLocals),
+            'primary_reads': self.primary_reads,
+            'replica_reads': self.replica_reads,
+            'read_your_writes': self.read_your_writes,
+        }
+
+
+read_routing_stats = ReadRoutingStats()
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware, отмечающий клиента после успешной записи в API:
+    cookie со временем записи направляет его следующие чтения в течение
+    READ_YOUR_WRITES_WINDOW_SECONDS на основную базу, а не на реплику,
+    которая могла еще не получить запись. Cookie видна всем процессам
+    сервиса. Без реплик не ставится.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope['type'] != 'http'
+            or scope['method'] not in WRITE_METHODS
+            or not scope['path'].startswith(API_PREFIX)
+            or scope['path'].endswith(READ_ONLY_PATH_SUFFIXES)
+            or not database.ReplicaSessionLocals
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if (
+                message['type'] == 'http.response.start'
+                and message['status'] < 400
+            ):
+                message['headers'] = list(message.get('headers', [])) + [(
+                    b'set-cookie', _last_write_cookie(time.time()).encode()
+                )]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _last_write_cookie(written_at: float) -> str:
+    max_age = math.ceil(settings.read_your_writes_window_seconds)
+    return (
+        f'{LAST_WRITE_COOKIE}={written_at:.6f}; Max-Age={max_age}; '
+        f'Path={API_PREFIX.rstrip("/")}; HttpOnly; SameSite=Lax'
+    )
+
+
+def wrote_recently(request: Request) -> bool:
+    """Писал ли клиент в API в пределах окна read-your-writes."""
+    try:
+        written_at = float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return (
+        time.time() - written_at < settings.read_your_writes_window_seconds
+    )
+
+
+async def get_read_db(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для методов только на чтение: случайная реплика из
+    DATABASE_REPLICA_URLS или основная база (db), если реплик нет или
+    клиент недавно писал. Сессия db не открывает соединение, пока ее
+    не используют.
+    """
+    replicas = database.ReplicaSessionLocals
+    if not replicas:
+        read_routing_stats.primary_reads += 1
+        yield db
+        return
+    if wrote_recently(request):
+        read_routing_stats.read_your_writes += 1
+        read_routing_stats.primary_reads += 1
+        yield db
+        return
+    read_routing_stats.replica_reads += 1
+    async with random.choice(replicas)() as session:
+        yield session
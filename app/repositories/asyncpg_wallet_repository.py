@@ -0,0 +1,150 @@
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+
+from app.models.wallet import WALLET_BALANCE_MIN
+from app.schemas.wallet import OperationType, balance_delta
+
+GET_WALLET_SQL = (
+    'SELECT id, balance + CASE WHEN balance_shards > 1 THEN ('
+    'SELECT coalesce(sum(balance), 0) FROM wallet_balance_shards '
+    'WHERE wallet_id = $1) ELSE 0 END AS balance '
+    'FROM wallets WHERE id = $1'
+)
+GET_BALANCE_SHARDS_SQL = 'SELECT balance_shards FROM wallets WHERE id = $1'
+APPLY_OPERATION_SQL = (
+    'WITH updated AS ('
+    'UPDATE wallets SET balance = balance + $2, version = version + 1, '
+    'updated_at = now() '
+    'WHERE id = $1 AND balance + $2 >= $3 AND balance_shards = 1 '
+    'RETURNING id, balance) '
+    'INSERT INTO wallet_transactions '
+    '(wallet_id, operation_type, amount, balance_after, idempotency_key) '
+    'SELECT id, $4, $5, balance, $6 FROM updated '
+    'RETURNING wallet_id AS id, balance_after AS balance'
+)
+APPLY_SHARDED_OPERATION_SQL = APPLY_OPERATION_SQL.replace(
+    ' AND balance_shards = 1', ''
+)
+DEPOSIT_TO_SHARD_SQL = (
+    'UPDATE wallet_balance_shards SET balance = balance + $3 '
+    'WHERE wallet_id = $1 AND shard = $2 '
+    'RETURNING wallet_id'
+)
+# Отдельный от DEPOSIT_TO_SHARD_SQL запрос: в READ COMMITTED он читает
+# основную строку и шарды с новым снимком, уже после слияния шардов,
+# которого мог ждать UPDATE шарда
+RECORD_SHARD_DEPOSIT_SQL = (
+    'INSERT INTO wallet_transactions '
+    '(wallet_id, operation_type, amount, balance_after, idempotency_key) '
+    'SELECT id, $2, $3, balance + ('
+    'SELECT coalesce(sum(balance), 0) FROM wallet_balance_shards '
+    'WHERE wallet_id = $1), $4 '
+    'FROM wallets WHERE id = $1 '
+    'RETURNING wallet_id AS id, balance_after AS balance'
+)
+LOCK_WALLET_SQL = 'SELECT 1 FROM wallets WHERE id = $1 FOR UPDATE'
+MERGE_SHARDS_SQL = (
+    'WITH drained AS ('
+    'UPDATE wallet_balance_shards AS shards SET balance = 0 '
+    'FROM (SELECT shard, balance FROM wallet_balance_shards '
+    'WHERE wallet_id = $1 AND balance <> 0 ORDER BY shard FOR UPDATE) '
+    'AS locked '
+    'WHERE shards.wallet_id = $1 AND shards.shard = locked.shard '
+    'RETURNING locked.balance) '
+    'UPDATE wallets SET balance = balance + ('
+    'SELECT coalesce(sum(balance), 0) FROM drained), '
+    'version = version + 1, updated_at = now() '
+    'WHERE id = $1'
+)
+GET_TRANSACTION_BY_KEY_SQL = (
+    'SELECT operation_type, amount, balance_after FROM wallet_transactions '
+    'WHERE wallet_id = $1 AND idempotency_key = $2'
+)
+
+
+class AsyncpgWalletRepository:
+    """
+    Репозиторий кошельков поверх соединения asyncpg.
+    Возвращает записи asyncpg без построения ORM-объектов; запросы
+    подготавливаются один раз на соединение кешем выражений asyncpg.
+    """
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+
+    async def get_by_uuid(self, wallet_uuid: UUID) -> Optional[asyncpg.Record]:
+        """Получить кошелек по uuid."""
+        return await self.connection.fetchrow(GET_WALLET_SQL, wallet_uuid)
+
+    async def get_balance_shards(self, wallet_uuid: UUID) -> Optional[int]:
+        """Число шардов баланса кошелька или None, если кошелька нет."""
+        return await self.connection.fetchval(
+            GET_BALANCE_SHARDS_SQL, wallet_uuid
+        )
+
+    async def apply_operation(
+        self,
+        wallet_uuid: UUID,
+        operation_type: OperationType,
+        amount: int,
+        idempotency_key: Optional[str] = None,
+        sharded: bool = False
+    ) -> Optional[asyncpg.Record]:
+        """
+        Атомарно изменить баланс кошелька и записать операцию в журнал
+        одним запросом. Возвращает (id, balance) или None, если кошелек
+        не найден, баланса недостаточно или кошелек шардирован.
+        Для шардированного кошелька (sharded=True) шарды должны быть
+        заранее слиты в основную строку через merge_shards.
+        """
+        return await self.connection.fetchrow(
+            APPLY_SHARDED_OPERATION_SQL if sharded else APPLY_OPERATION_SQL,
+            wallet_uuid,
+            balance_delta(operation_type, amount),
+            WALLET_BALANCE_MIN,
+            operation_type.value,
+            amount,
+            idempotency_key
+        )
+
+    async def deposit_to_shard(
+        self,
+        wallet_uuid: UUID,
+        shard: int,
+        amount: int,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[asyncpg.Record]:
+        """
+        Зачислить сумму на шард кошелька и записать операцию в журнал.
+        Возвращает (id, balance) с полным балансом или None, если шарда
+        нет. Выполняется внутри транзакции соединения.
+        """
+        deposited = await self.connection.fetchval(
+            DEPOSIT_TO_SHARD_SQL, wallet_uuid, shard, amount
+        )
+        if deposited is None:
+            return None
+        return await self.connection.fetchrow(
+            RECORD_SHARD_DEPOSIT_SQL,
+            wallet_uuid,
+            OperationType.DEPOSIT.value,
+            amount,
+            idempotency_key
+        )
+
+    async def merge_shards(self, wallet_uuid: UUID) -> None:
+        """
+        Заблокировать кошелек и перенести его шарды в основную строку.
+        Выполняется внутри транзакции соединения.
+        """
+        await self.connection.execute(LOCK_WALLET_SQL, wallet_uuid)
+        await self.connection.execute(MERGE_SHARDS_SQL, wallet_uuid)
+
+    async def get_transaction_by_idempotency_key(
+        self, wallet_uuid: UUID, idempotency_key: str
+    ) -> Optional[asyncpg.Record]:
+        """Найти операцию кошелька по ключу идемпотентности."""
+        return await self.connection.fetchrow(
+            GET_TRANSACTION_BY_KEY_SQL, wallet_uuid, idempotency_key
+        )
@@ -0,0 +1,29 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.balance_engine_checkpoint import BalanceEngineCheckpoint
+
+
+class BalanceEngineCheckpointRepository:
+    """Репозиторий контрольных точек движка балансов."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_last_seq(self, node_index: int) -> int:
+        """Номер последней сохраненной записи журнала узла (0 - нет)."""
+        result = await self.db.execute(
+            select(BalanceEngineCheckpoint.last_seq)
+            .where(BalanceEngineCheckpoint.node_index == node_index)
+        )
+        return result.scalar() or 0
+
+    async def save(self, node_index: int, last_seq: int) -> None:
+        """Сохранить номер последней записи журнала узла."""
+        statement = insert(BalanceEngineCheckpoint).values(
+            node_index=node_index, last_seq=last_seq
+        )
+        await self.db.execute(statement.on_conflict_do_update(
+            index_elements=[BalanceEngineCheckpoint.node_index],
+            set_={'last_seq': statement.excluded.last_seq}
+        ))
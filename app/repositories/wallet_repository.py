@@ -1,11 +1,17 @@
-from typing import Optional
+from typing import Iterable, Mapping, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (Integer, Row, String, Update, Uuid, any_, case, column,
+                        func, insert, literal, select, update)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.wallet import Wallet
-from app.schemas.wallet import WalletCreate
+from app.config import settings
+from app.models.wallet import WALLET_BALANCE_MIN, Wallet
+from app.models.wallet_balance_shard import WalletBalanceShard
+from app.models.wallet_transaction import WalletTransaction
+from app.schemas.wallet import OperationType, WalletCreate, balance_delta
+from app.wallet_ids import new_wallet_uuid
 
 
 class WalletRepository:
@@ -14,13 +20,53 @@ class WalletRepository:
         self.db = db
 
     async def create(self, wallet_data: WalletCreate) -> Wallet:
-        """Создать новый кошелек."""
+        """Создать новый кошелек (и шарды баланса, если их больше одного)."""
         db_wallet = Wallet(**wallet_data.model_dump())
         self.db.add(db_wallet)
         await self.db.flush()
+        if db_wallet.balance_shards > 1:
+            await self.db.execute(insert(WalletBalanceShard), [
+                {'wallet_id': db_wallet.id, 'shard': shard, 'balance': 0}
+                for shard in range(db_wallet.balance_shards)
+            ])
         await self.db.refresh(db_wallet)
         return db_wallet
 
+    async def create_many(
+        self, balances: Sequence[int]
+    ) -> Sequence[tuple[UUID, int]]:
+        """
+        Создать кошельки одним запросом.
+        Большие пачки загружаются через COPY, остальные - одним
+        INSERT ... SELECT FROM unnest(...) RETURNING.
+        """
+        wallet_uuids = [new_wallet_uuid() for _ in balances]
+        if len(balances) >= settings.wallet_bulk_copy_threshold:
+            await self._copy_wallets(wallet_uuids, balances)
+            return list(zip(wallet_uuids, balances))
+        new_wallets = _balances_table(wallet_uuids, balances, 'new_wallets')
+        result = await self.db.execute(
+            insert(Wallet)
+            .from_select(
+                ['id', 'balance'],
+                select(new_wallets.c.id, new_wallets.c.balance)
+            )
+            .returning(Wallet.id, Wallet.balance)
+        )
+        return result.all()
+
+    async def _copy_wallets(
+        self, wallet_uuids: Sequence[UUID], balances: Sequence[int]
+    ) -> None:
+        """Загрузить кошельки через COPY соединения asyncpg."""
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Wallet.__tablename__,
+            records=zip(wallet_uuids, balances),
+            columns=['id', 'balance']
+        )
+
     async def get_by_uuid(self, wallet_uuid: UUID) -> Optional[Wallet]:
         """Получить кошелек по uuid."""
         result = await self.db.execute(
@@ -28,6 +74,58 @@ class WalletRepository:
         )
         return result.scalars().first()
 
+    async def get_balance(self, wallet_uuid: UUID) -> Optional[Row]:
+        """
+        Получить (id, balance) кошелька; баланс шардированного кошелька -
+        сумма основной строки и шардов.
+        """
+        shards_total = (
+            select(func.coalesce(func.sum(WalletBalanceShard.balance), 0))
+            .where(WalletBalanceShard.wallet_id == Wallet.id)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(
+                Wallet.id,
+                (Wallet.balance + case(
+                    (Wallet.balance_shards > 1, shards_total), else_=0
+                )).label('balance')
+            )
+            .where(Wallet.id == wallet_uuid)
+        )
+        return result.first()
+
+    async def get_balances(
+        self, wallet_uuids: Iterable[UUID]
+    ) -> dict[UUID, int]:
+        """
+        Получить балансы нескольких кошельков одним запросом
+        WHERE id = ANY(:ids), с учетом шардов. Ненайденных кошельков
+        в результате нет.
+        """
+        shards_total = (
+            select(func.coalesce(func.sum(WalletBalanceShard.balance), 0))
+            .where(WalletBalanceShard.wallet_id == Wallet.id)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(
+                Wallet.id,
+                Wallet.balance + case(
+                    (Wallet.balance_shards > 1, shards_total), else_=0
+                )
+            )
+            .where(Wallet.id == any_(_uuid_array(wallet_uuids)))
+        )
+        return {wallet_id: balance for wallet_id, balance in result}
+
+    async def get_balance_shards(self, wallet_uuid: UUID) -> Optional[int]:
+        """Число шардов баланса кошелька или None, если кошелька нет."""
+        result = await self.db.execute(
+            select(Wallet.balance_shards).where(Wallet.id == wallet_uuid)
+        )
+        return result.scalar()
+
     async def get_by_uuid_with_lock(
         self, wallet_uuid: UUID
     ) -> Optional[Wallet]:
@@ -40,9 +138,279 @@ class WalletRepository:
         )
         return result.scalars().first()
 
+    async def get_unsharded_with_lock(
+        self, wallet_uuid: UUID
+    ) -> Optional[Wallet]:
+        """
+        Получить кошелек без шардов баланса с блокировкой. Строку
+        шардированного кошелька не блокирует и, как для несуществующего
+        кошелька, возвращает None.
+        """
+        result = await self.db.execute(
+            select(Wallet)
+            .where(Wallet.id == wallet_uuid, Wallet.balance_shards == 1)
+            .with_for_update()
+        )
+        return result.scalars().first()
+
+    async def get_versioned(self, wallet_uuid: UUID) -> Optional[Row]:
+        """
+        Получить (id, balance, balance_shards, version) кошелька без
+        блокировки - для compare_and_set_balance.
+        """
+        result = await self.db.execute(
+            select(
+                Wallet.id, Wallet.balance, Wallet.balance_shards,
+                Wallet.version
+            )
+            .where(Wallet.id == wallet_uuid)
+        )
+        return result.first()
+
     async def update_balance(self, wallet: Wallet, new_balance: int) -> Wallet:
         """Обновить баланс кошелька."""
         wallet.balance = new_balance
+        wallet.version = Wallet.version + 1
         await self.db.flush()
         await self.db.refresh(wallet)
         return wallet
+
+    async def apply_operation(
+        self,
+        wallet_uuid: UUID,
+        operation_type: OperationType,
+        amount: int,
+        idempotency_key: Optional[str] = None,
+        sharded: bool = False
+    ) -> Optional[Row]:
+        """
+        Атомарно изменить баланс кошелька и записать операцию в журнал
+        одним запросом: WITH updated AS (UPDATE ... RETURNING) INSERT.
+        Возвращает (id, balance) или None, если кошелек не найден,
+        баланса недостаточно или кошелек шардирован. Для шардированного
+        кошелька (sharded=True) шарды должны быть заранее слиты в
+        основную строку через merge_shards.
+        """
+        delta = balance_delta(operation_type, amount)
+        conditions = [
+            Wallet.id == wallet_uuid,
+            Wallet.balance + delta >= WALLET_BALANCE_MIN
+        ]
+        if not sharded:
+            conditions.append(Wallet.balance_shards == 1)
+        return await self._update_with_transaction(
+            update(Wallet)
+            .where(*conditions)
+            .values(
+                balance=Wallet.balance + delta, version=Wallet.version + 1
+            ),
+            operation_type,
+            amount,
+            idempotency_key
+        )
+
+    async def compare_and_set_balance(
+        self,
+        wallet_uuid: UUID,
+        expected_version: int,
+        new_balance: int,
+        operation_type: OperationType,
+        amount: int,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[Row]:
+        """
+        Записать новый баланс, если версия кошелька не изменилась с
+        чтения (compare-and-swap), и операцию в журнал одним запросом.
+        Возвращает (id, balance) или None при конфликте версий.
+        """
+        return await self._update_with_transaction(
+            update(Wallet)
+            .where(
+                Wallet.id == wallet_uuid,
+                Wallet.version == expected_version
+            )
+            .values(balance=new_balance, version=Wallet.version + 1),
+            operation_type,
+            amount,
+            idempotency_key
+        )
+
+    async def _update_with_transaction(
+        self,
+        wallet_update: Update,
+        operation_type: OperationType,
+        amount: int,
+        idempotency_key: Optional[str]
+    ) -> Optional[Row]:
+        """
+        Выполнить UPDATE кошелька и записать операцию в журнал:
+        WITH updated AS (UPDATE ... RETURNING) INSERT ... RETURNING.
+        """
+        updated = wallet_update.returning(
+            Wallet.id, Wallet.balance
+        ).cte('updated')
+        result = await self.db.execute(
+            insert(WalletTransaction)
+            .from_select(
+                [
+                    'wallet_id', 'operation_type', 'amount',
+                    'balance_after', 'idempotency_key'
+                ],
+                select(
+                    updated.c.id,
+                    literal(operation_type.value, String),
+                    literal(amount, Integer),
+                    updated.c.balance,
+                    literal(idempotency_key, String)
+                )
+            )
+            .returning(
+                WalletTransaction.wallet_id.label('id'),
+                WalletTransaction.balance_after.label('balance')
+            )
+        )
+        return result.first()
+
+    async def deposit_to_shard(
+        self, wallet_uuid: UUID, shard: int, amount: int
+    ) -> Optional[int]:
+        """
+        Зачислить сумму на шард кошелька, не блокируя основную строку.
+        Возвращает баланс кошелька (основная строка и все шарды) после
+        зачисления или None, если шарда нет.
+        """
+        result = await self.db.execute(
+            update(WalletBalanceShard)
+            .where(
+                WalletBalanceShard.wallet_id == wallet_uuid,
+                WalletBalanceShard.shard == shard
+            )
+            .values(balance=WalletBalanceShard.balance + amount)
+            .returning(WalletBalanceShard.wallet_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar() is None:
+            return None
+        # Баланс читается отдельным запросом: в READ COMMITTED у него
+        # новый снимок, и если UPDATE шарда ждал слияния шардов
+        # списанием, основная строка и остальные шарды видны уже после него
+        wallet = await self.get_balance(wallet_uuid)
+        return wallet.balance
+
+    async def drain_shards(
+        self, wallet_uuids: Iterable[UUID]
+    ) -> dict[UUID, int]:
+        """
+        Обнулить шарды кошельков и вернуть снятые суммы.
+        Вызывающий должен держать блокировку строк wallets: порядок
+        блокировок wallets -> шарды исключает взаимные блокировки.
+        """
+        locked = (
+            select(
+                WalletBalanceShard.wallet_id,
+                WalletBalanceShard.shard,
+                WalletBalanceShard.balance
+            )
+            .where(
+                WalletBalanceShard.wallet_id == any_(
+                    _uuid_array(wallet_uuids)
+                ),
+                WalletBalanceShard.balance != 0
+            )
+            .order_by(WalletBalanceShard.wallet_id, WalletBalanceShard.shard)
+            .with_for_update()
+            .subquery('locked')
+        )
+        result = await self.db.execute(
+            update(WalletBalanceShard)
+            .where(
+                WalletBalanceShard.wallet_id == locked.c.wallet_id,
+                WalletBalanceShard.shard == locked.c.shard
+            )
+            .values(balance=0)
+            .returning(locked.c.wallet_id, locked.c.balance)
+            .execution_options(synchronize_session=False)
+        )
+        drained: dict[UUID, int] = {}
+        for wallet_id, balance in result:
+            drained[wallet_id] = drained.get(wallet_id, 0) + balance
+        return drained
+
+    async def merge_shards(self, wallet: Wallet) -> Wallet:
+        """
+        Перенести шарды заблокированного кошелька в основную строку.
+        После этого wallet.balance - полный баланс кошелька.
+        """
+        drained = await self.drain_shards([wallet.id])
+        if not drained:
+            return wallet
+        return await self.update_balance(
+            wallet, wallet.balance + drained[wallet.id]
+        )
+
+    async def add_balance_shards(
+        self, wallet: Wallet, balance_shards: int
+    ) -> Wallet:
+        """
+        Довести число шардов баланса заблокированного кошелька до
+        balance_shards: недостающие шарды создаются с нулевым балансом.
+        Существующие шарды не удаляются - на них могут ждать пополнения.
+        """
+        first_shard = (
+            0 if wallet.balance_shards == 1 else wallet.balance_shards
+        )
+        await self.db.execute(insert(WalletBalanceShard), [
+            {'wallet_id': wallet.id, 'shard': shard, 'balance': 0}
+            for shard in range(first_shard, balance_shards)
+        ])
+        wallet.balance_shards = balance_shards
+        await self.db.flush()
+        return wallet
+
+    async def get_balances_with_lock(
+        self, wallet_uuids: Iterable[UUID]
+    ) -> dict[UUID, int]:
+        """
+        Получить балансы нескольких кошельков с блокировкой.
+        Строки блокируются в порядке id, что исключает взаимные блокировки
+        между пакетами с пересекающимися кошельками.
+        """
+        result = await self.db.execute(
+            select(Wallet.id, Wallet.balance)
+            .where(Wallet.id == any_(_uuid_array(wallet_uuids)))
+            .order_by(Wallet.id)
+            .with_for_update()
+        )
+        return {wallet_id: balance for wallet_id, balance in result}
+
+    async def set_balances(self, balances: Mapping[UUID, int]) -> None:
+        """Записать новые балансы одним UPDATE ... FROM unnest(...)."""
+        new_balances = _balances_table(
+            balances.keys(), balances.values(), 'new_balances'
+        )
+        await self.db.execute(
+            update(Wallet)
+            .where(Wallet.id == new_balances.c.id)
+            .values(
+                balance=new_balances.c.balance, version=Wallet.version + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _uuid_array(wallet_uuids: Iterable[UUID]):
+    """Массив uuid одним параметром запроса."""
+    return literal(list(wallet_uuids), ARRAY(Uuid()))
+
+
+def _balances_table(
+    wallet_uuids: Iterable[UUID], balances: Iterable[int], name: str
+):
+    """Таблица (id, balance) из двух массивов: unnest(:ids, :balances)."""
+    return func.unnest(
+        _uuid_array(wallet_uuids),
+        literal(list(balances), ARRAY(Integer))
+    ).table_valued(
+        column('id', Uuid()),
+        column('balance', Integer)
+    ).render_derived().alias(name)
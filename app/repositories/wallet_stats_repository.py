@@ -0,0 +1,51 @@
+from typing import Optional
+
+from sqlalchemy import Row, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.wallet_stats import wallet_stats
+
+# Ключ advisory-блокировки обновления сводки: одновременно обновляет
+# один процесс
+WALLET_STATS_REFRESH_LOCK = 7_019_001
+
+
+class WalletStatsRepository:
+    """Репозиторий сводки по кошелькам (материализованное представление)."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self) -> Optional[Row]:
+        """Строка сводки и ее возраст в секундах (staleness_seconds)."""
+        age = func.clock_timestamp() - wallet_stats.c.refreshed_at
+        result = await self.db.execute(
+            select(
+                wallet_stats,
+                func.extract('epoch', age).label('staleness_seconds')
+            )
+        )
+        return result.first()
+
+    async def refresh(self, min_age_seconds: float = 0) -> bool:
+        """
+        Пересчитать сводку (REFRESH MATERIALIZED VIEW CONCURRENTLY: чтения
+        не блокируются). Пропускается, если сводку уже обновляет другой
+        процесс или она моложе min_age_seconds. Возвращает True, если
+        сводка пересчитана.
+        """
+        locked = await self.db.scalar(
+            select(func.pg_try_advisory_xact_lock(WALLET_STATS_REFRESH_LOCK))
+        )
+        if not locked:
+            return False
+        if min_age_seconds > 0:
+            stats = await self.get()
+            if (
+                stats is not None
+                and stats.staleness_seconds < min_age_seconds
+            ):
+                return False
+        await self.db.execute(
+            text('REFRESH MATERIALIZED VIEW CONCURRENTLY wallet_stats')
+        )
+        return True
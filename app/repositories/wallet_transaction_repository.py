@@ -0,0 +1,63 @@
+from typing import Iterable, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.wallet_transaction import WalletTransaction
+from app.schemas.wallet import OperationType
+
+
+class WalletTransactionRepository:
+    """Репозиторий журнала операций над кошельками."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add_many(self, transactions: Sequence[dict]) -> None:
+        """Добавить записи журнала одним многострочным INSERT."""
+        if transactions:
+            await self.db.execute(insert(WalletTransaction), transactions)
+
+    async def get_by_idempotency_key(
+        self, wallet_uuid: UUID, idempotency_key: str
+    ) -> Optional[WalletTransaction]:
+        """Найти операцию кошелька по ключу идемпотентности."""
+        result = await self.db.execute(
+            select(WalletTransaction).where(
+                WalletTransaction.wallet_id == wallet_uuid,
+                WalletTransaction.idempotency_key == idempotency_key
+            )
+        )
+        return result.scalars().first()
+
+    async def get_by_idempotency_keys(
+        self, wallet_uuid: UUID, idempotency_keys: Iterable[str]
+    ) -> dict[str, WalletTransaction]:
+        """Найти операции кошелька по нескольким ключам идемпотентности."""
+        result = await self.db.execute(
+            select(WalletTransaction).where(
+                WalletTransaction.wallet_id == wallet_uuid,
+                WalletTransaction.idempotency_key.in_(list(idempotency_keys))
+            )
+        )
+        return {
+            transaction.idempotency_key: transaction
+            for transaction in result.scalars()
+        }
+
+
+def transaction_values(
+    wallet_uuid: UUID,
+    operation_type: OperationType,
+    amount: int,
+    balance_after: int,
+    idempotency_key: Optional[str] = None
+) -> dict:
+    """Значения записи журнала для WalletTransactionRepository.add_many."""
+    return {
+        'wallet_id': wallet_uuid,
+        'operation_type': operation_type.value,
+        'amount': amount,
+        'balance_after': balance_after,
+        'idempotency_key': idempotency_key,
+    }
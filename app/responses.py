@@ -0,0 +1,56 @@
+import json
+from datetime import date, time
+from typing import Any, Union
+
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ через orjson, если он установлен, иначе через стандартный
+    json. Значения, которые не сериализуются напрямую (например, UUID
+    из asyncpg), приводятся к строке.
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(',', ':'),
+            default=_json_default
+        ).encode('utf-8')
+
+
+def _json_default(value: Any) -> str:
+    """Даты в ISO 8601, как у orjson; остальное - строкой."""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def json_response(
+    content: Union[BaseModel, dict],
+    status_code: int = status.HTTP_200_OK
+) -> Union[BaseModel, dict, Response]:
+    """
+    Готовый ответ эндпоинта в обход response_model: FastAPI не проверяет
+    и не сериализует повторно то, что уже собрал сервис. response_model
+    при этом остается в маршруте и описывает схему в OpenAPI. При
+    FAST_JSON_RESPONSES=false содержимое возвращается как есть.
+    """
+    if not settings.fast_json_responses:
+        return content
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    return FastJSONResponse(content, status_code=status_code)
@@ -1,19 +1,50 @@
+from typing import Iterator, Optional, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.wallet import (WalletCreate, WalletOperationRequest,
-                                WalletResponse)
+from app.dependencies import (HotPathWalletService, get_hot_path_service,
+                              get_read_service)
+from app.instrumentation import TimedRoute
+from app.models.wallet_transaction import IDEMPOTENCY_KEY_MAX_LENGTH
+from app.read_routing import get_read_db
+from app.responses import json_response
+from app.schemas.wallet import (WalletBatchOperationRequest,
+                                WalletBatchOperationResponse, WalletBulkCreate,
+                                WalletCreate, WalletLookupRequest,
+                                WalletLookupResponse, WalletOperationRequest,
+                                WalletResponse, WalletShardRequest,
+                                WalletShardResponse, WalletStatsResponse,
+                                WalletTransferRequest, WalletTransferResponse)
+from app.services.admission import admit_operation
 from app.services.wallet_service import WalletService
+from app.services.wallet_stats_service import WalletStatsService
 
 router = APIRouter(
     prefix='/wallets',
-    tags=['Wallets']
+    tags=['Wallets'],
+    route_class=TimedRoute
 )
 
 
+@router.get(
+    '/stats',
+    response_model=WalletStatsResponse,
+    status_code=status.HTTP_200_OK
+)
+async def get_wallet_stats(
+    db: AsyncSession = Depends(get_read_db)
+) -> WalletStatsResponse:
+    """
+    Сводка по всем кошелькам: число, сумма и распределение балансов.
+    Пересчитывается периодически, возраст - в staleness_seconds.
+    """
+    return json_response(await WalletStatsService(db).get())
+
+
 @router.get(
     '/{wallet_uuid}',
     response_model=WalletResponse,
@@ -21,10 +52,10 @@ router = APIRouter(
 )
 async def get_wallet(
     wallet_uuid: UUID,
-    db: AsyncSession = Depends(get_db)
+    service: HotPathWalletService = Depends(get_read_service)
 ) -> WalletResponse:
     """Получить информацию о кошельке."""
-    return await WalletService(db).get_by_uuid(wallet_uuid)
+    return json_response(await service.get_by_uuid(wallet_uuid))
 
 
 @router.post(
@@ -37,7 +68,50 @@ async def create_wallet(
     db: AsyncSession = Depends(get_db)
 ) -> WalletResponse:
     """Создать кошелек."""
-    return await WalletService(db).create(wallet_data)
+    return json_response(
+        await WalletService(db).create(wallet_data),
+        status.HTTP_201_CREATED
+    )
+
+
+@router.post(
+    ':bulk',
+    status_code=status.HTTP_201_CREATED,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_201_CREATED: {
+            'description': 'Созданные кошельки, по одному JSON на строку',
+            'content': {'application/x-ndjson': {}},
+        }
+    }
+)
+async def create_wallets_bulk(
+    bulk_data: WalletBulkCreate,
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """Создать кошельки пачкой."""
+    wallets = await WalletService(db).create_many(bulk_data)
+    return StreamingResponse(
+        _ndjson_wallets(wallets),
+        status_code=status.HTTP_201_CREATED,
+        media_type='application/x-ndjson'
+    )
+
+
+@router.post(
+    ':lookup',
+    response_model=WalletLookupResponse,
+    status_code=status.HTTP_200_OK
+)
+async def lookup_wallets(
+    lookup_request: WalletLookupRequest,
+    db: AsyncSession = Depends(get_read_db)
+) -> WalletLookupResponse:
+    """
+    Получить несколько кошельков одним запросом (не больше
+    WALLET_LOOKUP_MAX_IDS). Ненайденные uuid возвращаются в missing.
+    """
+    return json_response(await WalletService(db).get_many(lookup_request.ids))
 
 
 @router.post(
@@ -48,7 +122,72 @@ async def create_wallet(
 async def update_wallet_balance(
     wallet_uuid: UUID,
     wallet_request: WalletOperationRequest,
-    db: AsyncSession = Depends(get_db)
+    idempotency_key: Optional[str] = Header(
+        default=None,
+        alias='Idempotency-Key',
+        min_length=1,
+        max_length=IDEMPOTENCY_KEY_MAX_LENGTH
+    ),
+    service: HotPathWalletService = Depends(get_hot_path_service)
 ) -> WalletResponse:
     """Обновить баланс кошелька."""
-    return await WalletService(db).update_balance(wallet_request, wallet_uuid)
+    async with admit_operation(wallet_uuid):
+        return json_response(await service.update_balance(
+            wallet_request, wallet_uuid, idempotency_key
+        ))
+
+
+@router.post(
+    '/{wallet_uuid}:shard',
+    response_model=WalletShardResponse,
+    status_code=status.HTTP_200_OK
+)
+async def shard_wallet(
+    wallet_uuid: UUID,
+    shard_request: WalletShardRequest,
+    db: AsyncSession = Depends(get_db)
+) -> WalletShardResponse:
+    """
+    Перевести существующий кошелек на шарды баланса (горячий получатель:
+    кошелек комиссий, казначейство) или добавить ему шардов.
+    """
+    return json_response(await WalletService(db).add_balance_shards(
+        wallet_uuid, shard_request
+    ))
+
+
+@router.post(
+    '/operations:batch',
+    response_model=WalletBatchOperationResponse,
+    status_code=status.HTTP_200_OK
+)
+async def apply_wallet_operations_batch(
+    batch_request: WalletBatchOperationRequest,
+    db: AsyncSession = Depends(get_db)
+) -> WalletBatchOperationResponse:
+    """Выполнить пакет операций над кошельками в одной транзакции."""
+    return json_response(await WalletService(db).apply_batch(batch_request))
+
+
+@router.post(
+    '/transfers',
+    response_model=WalletTransferResponse,
+    status_code=status.HTTP_200_OK
+)
+async def transfer_between_wallets(
+    transfer_request: WalletTransferRequest,
+    db: AsyncSession = Depends(get_db)
+) -> WalletTransferResponse:
+    """Перевести средства с одного кошелька на другой."""
+    return json_response(await WalletService(db).transfer(transfer_request))
+
+
+def _ndjson_wallets(
+    wallets: Sequence[tuple[UUID, int]], chunk_size: int = 1000
+) -> Iterator[str]:
+    """Сериализовать кошельки в NDJSON порциями по chunk_size строк."""
+    for start in range(0, len(wallets), chunk_size):
+        yield ''.join(
+            f'{{"id":"{wallet_id}","balance":{balance}}}\n'
+            for wallet_id, balance in wallets[start:start + chunk_size]
+        )
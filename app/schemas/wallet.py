@@ -1,9 +1,15 @@
+from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Optional
+from uuid import UUID
 
-from pydantic import UUID4, BaseModel, ConfigDict, Field
+from pydantic import (AfterValidator, BaseModel, ConfigDict, Field,
+                      model_validator)
 
-from app.models.wallet import WALLET_BALANCE_DEFAULT
+from app.config import settings
+from app.models.wallet import (WALLET_BALANCE_DEFAULT,
+                               WALLET_BALANCE_SHARDS_DEFAULT)
+from app.wallet_ids import WALLET_UUID_VERSIONS
 
 
 class OperationType(str, Enum):
@@ -11,6 +17,35 @@ class OperationType(str, Enum):
     WITHDRAW = 'WITHDRAW'
 
 
+def balance_delta(operation_type: OperationType, amount: int) -> int:
+    """Изменение баланса кошелька в результате операции."""
+    if operation_type == OperationType.WITHDRAW:
+        return -amount
+    return amount
+
+
+def check_wallet_uuid_version(value: UUID) -> UUID:
+    """Проверить, что uuid кошелька версии 4 или 7."""
+    if value.version not in WALLET_UUID_VERSIONS:
+        raise ValueError(f'UUID version {value.version} is not allowed')
+    return value
+
+
+# uuid кошелька: случайный (v4) или упорядоченный по времени (v7)
+WalletUUID = Annotated[UUID, AfterValidator(check_wallet_uuid_version)]
+
+
+class BatchMode(str, Enum):
+    ATOMIC = 'ATOMIC'
+    BEST_EFFORT = 'BEST_EFFORT'
+
+
+class BatchOperationStatus(str, Enum):
+    APPLIED = 'APPLIED'
+    REJECTED = 'REJECTED'
+    NOT_APPLIED = 'NOT_APPLIED'
+
+
 class WalletOperationRequest(BaseModel):
     operation_type: OperationType = Field(...)
     amount: int = Field(..., gt=0)
@@ -18,10 +53,134 @@ class WalletOperationRequest(BaseModel):
 
 class WalletCreate(BaseModel):
     balance: Optional[int] = Field(ge=0, default=WALLET_BALANCE_DEFAULT)
+    balance_shards: int = Field(
+        ge=1,
+        le=settings.wallet_max_balance_shards,
+        default=WALLET_BALANCE_SHARDS_DEFAULT
+    )
+
+
+class WalletShardRequest(BaseModel):
+    balance_shards: int = Field(
+        ge=WALLET_BALANCE_SHARDS_DEFAULT,
+        le=settings.wallet_max_balance_shards
+    )
+
+
+class WalletBulkCreate(BaseModel):
+    wallets: Optional[list[WalletCreate]] = Field(
+        default=None, min_length=1, max_length=settings.wallet_bulk_max_wallets
+    )
+    count: Optional[int] = Field(
+        default=None, gt=0, le=settings.wallet_bulk_max_wallets
+    )
+    balance: int = Field(ge=0, default=WALLET_BALANCE_DEFAULT)
+
+    @model_validator(mode='after')
+    def check_wallets_or_count(self) -> 'WalletBulkCreate':
+        if (self.wallets is None) == (self.count is None):
+            raise ValueError('Either wallets or count must be provided')
+        if any(
+            wallet.balance_shards != WALLET_BALANCE_SHARDS_DEFAULT
+            for wallet in self.wallets or []
+        ):
+            raise ValueError('Sharded wallets cannot be created in bulk')
+        return self
+
+    def balances(self) -> list[int]:
+        """Начальные балансы создаваемых кошельков."""
+        if self.wallets is None:
+            return [self.balance] * self.count
+        return [
+            WALLET_BALANCE_DEFAULT if wallet.balance is None
+            else wallet.balance
+            for wallet in self.wallets
+        ]
 
 
 class WalletResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    id: UUID4
+    id: WalletUUID
     balance: int
+
+    @classmethod
+    def of(cls, wallet_id: UUID, balance: int) -> 'WalletResponse':
+        """
+        Ответ из данных, уже проверенных базой или сервисом, без
+        повторной валидации pydantic.
+        """
+        return cls.model_construct(id=wallet_id, balance=balance)
+
+
+class WalletShardResponse(WalletResponse):
+    balance_shards: int
+
+
+class WalletLookupRequest(BaseModel):
+    ids: list[UUID] = Field(
+        ..., min_length=1, max_length=settings.wallet_lookup_max_ids
+    )
+
+
+class WalletLookupResponse(BaseModel):
+    wallets: list[WalletResponse]
+    missing: list[UUID]
+
+
+class WalletTransferRequest(BaseModel):
+    from_wallet_id: UUID
+    to_wallet_id: UUID
+    amount: int = Field(..., gt=0)
+
+    @model_validator(mode='after')
+    def check_wallets_differ(self) -> 'WalletTransferRequest':
+        if self.from_wallet_id == self.to_wallet_id:
+            raise ValueError('Source and destination wallets must differ')
+        return self
+
+
+class WalletTransferResponse(BaseModel):
+    from_wallet: WalletResponse
+    to_wallet: WalletResponse
+
+
+class WalletBatchOperation(WalletOperationRequest):
+    wallet_id: UUID
+
+
+class WalletBatchOperationRequest(BaseModel):
+    mode: BatchMode = BatchMode.ATOMIC
+    operations: list[WalletBatchOperation] = Field(
+        ..., min_length=1, max_length=settings.wallet_batch_max_operations
+    )
+
+
+class WalletBatchOperationResult(BaseModel):
+    wallet_id: UUID
+    status: BatchOperationStatus
+    balance: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class WalletBatchOperationResponse(BaseModel):
+    committed: bool
+    results: list[WalletBatchOperationResult]
+
+
+class WalletBalanceBucket(BaseModel):
+    min_balance: int
+    max_balance: int
+    wallets: int
+
+
+class WalletStatsResponse(BaseModel):
+    wallets_count: int
+    total_balance: int
+    min_balance: int
+    max_balance: int
+    avg_balance: float
+    percentiles: dict[str, Optional[int]]
+    distribution: list[WalletBalanceBucket]
+    refreshed_at: datetime
+    staleness_seconds: float
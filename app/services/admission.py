@@ -0,0 +1,141 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+# Через сколько секунд клиенту стоит повторить отклоненный запрос
+RETRY_AFTER_SECONDS = 1
+
+
+class WalletSlot:
+    """Очередь операций одного кошелька."""
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = 0
+
+
+class AdmissionController:
+    """
+    Контроль допуска операций над кошельками в процессе. Над одним
+    кошельком одновременно выполняется не больше wallet_concurrency
+    операций, остальные ждут своей очереди здесь, не занимая соединение
+    пула и не стоя на блокировке строки. Если очередь кошелька длиннее
+    wallet_max_queue, запрос сразу отклоняется с 429, если всего в
+    процессе больше max_in_flight операций - с 503; оба ответа с
+    Retry-After.
+    """
+    def __init__(
+        self,
+        max_in_flight: int,
+        wallet_concurrency: int,
+        wallet_max_queue: int
+    ):
+        self.max_in_flight = max_in_flight
+        self.wallet_concurrency = wallet_concurrency
+        self.wallet_max_queue = wallet_max_queue
+        self.wallets: dict[UUID, WalletSlot] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed_wallet = 0
+        self.shed_global = 0
+        self.max_queue_depth = 0
+
+    def snapshot(self) -> dict:
+        """Глубина очередей и число отклоненных запросов для /stats."""
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'queued_wallets': sum(
+                slot.pending > self.wallet_concurrency
+                for slot in self.wallets.values()
+            ),
+            'max_queue_depth': self.max_queue_depth,
+            'admitted': self.admitted,
+            'shed_wallet': self.shed_wallet,
+            'shed_global': self.shed_global,
+        }
+
+    @asynccontextmanager
+    async def admit(self, wallet_uuid: UUID) -> AsyncIterator[None]:
+        """Дождаться очереди кошелька или отклонить запрос."""
+        if self.in_flight >= self.max_in_flight:
+            self.shed_global += 1
+            raise _shed(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                'Too many operations in flight, retry later'
+            )
+        slot = self.wallets.get(wallet_uuid)
+        if slot is None:
+            slot = self.wallets[wallet_uuid] = WalletSlot(
+                self.wallet_concurrency
+            )
+        queue_depth = max(0, slot.pending - self.wallet_concurrency + 1)
+        if queue_depth > self.wallet_max_queue:
+            self.shed_wallet += 1
+            raise _shed(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                'Too many operations on this wallet, retry later'
+            )
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+        slot.pending += 1
+        self.in_flight += 1
+        try:
+            if slot.semaphore.locked():
+                self.queued += 1
+                try:
+                    await slot.semaphore.acquire()
+                finally:
+                    self.queued -= 1
+            else:
+                await slot.semaphore.acquire()
+            try:
+                self.admitted += 1
+                yield
+            finally:
+                slot.semaphore.release()
+        finally:
+            self.in_flight -= 1
+            slot.pending -= 1
+            if slot.pending == 0:
+                del self.wallets[wallet_uuid]
+
+
+def _shed(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+    )
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Контроль допуска процесса или None, если он выключен."""
+    global _admission_controller
+    if not settings.admission_control_enabled:
+        return None
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            wallet_concurrency=settings.admission_wallet_concurrency,
+            wallet_max_queue=settings.admission_wallet_max_queue
+        )
+    return _admission_controller
+
+
+@asynccontextmanager
+async def admit_operation(wallet_uuid: UUID) -> AsyncIterator[None]:
+    """Допуск операции над кошельком, если контроль допуска включен."""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    async with controller.admit(wallet_uuid):
+        yield
@@ -0,0 +1,143 @@
+import random
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+from fastapi import HTTPException
+
+from app.repositories.asyncpg_wallet_repository import AsyncpgWalletRepository
+from app.schemas.wallet import OperationType, WalletOperationRequest
+from app.services.idempotency import check_replay
+from app.services.retry import raise_if_transient, retry_transaction
+from app.services.timeouts import raise_if_timeout
+
+
+class AsyncpgWalletService:
+    """
+    Сервис горячих операций с кошельками поверх пула asyncpg.
+    Повторяет поведение WalletService.get_by_uuid и
+    WalletService.update_balance (режим atomic), но возвращает словари
+    вместо WalletResponse.
+    """
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+
+    async def get_by_uuid(self, wallet_uuid: UUID) -> dict:
+        """Получить кошелек по uuid."""
+        try:
+            async with self.pool.acquire() as connection:
+                wallet = await AsyncpgWalletRepository(
+                    connection
+                ).get_by_uuid(wallet_uuid)
+        except Exception as error:
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+        if wallet is None:
+            raise HTTPException(status_code=404, detail='Wallet not found')
+        return dict(wallet)
+
+    @retry_transaction
+    async def update_balance(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
+        """Обновить баланс кошелька и записать операцию в журнал."""
+        try:
+            async with self.pool.acquire() as connection:
+                repository = AsyncpgWalletRepository(connection)
+                if idempotency_key is not None:
+                    replayed = await self._replay(
+                        repository, wallet_request, wallet_uuid,
+                        idempotency_key
+                    )
+                    if replayed is not None:
+                        return replayed
+                try:
+                    wallet = await repository.apply_operation(
+                        wallet_uuid,
+                        wallet_request.operation_type,
+                        wallet_request.amount,
+                        idempotency_key
+                    )
+                    if wallet is None:
+                        balance_shards = await repository.get_balance_shards(
+                            wallet_uuid
+                        )
+                        if balance_shards is not None and balance_shards > 1:
+                            wallet = await self._update_sharded_balance(
+                                repository, wallet_request, wallet_uuid,
+                                idempotency_key, balance_shards
+                            )
+                except asyncpg.UniqueViolationError:
+                    replayed = await self._replay(
+                        repository, wallet_request, wallet_uuid,
+                        idempotency_key
+                    )
+                    if replayed is None:
+                        raise
+                    return replayed
+        except HTTPException:
+            raise
+        except Exception as error:
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+        if wallet is None:
+            if balance_shards is None:
+                raise HTTPException(
+                    status_code=404, detail='Wallet not found'
+                )
+            raise HTTPException(status_code=400, detail='Not enough balance')
+        return dict(wallet)
+
+    async def _update_sharded_balance(
+        self,
+        repository: AsyncpgWalletRepository,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str],
+        balance_shards: int
+    ) -> Optional[asyncpg.Record]:
+        """
+        Операция над шардированным кошельком, как в
+        WalletService._update_sharded_balance.
+        """
+        async with repository.connection.transaction():
+            if wallet_request.operation_type == OperationType.DEPOSIT:
+                return await repository.deposit_to_shard(
+                    wallet_uuid,
+                    random.randrange(balance_shards),
+                    wallet_request.amount,
+                    idempotency_key
+                )
+            await repository.merge_shards(wallet_uuid)
+            return await repository.apply_operation(
+                wallet_uuid,
+                wallet_request.operation_type,
+                wallet_request.amount,
+                idempotency_key,
+                sharded=True
+            )
+
+    async def _replay(
+        self,
+        repository: AsyncpgWalletRepository,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: str
+    ) -> Optional[dict]:
+        """Сохраненный результат операции с тем же ключом идемпотентности."""
+        transaction = await repository.get_transaction_by_idempotency_key(
+            wallet_uuid, idempotency_key
+        )
+        if transaction is None:
+            return None
+        check_replay(
+            wallet_request.operation_type,
+            wallet_request.amount,
+            transaction['operation_type'],
+            transaction['amount']
+        )
+        return {'id': wallet_uuid, 'balance': transaction['balance_after']}
@@ -0,0 +1,23 @@
+from fastapi import HTTPException
+
+from app.schemas.wallet import OperationType
+
+
+def check_replay(
+    operation_type: OperationType,
+    amount: int,
+    stored_operation_type: str,
+    stored_amount: int
+) -> None:
+    """
+    Проверить, что повторный запрос с тем же Idempotency-Key совпадает
+    с исходной операцией.
+    """
+    if (
+        stored_operation_type != operation_type.value
+        or stored_amount != amount
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail='Idempotency key is already used for another operation'
+        )
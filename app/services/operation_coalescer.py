@@ -0,0 +1,288 @@
+import asyncio
+import random
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.wallet import WALLET_BALANCE_MIN
+from app.models.wallet_transaction import WalletTransaction
+from app.repositories.wallet_repository import WalletRepository
+from app.repositories.wallet_transaction_repository import (
+    WalletTransactionRepository, transaction_values)
+from app.schemas.wallet import (OperationType, WalletOperationRequest,
+                                WalletResponse, balance_delta)
+from app.services.idempotency import check_replay
+from app.services.retry import (IDEMPOTENCY_CONFLICT,
+                                TransientTransactionError, raise_if_transient,
+                                retry_transaction)
+from app.services.timeouts import raise_if_timeout, set_transaction_timeouts
+
+
+class PendingOperation(NamedTuple):
+    request: WalletOperationRequest
+    idempotency_key: Optional[str]
+    future: asyncio.Future
+
+
+class OperationCoalescer:
+    """
+    Группировка операций над одним кошельком (group commit).
+
+    Операции, пришедшие в течение окна, применяются в порядке поступления
+    в одной транзакции под одной блокировкой строки. Каждый вызывающий
+    получает свой результат: баланс после своей операции или 400.
+    Транзакция, отмененная базой из-за конфликта с другим процессом,
+    повторяется целиком так же, как в retry_transaction.
+    """
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float,
+        max_batch_size: int
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: dict[UUID, list[PendingOperation]] = {}
+        self._tails: dict[UUID, asyncio.Task] = {}
+
+    async def submit(
+        self,
+        wallet_uuid: UUID,
+        wallet_request: WalletOperationRequest,
+        idempotency_key: Optional[str] = None
+    ) -> WalletResponse:
+        """Поставить операцию в очередь кошелька и дождаться результата."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(wallet_uuid)
+        if batch is None:
+            batch = self._pending[wallet_uuid] = []
+            loop.call_later(self.window, self._detach, wallet_uuid, batch)
+        batch.append(
+            PendingOperation(wallet_request, idempotency_key, future)
+        )
+        if len(batch) >= self.max_batch_size:
+            self._detach(wallet_uuid, batch)
+        return await future
+
+    async def close(self) -> None:
+        """Применить все накопленные операции и дождаться их завершения."""
+        for wallet_uuid, batch in list(self._pending.items()):
+            self._detach(wallet_uuid, batch)
+        if self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+    def _detach(self, wallet_uuid: UUID, batch: list[PendingOperation]):
+        """Закрыть пачку и запустить ее применение после предыдущей."""
+        if self._pending.get(wallet_uuid) is not batch:
+            return
+        del self._pending[wallet_uuid]
+        previous = self._tails.get(wallet_uuid)
+        task = asyncio.create_task(
+            self._flush(wallet_uuid, batch, previous)
+        )
+        self._tails[wallet_uuid] = task
+        task.add_done_callback(
+            lambda done: self._forget_tail(wallet_uuid, done)
+        )
+
+    def _forget_tail(self, wallet_uuid: UUID, task: asyncio.Task):
+        if self._tails.get(wallet_uuid) is task:
+            del self._tails[wallet_uuid]
+
+    async def _flush(
+        self,
+        wallet_uuid: UUID,
+        batch: list[PendingOperation],
+        previous: Optional[asyncio.Task]
+    ):
+        """Применить пачку операций одной транзакцией."""
+        if previous is not None:
+            await asyncio.wait([previous])
+        batch = [
+            operation for operation in batch
+            if not operation.future.cancelled()
+        ]
+        if not batch:
+            return
+        try:
+            results = await self._commit(wallet_uuid, batch)
+        except Exception as error:
+            if not isinstance(error, HTTPException):
+                error = HTTPException(status_code=500)
+            results = [
+                (operation.future, HTTPException(
+                    status_code=error.status_code,
+                    detail=error.detail,
+                    headers=error.headers
+                ))
+                for operation in batch
+            ]
+        for future, result in results:
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @retry_transaction
+    async def _commit(
+        self, wallet_uuid: UUID, batch: list[PendingOperation]
+    ) -> list[tuple[asyncio.Future, object]]:
+        """
+        Одна попытка применить пачку. Транзакция откатывается при выходе
+        из сессии, поэтому повтор начинается с чистого листа.
+        """
+        async with self.session_factory() as session:
+            try:
+                await set_transaction_timeouts(session, 'operation')
+                results = await self._apply(session, wallet_uuid, batch)
+                await session.commit()
+            except HTTPException:
+                raise
+            except IntegrityError as error:
+                raise TransientTransactionError(
+                    IDEMPOTENCY_CONFLICT
+                ) from error
+            except Exception as error:
+                raise_if_transient(error)
+                raise_if_timeout(error)
+                raise HTTPException(status_code=500)
+        return results
+
+    async def _apply(
+        self,
+        session: AsyncSession,
+        wallet_uuid: UUID,
+        batch: list[PendingOperation]
+    ) -> list[tuple[asyncio.Future, object]]:
+        """
+        Применить операции пачки по порядку под блокировкой кошелька.
+        Повторы по ключу идемпотентности (в том числе внутри пачки)
+        получают сохраненный результат. Пачка пополнений шардированного
+        кошелька зачисляется одной суммой на случайный шард без
+        блокировки строки; если в пачке есть списания, шарды сливаются в
+        основную строку.
+        """
+        repository = WalletRepository(session)
+        transactions = WalletTransactionRepository(session)
+        wallet = await repository.get_unsharded_with_lock(wallet_uuid)
+        balance_shards = 1
+        if wallet is None:
+            balance_shards = await repository.get_balance_shards(wallet_uuid)
+            if balance_shards is None:
+                raise HTTPException(status_code=404, detail='Wallet not found')
+            if any(
+                operation.request.operation_type == OperationType.WITHDRAW
+                for operation in batch
+            ):
+                wallet = await repository.merge_shards(
+                    await repository.get_by_uuid_with_lock(wallet_uuid)
+                )
+        keys = {
+            operation.idempotency_key for operation in batch
+            if operation.idempotency_key is not None
+        }
+        stored = (
+            await transactions.get_by_idempotency_keys(wallet_uuid, keys)
+            if keys else {}
+        )
+        if wallet is None:
+            amount = self._new_amount(batch, stored)
+            balance = await repository.deposit_to_shard(
+                wallet_uuid, random.randrange(balance_shards), amount
+            ) - amount
+        else:
+            balance = wallet.balance
+        ledger = []
+        results: list[tuple[asyncio.Future, object]] = []
+        for request, idempotency_key, future in batch:
+            previous = stored.get(idempotency_key)
+            if previous is not None:
+                results.append((future, self._replay(request, previous)))
+                continue
+            new_balance = balance + balance_delta(
+                request.operation_type, request.amount
+            )
+            if new_balance < WALLET_BALANCE_MIN:
+                results.append((future, HTTPException(
+                    status_code=400, detail='Not enough balance'
+                )))
+                continue
+            balance = new_balance
+            values = transaction_values(
+                wallet_uuid,
+                request.operation_type,
+                request.amount,
+                balance,
+                idempotency_key
+            )
+            ledger.append(values)
+            if idempotency_key is not None:
+                stored[idempotency_key] = WalletTransaction(**values)
+            results.append((future, WalletResponse.of(wallet_uuid, balance)))
+        if wallet is not None and balance != wallet.balance:
+            await repository.update_balance(wallet, balance)
+        await transactions.add_many(ledger)
+        return results
+
+    def _new_amount(
+        self,
+        batch: list[PendingOperation],
+        stored: dict[str, WalletTransaction]
+    ) -> int:
+        """Сумма операций пачки, не являющихся повторами по ключу."""
+        keys = set(stored)
+        amount = 0
+        for request, idempotency_key, _ in batch:
+            if idempotency_key in keys:
+                continue
+            if idempotency_key is not None:
+                keys.add(idempotency_key)
+            amount += request.amount
+        return amount
+
+    def _replay(
+        self, request: WalletOperationRequest, previous: WalletTransaction
+    ) -> object:
+        """Результат повтора операции с тем же ключом идемпотентности."""
+        try:
+            check_replay(
+                request.operation_type,
+                request.amount,
+                previous.operation_type,
+                previous.amount
+            )
+        except HTTPException as error:
+            return error
+        return WalletResponse.of(previous.wallet_id, previous.balance_after)
+
+
+_coalescer: Optional[OperationCoalescer] = None
+
+
+def get_operation_coalescer() -> OperationCoalescer:
+    """Общий для процесса экземпляр группировщика операций."""
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = OperationCoalescer(
+            AsyncSessionLocal,
+            window=settings.operation_coalescing_window_ms / 1000,
+            max_batch_size=settings.operation_coalescing_max_batch
+        )
+    return _coalescer
+
+
+async def close_operation_coalescer() -> None:
+    """Применить накопленные операции при остановке процесса."""
+    global _coalescer
+    if _coalescer is not None:
+        coalescer, _coalescer = _coalescer, None
+        await coalescer.close()
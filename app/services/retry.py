@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import random
+from collections import Counter
+from typing import Awaitable, Callable, Container, Optional, TypeVar
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+T = TypeVar('T')
+
+# SQLSTATE, с которыми Postgres откатывает транзакцию целиком: ее можно
+# безопасно повторить, ничего из нее не было применено
+TRANSIENT_SQLSTATES = {
+    '40001': 'serialization_failure',
+    '40P01': 'deadlock_detected',
+}
+# Конфликт версий в оптимистичном режиме: кошелек изменили между
+# чтением и compare-and-swap
+VERSION_CONFLICT = 'version_conflict'
+# Ключ идемпотентности из пачки сгруппированных операций успел записать
+# другой процесс: при повторе операция получит его результат
+IDEMPOTENCY_CONFLICT = 'idempotency_conflict'
+
+
+class TransientTransactionError(Exception):
+    """
+    Транзакция отменена из-за конфликта и может быть повторена. reason -
+    имя ошибки из TRANSIENT_SQLSTATES или VERSION_CONFLICT.
+    """
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def find_sqlstate(
+    error: BaseException, sqlstates: Container[str]
+) -> Optional[str]:
+    """
+    SQLSTATE ошибки базы из sqlstates или None. Просматривает исключение
+    SQLAlchemy, исходную ошибку драйвера (orig) и цепочку причин.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        for candidate in (error, getattr(error, 'orig', None)):
+            sqlstate = getattr(candidate, 'sqlstate', None)
+            if sqlstate in sqlstates:
+                return sqlstate
+        error = error.__cause__
+    return None
+
+
+def transient_sqlstate(error: BaseException) -> Optional[str]:
+    """SQLSTATE повторяемой ошибки базы или None."""
+    return find_sqlstate(error, TRANSIENT_SQLSTATES)
+
+
+def raise_if_transient(error: BaseException) -> None:
+    """
+    Пробросить повторяемую ошибку базы как TransientTransactionError,
+    чтобы она не превратилась в 500 в общем обработчике исключений.
+    Вызывается после отката транзакции.
+    """
+    if isinstance(error, TransientTransactionError):
+        raise error
+    sqlstate = transient_sqlstate(error)
+    if sqlstate is not None:
+        raise TransientTransactionError(
+            TRANSIENT_SQLSTATES[sqlstate]
+        ) from error
+
+
+class RetryBudget:
+    """
+    Бюджет повторов: каждая транзакция пополняет его на ratio, каждый
+    повтор расходует единицу, запас не больше capacity. При массовых
+    конфликтах повторы добавляют к нагрузке на базу не больше доли ratio.
+    """
+    def __init__(self, ratio: float, capacity: float):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RetryStats:
+    """Счетчики повторов транзакций."""
+    def __init__(self):
+        self.transactions = 0
+        self.retries: Counter = Counter()
+        self.exhausted = 0
+        self.budget_exhausted = 0
+
+    def snapshot(self) -> dict:
+        return {
+            'transactions': self.transactions,
+            'retries': sum(self.retries.values()),
+            'retries_by_error': dict(self.retries),
+            'exhausted': self.exhausted,
+            'budget_exhausted': self.budget_exhausted,
+        }
+
+
+retry_budget = RetryBudget(
+    settings.transaction_retry_budget_ratio,
+    settings.transaction_retry_budget_capacity
+)
+retry_stats = RetryStats()
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Пауза перед повтором номер attempt: экспоненциальная с полным
+    случайным разбросом, чтобы конфликтующие запросы разошлись по времени.
+    """
+    ceiling = min(
+        settings.transaction_retry_max_delay_ms,
+        settings.transaction_retry_base_delay_ms * 2 ** (attempt - 1)
+    )
+    return random.uniform(0, ceiling) / 1000
+
+
+def retry_transaction(
+    method: Callable[..., Awaitable[T]]
+) -> Callable[..., Awaitable[T]]:
+    """
+    Повторять транзакцию сервиса при TransientTransactionError.
+    Метод должен откатывать транзакцию до выхода с ошибкой, тогда каждая
+    попытка начинается заново, и операция применяется ровно один раз -
+    той попыткой, чей коммит прошел. Когда попытки или бюджет повторов
+    исчерпаны, возвращается 503.
+    """
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs) -> T:
+        retry_stats.transactions += 1
+        retry_budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                return await method(*args, **kwargs)
+            except TransientTransactionError as error:
+                if attempt >= settings.transaction_retry_max_attempts:
+                    retry_stats.exhausted += 1
+                elif not retry_budget.withdraw():
+                    retry_stats.budget_exhausted += 1
+                else:
+                    retry_stats.retries[error.reason] += 1
+                    await asyncio.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                raise HTTPException(
+                    status_code=503,
+                    detail='Transaction conflict, retry later',
+                    headers={'Retry-After': '1'}
+                ) from error
+
+    return wrapper
@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Literal, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.retry import find_sqlstate
+
+# Класс запросов определяет таймауты Postgres: read - чтения, operation -
+# операции над одним или двумя кошельками, bulk - пакетная работа,
+# stats_refresh - пересчет сводки, время которого растет с числом кошельков
+OperationClass = Literal['read', 'operation', 'bulk', 'stats_refresh']
+
+# SQLSTATE отмены по lock_timeout и по statement_timeout
+TIMEOUT_SQLSTATES = {
+    '55P03': 'lock_timeout',
+    '57014': 'statement_timeout',
+}
+RETRY_AFTER_SECONDS = 1
+
+
+class TimeoutStats:
+    """Счетчики запросов, отмененных по таймаутам Postgres."""
+    def __init__(self):
+        self.timeouts: Counter = Counter()
+
+    def snapshot(self) -> dict:
+        return {
+            'lock_timeout': self.timeouts['lock_timeout'],
+            'statement_timeout': self.timeouts['statement_timeout'],
+        }
+
+
+timeout_stats = TimeoutStats()
+
+
+def connection_timeouts(operation_class: OperationClass) -> dict[str, str]:
+    """Значения lock_timeout и statement_timeout класса запросов."""
+    return {
+        'lock_timeout': str(
+            getattr(settings, f'database_{operation_class}_lock_timeout_ms')
+        ),
+        'statement_timeout': str(getattr(
+            settings, f'database_{operation_class}_statement_timeout_ms'
+        )),
+    }
+
+
+async def set_transaction_timeouts(
+    db: AsyncSession, operation_class: OperationClass
+) -> None:
+    """
+    Таймауты класса запросов до конца текущей транзакции, как SET LOCAL
+    (set_config(..., true) принимает параметры запроса). Вызывается
+    первым запросом транзакции. Соединения пула уже открыты с таймаутами
+    класса read: если у класса они те же, лишний запрос не нужен.
+    """
+    values = connection_timeouts(operation_class)
+    if values == connection_timeouts('read'):
+        return
+    await db.execute(select(*(
+        func.set_config(name, value, True) for name, value in values.items()
+    )))
+
+
+def timeout_error(error: BaseException) -> Optional[HTTPException]:
+    """
+    Ответ на отмену запроса по таймауту или None, если это другая
+    ошибка: lock_timeout - 503 (кошелек заблокирован другой
+    транзакцией), statement_timeout - 504, оба с Retry-After.
+    """
+    sqlstate = find_sqlstate(error, TIMEOUT_SQLSTATES)
+    if sqlstate is None:
+        return None
+    reason = TIMEOUT_SQLSTATES[sqlstate]
+    timeout_stats.timeouts[reason] += 1
+    if reason == 'lock_timeout':
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Wallet is locked by another transaction, retry later',
+            headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+        )
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail='Database statement timed out, retry later',
+        headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+    )
+
+
+def raise_if_timeout(error: BaseException) -> None:
+    """
+    Пробросить отмену запроса по таймауту как ответ timeout_error,
+    чтобы она не превратилась в 500 в общем обработчике исключений.
+    Вызывается после отката транзакции.
+    """
+    response = timeout_error(error)
+    if response is not None:
+        raise response from error
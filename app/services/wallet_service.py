@@ -1,32 +1,112 @@
+import random
+from typing import Iterable, Optional, Sequence
 from uuid import UUID
 
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.wallet_cache import get_wallet_cache
+from app.config import settings
+from app.engine.balance_engine import get_balance_engine
 from app.models.wallet import WALLET_BALANCE_MIN, Wallet
 from app.repositories.wallet_repository import WalletRepository
-from app.schemas.wallet import (OperationType, WalletCreate,
-                                WalletOperationRequest, WalletResponse)
+from app.repositories.wallet_transaction_repository import (
+    WalletTransactionRepository, transaction_values)
+from app.schemas.wallet import (BatchMode, BatchOperationStatus, OperationType,
+                                WalletBatchOperation,
+                                WalletBatchOperationRequest,
+                                WalletBatchOperationResponse,
+                                WalletBatchOperationResult, WalletBulkCreate,
+                                WalletCreate, WalletLookupResponse,
+                                WalletOperationRequest, WalletResponse,
+                                WalletShardRequest, WalletShardResponse,
+                                WalletTransferRequest, WalletTransferResponse,
+                                balance_delta)
+from app.services.idempotency import check_replay
+from app.services.operation_coalescer import get_operation_coalescer
+from app.services.retry import (VERSION_CONFLICT, TransientTransactionError,
+                                raise_if_transient, retry_transaction)
+from app.services.timeouts import raise_if_timeout, set_transaction_timeouts
 
 
 class WalletService:
-    """Сервис для работы с кошельками."""
-    def __init__(self, db: AsyncSession):
+    """
+    Сервис для работы с кошельками. replica - сессия db открыта на
+    реплике: прочитанное с нее не сохраняется в кеш кошельков.
+    """
+    def __init__(self, db: AsyncSession, replica: bool = False):
         self.db = db
+        self.replica = replica
         self.repository = WalletRepository(db)
+        self.transactions = WalletTransactionRepository(db)
 
     async def get_by_uuid(self, wallet_uuid: UUID) -> WalletResponse:
         """Получить кошелек по uuid."""
+        if settings.wallet_engine_mode == 'memory':
+            return await (await get_balance_engine()).get(wallet_uuid)
+        cache = get_wallet_cache()
+        if cache is not None:
+            return await cache.get_or_load(
+                wallet_uuid, self._load_by_uuid, store=not self.replica
+            )
+        return await self._load_by_uuid(wallet_uuid)
+
+    async def _load_by_uuid(self, wallet_uuid: UUID) -> WalletResponse:
+        """Загрузить кошелек по uuid из базы."""
         try:
-            wallet = await self.repository.get_by_uuid(wallet_uuid)
+            wallet = await self.repository.get_balance(wallet_uuid)
             if not wallet:
                 raise HTTPException(status_code=404, detail='Wallet not found')
-            return WalletResponse.model_validate(wallet)
+            return WalletResponse.of(wallet.id, wallet.balance)
         except HTTPException:
             raise
-        except Exception:
+        except Exception as error:
+            raise_if_timeout(error)
             raise HTTPException(status_code=500)
 
+    async def get_many(
+        self, wallet_uuids: Sequence[UUID]
+    ) -> WalletLookupResponse:
+        """
+        Получить несколько кошельков одним запросом. Кошельки идут в
+        порядке запроса (повторы uuid схлопываются), ненайденные uuid
+        перечисляются в missing, а не прерывают весь вызов.
+        """
+        wallet_uuids = list(dict.fromkeys(wallet_uuids))
+        if settings.wallet_engine_mode == 'memory':
+            balances = await self._get_many_from_engine(wallet_uuids)
+        else:
+            try:
+                balances = await self.repository.get_balances(wallet_uuids)
+            except Exception as error:
+                raise_if_timeout(error)
+                raise HTTPException(status_code=500)
+        return WalletLookupResponse.model_construct(
+            wallets=[
+                WalletResponse.of(wallet_uuid, balances[wallet_uuid])
+                for wallet_uuid in wallet_uuids if wallet_uuid in balances
+            ],
+            missing=[
+                wallet_uuid for wallet_uuid in wallet_uuids
+                if wallet_uuid not in balances
+            ]
+        )
+
+    async def _get_many_from_engine(
+        self, wallet_uuids: Sequence[UUID]
+    ) -> dict[UUID, int]:
+        """Балансы из движка в памяти: база может от него отставать."""
+        engine = await get_balance_engine()
+        balances = {}
+        for wallet_uuid in wallet_uuids:
+            try:
+                balances[wallet_uuid] = (await engine.get(wallet_uuid)).balance
+            except HTTPException as error:
+                if error.status_code != 404:
+                    raise
+        return balances
+
     async def get_by_uuid_with_lock(
         self, wallet_uuid: UUID
     ) -> Wallet:
@@ -38,7 +118,9 @@ class WalletService:
             return wallet
         except HTTPException:
             raise
-        except Exception:
+        except Exception as error:
+            raise_if_transient(error)
+            raise_if_timeout(error)
             raise HTTPException(status_code=500)
 
     async def create(self, wallet_data: WalletCreate) -> WalletResponse:
@@ -46,17 +128,155 @@ class WalletService:
         try:
             wallet = await self.repository.create(wallet_data)
             await self.db.commit()
-            return WalletResponse.model_validate(wallet)
         except Exception:
             await self.db.rollback()
             raise HTTPException(status_code=500)
+        response = WalletResponse.of(wallet.id, wallet.balance)
+        cache = get_wallet_cache()
+        if cache is not None:
+            await cache.put(response)
+        return response
+
+    async def create_many(
+        self, bulk_data: WalletBulkCreate
+    ) -> Sequence[tuple[UUID, int]]:
+        """Создать кошельки пачкой в одной транзакции."""
+        try:
+            await set_transaction_timeouts(self.db, 'bulk')
+            wallets = await self.repository.create_many(bulk_data.balances())
+            await self.db.commit()
+            return wallets
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+
+    @retry_transaction
+    async def add_balance_shards(
+        self, wallet_uuid: UUID, shard_request: WalletShardRequest
+    ) -> WalletShardResponse:
+        """
+        Перевести существующий кошелек на шарды баланса или добавить ему
+        шардов. Под блокировкой строки шарды сливаются в основную строку,
+        и создаются недостающие; уменьшить число шардов нельзя.
+        """
+        try:
+            await set_transaction_timeouts(self.db, 'operation')
+            wallet = await self.get_by_uuid_with_lock(wallet_uuid)
+            if shard_request.balance_shards < wallet.balance_shards:
+                raise HTTPException(
+                    status_code=400,
+                    detail='Balance shards cannot be reduced'
+                )
+            if wallet.balance_shards > 1:
+                wallet = await self.repository.merge_shards(wallet)
+            if shard_request.balance_shards > wallet.balance_shards:
+                wallet = await self.repository.add_balance_shards(
+                    wallet, shard_request.balance_shards
+                )
+            await self.db.commit()
+            return WalletShardResponse.model_construct(
+                id=wallet.id,
+                balance=wallet.balance,
+                balance_shards=wallet.balance_shards
+            )
+        except HTTPException:
+            await self.db.rollback()
+            raise
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
 
     async def update_balance(
-        self, wallet_request: WalletOperationRequest, wallet_uuid: UUID
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str] = None
+    ) -> WalletResponse:
+        """
+        Обновить баланс кошелька.
+        Повтор запроса с тем же idempotency_key возвращает сохраненный
+        результат без блокировки и изменения баланса.
+        """
+        if settings.wallet_engine_mode == 'memory':
+            return await (await get_balance_engine()).apply(
+                wallet_uuid, wallet_request, idempotency_key
+            )
+        if idempotency_key is not None:
+            replayed = await self._replay(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+            if replayed is not None:
+                return replayed
+        if settings.operation_coalescing_enabled:
+            wallet = await get_operation_coalescer().submit(
+                wallet_uuid, wallet_request, idempotency_key
+            )
+        elif settings.balance_update_mode == 'pessimistic':
+            wallet = await self._update_balance_with_lock(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        elif settings.balance_update_mode == 'optimistic':
+            wallet = await self._update_balance_optimistic(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        else:
+            wallet = await self._update_balance_atomic(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        await self._invalidate_cached([wallet_uuid])
+        return wallet
+
+    @retry_transaction
+    async def _update_balance_with_lock(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str]
+    ) -> WalletResponse:
+        """
+        Обновить баланс под блокировкой строки (SELECT ... FOR UPDATE).
+        Пополнение шардированного кошелька зачисляется на шард без
+        блокировки, списание сливает шарды в основную строку.
+        """
+        return await self._apply_with_lock(
+            wallet_request, wallet_uuid, idempotency_key
+        )
+
+    async def _apply_with_lock(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str]
     ) -> WalletResponse:
-        """Обновить баланс кошелька."""
+        """
+        Одна попытка _update_balance_with_lock без повторов: ее вызывают
+        и методы, уже обернутые в retry_transaction.
+        """
         try:
-            wallet = await self.get_by_uuid_with_lock(wallet_uuid)
+            await set_transaction_timeouts(self.db, 'operation')
+            if wallet_request.operation_type == OperationType.DEPOSIT:
+                wallet = await self.repository.get_unsharded_with_lock(
+                    wallet_uuid
+                )
+                if wallet is None:
+                    balance_shards = await self.repository.get_balance_shards(
+                        wallet_uuid
+                    )
+                    if balance_shards is None:
+                        raise HTTPException(
+                            status_code=404, detail='Wallet not found'
+                        )
+                    return await self._update_sharded_balance(
+                        wallet_request, wallet_uuid, idempotency_key,
+                        balance_shards
+                    )
+            else:
+                wallet = await self.get_by_uuid_with_lock(wallet_uuid)
+                if wallet.balance_shards > 1:
+                    wallet = await self.repository.merge_shards(wallet)
             new_balance = self._calculate_new_balance(
                 wallet.balance,
                 wallet_request.operation_type,
@@ -64,24 +284,418 @@ class WalletService:
             )
             self._validate_balance(new_balance)
             wallet = await self.repository.update_balance(wallet, new_balance)
+            await self.transactions.add_many([transaction_values(
+                wallet_uuid,
+                wallet_request.operation_type,
+                wallet_request.amount,
+                new_balance,
+                idempotency_key
+            )])
+            await self.db.commit()
+            return WalletResponse.of(wallet.id, wallet.balance)
+        except HTTPException:
+            await self.db.rollback()
+            raise
+        except IntegrityError:
+            await self.db.rollback()
+            return await self._replay_after_conflict(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+
+    @retry_transaction
+    async def _update_balance_optimistic(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str]
+    ) -> WalletResponse:
+        """
+        Обновить баланс без блокировки строки на время расчета: прочитать
+        баланс с версией и записать новый баланс условным UPDATE по версии.
+        Если кошелек изменили между чтением и записью, транзакция
+        откатывается и повторяется через retry_transaction. Операции над
+        шардированными кошельками выполняются через _update_sharded_balance.
+        """
+        try:
+            await set_transaction_timeouts(self.db, 'operation')
+            wallet = await self.repository.get_versioned(wallet_uuid)
+            if wallet is None:
+                raise HTTPException(status_code=404, detail='Wallet not found')
+            if wallet.balance_shards > 1:
+                return await self._update_sharded_balance(
+                    wallet_request, wallet_uuid, idempotency_key,
+                    wallet.balance_shards
+                )
+            new_balance = self._calculate_new_balance(
+                wallet.balance,
+                wallet_request.operation_type,
+                wallet_request.amount
+            )
+            self._validate_balance(new_balance)
+            updated = await self.repository.compare_and_set_balance(
+                wallet_uuid,
+                wallet.version,
+                new_balance,
+                wallet_request.operation_type,
+                wallet_request.amount,
+                idempotency_key
+            )
+            if updated is None:
+                raise TransientTransactionError(VERSION_CONFLICT)
+            await self.db.commit()
+            return WalletResponse.of(updated.id, updated.balance)
+        except HTTPException:
+            await self.db.rollback()
+            raise
+        except IntegrityError:
+            await self.db.rollback()
+            return await self._replay_after_conflict(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+
+    @retry_transaction
+    async def _update_balance_atomic(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str]
+    ) -> WalletResponse:
+        """
+        Обновить баланс и записать операцию в журнал одним запросом.
+        Блокировка строки держится только до коммита. Операции над
+        шардированными кошельками выполняются через _update_sharded_balance.
+        """
+        try:
+            await set_transaction_timeouts(self.db, 'operation')
+            wallet = await self.repository.apply_operation(
+                wallet_uuid,
+                wallet_request.operation_type,
+                wallet_request.amount,
+                idempotency_key
+            )
+            if wallet is None:
+                balance_shards = await self.repository.get_balance_shards(
+                    wallet_uuid
+                )
+                if balance_shards is None:
+                    raise HTTPException(
+                        status_code=404, detail='Wallet not found'
+                    )
+                if balance_shards == 1:
+                    raise HTTPException(
+                        status_code=400, detail='Not enough balance'
+                    )
+                return await self._update_sharded_balance(
+                    wallet_request, wallet_uuid, idempotency_key,
+                    balance_shards
+                )
+            await self.db.commit()
+            return WalletResponse.of(wallet.id, wallet.balance)
+        except HTTPException:
+            await self.db.rollback()
+            raise
+        except IntegrityError:
+            await self.db.rollback()
+            return await self._replay_after_conflict(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+
+    async def _update_sharded_balance(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str],
+        balance_shards: int
+    ) -> WalletResponse:
+        """
+        Операция над шардированным кошельком. Пополнение зачисляется на
+        случайный шард без блокировки основной строки; списание блокирует
+        кошелек, сливает шарды в основную строку и проверяет полный
+        баланс, поэтому баланс не уходит в минус.
+        """
+        if wallet_request.operation_type == OperationType.WITHDRAW:
+            return await self._apply_with_lock(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        try:
+            balance = await self.repository.deposit_to_shard(
+                wallet_uuid,
+                random.randrange(balance_shards),
+                wallet_request.amount
+            )
+            if balance is None:
+                raise HTTPException(status_code=404, detail='Wallet not found')
+            await self.transactions.add_many([transaction_values(
+                wallet_uuid,
+                wallet_request.operation_type,
+                wallet_request.amount,
+                balance,
+                idempotency_key
+            )])
             await self.db.commit()
-            return WalletResponse.model_validate(wallet)
+            return WalletResponse.of(wallet_uuid, balance)
         except HTTPException:
             await self.db.rollback()
             raise
+        except IntegrityError:
+            await self.db.rollback()
+            return await self._replay_after_conflict(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+
+    async def _replay(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: str
+    ) -> Optional[WalletResponse]:
+        """Сохраненный результат операции с тем же ключом идемпотентности."""
+        try:
+            transaction = await self.transactions.get_by_idempotency_key(
+                wallet_uuid, idempotency_key
+            )
         except Exception:
+            raise HTTPException(status_code=500)
+        if transaction is None:
+            return None
+        check_replay(
+            wallet_request.operation_type,
+            wallet_request.amount,
+            transaction.operation_type,
+            transaction.amount
+        )
+        return WalletResponse.of(
+            transaction.wallet_id, transaction.balance_after
+        )
+
+    async def _replay_after_conflict(
+        self,
+        wallet_request: WalletOperationRequest,
+        wallet_uuid: UUID,
+        idempotency_key: Optional[str]
+    ) -> WalletResponse:
+        """
+        Результат параллельного запроса с тем же ключом идемпотентности,
+        успевшего записать операцию раньше.
+        """
+        replayed = None
+        if idempotency_key is not None:
+            replayed = await self._replay(
+                wallet_request, wallet_uuid, idempotency_key
+            )
+        if replayed is None:
+            raise HTTPException(status_code=500)
+        return replayed
+
+    @retry_transaction
+    async def apply_batch(
+        self, batch_request: WalletBatchOperationRequest
+    ) -> WalletBatchOperationResponse:
+        """
+        Выполнить пакет операций в одной транзакции.
+        В режиме ATOMIC ошибка любой операции отменяет весь пакет,
+        в режиме BEST_EFFORT применяются все допустимые операции.
+        Шарды балансов кошельков пакета сливаются в основные строки.
+        Недоступно в режиме движка в памяти: балансы его кошельков
+        меняет только узел-владелец.
+        """
+        if settings.wallet_engine_mode == 'memory':
+            raise HTTPException(
+                status_code=501,
+                detail='Batch operations are unavailable in memory engine mode'
+            )
+        try:
+            await set_transaction_timeouts(self.db, 'bulk')
+            stored_balances = await self.repository.get_balances_with_lock(
+                {operation.wallet_id for operation in batch_request.operations}
+            )
+            drained = await self.repository.drain_shards(stored_balances)
+            balances = {
+                wallet_id: balance + drained.get(wallet_id, 0)
+                for wallet_id, balance in stored_balances.items()
+            }
+            new_balances = dict(balances)
+            results = [
+                self._apply_batch_operation(operation, new_balances)
+                for operation in batch_request.operations
+            ]
+            rejected = any(
+                result.status == BatchOperationStatus.REJECTED
+                for result in results
+            )
+            if rejected and batch_request.mode == BatchMode.ATOMIC:
+                await self.db.rollback()
+                return WalletBatchOperationResponse(
+                    committed=False,
+                    results=[
+                        self._cancel_batch_result(result) for result in results
+                    ]
+                )
+            changed = {
+                wallet_id: balance
+                for wallet_id, balance in new_balances.items()
+                if balance != stored_balances[wallet_id]
+            }
+            if changed:
+                await self.repository.set_balances(changed)
+            await self.transactions.add_many([
+                transaction_values(
+                    operation.wallet_id,
+                    operation.operation_type,
+                    operation.amount,
+                    result.balance
+                )
+                for operation, result in zip(
+                    batch_request.operations, results
+                )
+                if result.status == BatchOperationStatus.APPLIED
+            ])
+            await self.db.commit()
+        except Exception as error:
+            await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
+            raise HTTPException(status_code=500)
+        await self._invalidate_cached(changed)
+        return WalletBatchOperationResponse(committed=True, results=results)
+
+    @retry_transaction
+    async def transfer(
+        self, transfer_request: WalletTransferRequest
+    ) -> WalletTransferResponse:
+        """
+        Перевести средства между кошельками в одной транзакции.
+        Обе строки блокируются в порядке id, поэтому встречные переводы
+        A -> B и B -> A не блокируют друг друга взаимно.
+        """
+        if settings.wallet_engine_mode == 'memory':
+            raise HTTPException(
+                status_code=501,
+                detail='Transfers are unavailable in memory engine mode'
+            )
+        from_id = transfer_request.from_wallet_id
+        to_id = transfer_request.to_wallet_id
+        amount = transfer_request.amount
+        try:
+            await set_transaction_timeouts(self.db, 'operation')
+            balances = await self.repository.get_balances_with_lock(
+                [from_id, to_id]
+            )
+            if len(balances) != 2:
+                raise HTTPException(status_code=404, detail='Wallet not found')
+            for wallet_id, drained in (
+                await self.repository.drain_shards(balances)
+            ).items():
+                balances[wallet_id] += drained
+            new_balances = {
+                from_id: balances[from_id] - amount,
+                to_id: balances[to_id] + amount
+            }
+            self._validate_balance(new_balances[from_id])
+            await self.repository.set_balances(new_balances)
+            await self.transactions.add_many([
+                transaction_values(
+                    from_id,
+                    OperationType.WITHDRAW,
+                    amount,
+                    new_balances[from_id]
+                ),
+                transaction_values(
+                    to_id, OperationType.DEPOSIT, amount, new_balances[to_id]
+                ),
+            ])
+            await self.db.commit()
+        except HTTPException:
+            await self.db.rollback()
+            raise
+        except Exception as error:
             await self.db.rollback()
+            raise_if_transient(error)
+            raise_if_timeout(error)
             raise HTTPException(status_code=500)
+        await self._invalidate_cached(new_balances)
+        return WalletTransferResponse.model_construct(
+            from_wallet=WalletResponse.of(from_id, new_balances[from_id]),
+            to_wallet=WalletResponse.of(to_id, new_balances[to_id])
+        )
+
+    def _apply_batch_operation(
+        self, operation: WalletBatchOperation, balances: dict[UUID, int]
+    ) -> WalletBatchOperationResult:
+        """Применить операцию пакета к балансам в памяти."""
+        current_balance = balances.get(operation.wallet_id)
+        if current_balance is None:
+            return WalletBatchOperationResult(
+                wallet_id=operation.wallet_id,
+                status=BatchOperationStatus.REJECTED,
+                detail='Wallet not found'
+            )
+        new_balance = self._calculate_new_balance(
+            current_balance, operation.operation_type, operation.amount
+        )
+        if new_balance < WALLET_BALANCE_MIN:
+            return WalletBatchOperationResult(
+                wallet_id=operation.wallet_id,
+                status=BatchOperationStatus.REJECTED,
+                detail='Not enough balance'
+            )
+        balances[operation.wallet_id] = new_balance
+        return WalletBatchOperationResult(
+            wallet_id=operation.wallet_id,
+            status=BatchOperationStatus.APPLIED,
+            balance=new_balance
+        )
+
+    def _cancel_batch_result(
+        self, result: WalletBatchOperationResult
+    ) -> WalletBatchOperationResult:
+        """Пометить успешную операцию отмененного пакета как непримененную."""
+        if result.status != BatchOperationStatus.APPLIED:
+            return result
+        return WalletBatchOperationResult(
+            wallet_id=result.wallet_id,
+            status=BatchOperationStatus.NOT_APPLIED
+        )
+
+    async def _invalidate_cached(self, wallet_uuids: Iterable[UUID]):
+        """Сбросить кеш кошельков после записи."""
+        cache = get_wallet_cache()
+        if cache is None:
+            return
+        for wallet_uuid in wallet_uuids:
+            await cache.invalidate(wallet_uuid)
 
     def _calculate_new_balance(
         self, current_balance: int, operation_type: OperationType, amount: int
     ) -> int:
         """Расчета нового баланса кошелька."""
-        if operation_type == OperationType.DEPOSIT:
-            new_balance = current_balance + amount
-        elif operation_type == OperationType.WITHDRAW:
-            new_balance = current_balance - amount
-        return new_balance
+        return current_balance + self._calculate_delta(operation_type, amount)
+
+    def _calculate_delta(
+        self, operation_type: OperationType, amount: int
+    ) -> int:
+        """Расчет изменения баланса для операции."""
+        return balance_delta(operation_type, amount)
 
     def _validate_balance(self, balance: int):
         """Валидация баланса кошелька."""
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.wallet_stats import WALLET_STATS_PERCENTILES
+from app.repositories.wallet_stats_repository import WalletStatsRepository
+from app.schemas.wallet import WalletBalanceBucket, WalletStatsResponse
+from app.services.timeouts import set_transaction_timeouts
+
+logger = logging.getLogger(__name__)
+
+
+class WalletStatsService:
+    """Сервис сводки по кошелькам."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = WalletStatsRepository(db)
+
+    async def get(self) -> WalletStatsResponse:
+        """
+        Сводка по всем кошелькам за одно чтение строки представления,
+        независимо от числа кошельков. staleness_seconds - сколько секунд
+        назад сводка пересчитана.
+        """
+        try:
+            stats = await self.repository.get()
+        except Exception:
+            raise HTTPException(status_code=500)
+        if stats is None:
+            raise HTTPException(status_code=503)
+        percentiles = stats.percentiles or [None] * len(
+            WALLET_STATS_PERCENTILES
+        )
+        return WalletStatsResponse.model_construct(
+            wallets_count=stats.wallets_count,
+            total_balance=stats.total_balance,
+            min_balance=stats.min_balance,
+            max_balance=stats.max_balance,
+            avg_balance=stats.avg_balance,
+            percentiles={
+                f'p{round(fraction * 100)}': value
+                for fraction, value in zip(
+                    WALLET_STATS_PERCENTILES, percentiles
+                )
+            },
+            distribution=[
+                balance_bucket(int(bucket), wallets)
+                for bucket, wallets in sorted(
+                    stats.distribution.items(),
+                    key=lambda item: int(item[0])
+                )
+            ],
+            refreshed_at=stats.refreshed_at,
+            staleness_seconds=float(stats.staleness_seconds)
+        )
+
+    async def refresh(self, min_age_seconds: float = 0) -> bool:
+        """Пересчитать сводку; False, если пересчет не понадобился."""
+        try:
+            await set_transaction_timeouts(self.db, 'stats_refresh')
+            refreshed = await self.repository.refresh(min_age_seconds)
+            await self.db.commit()
+            return refreshed
+        except Exception:
+            await self.db.rollback()
+            raise
+
+
+def balance_bucket(bucket: int, wallets: int) -> WalletBalanceBucket:
+    """
+    Диапазон балансов десятичного порядка bucket: 0 - нулевой баланс,
+    k - от 10^(k-1) до 10^k - 1.
+    """
+    if bucket == 0:
+        return WalletBalanceBucket.model_construct(
+            min_balance=0, max_balance=0, wallets=wallets
+        )
+    return WalletBalanceBucket.model_construct(
+        min_balance=10 ** (bucket - 1),
+        max_balance=10 ** bucket - 1,
+        wallets=wallets
+    )
+
+
+class WalletStatsRefresher:
+    """
+    Периодический пересчет сводки по кошелькам. Каждый процесс сервиса
+    запускает свой цикл, но пересчет пропускается, если сводку уже
+    обновил другой процесс за последний интервал.
+    """
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+            self._task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with self.session_factory() as session:
+                    await WalletStatsService(session).refresh(
+                        min_age_seconds=self.interval / 2
+                    )
+            except Exception:
+                logger.exception('Wallet stats refresh failed')
+
+
+_refresher: Optional[WalletStatsRefresher] = None
+
+
+def start_wallet_stats_refresher() -> None:
+    """Запустить пересчет сводки, если он включен."""
+    global _refresher
+    if settings.wallet_stats_refresh_interval_seconds <= 0:
+        return
+    if _refresher is None:
+        _refresher = WalletStatsRefresher(
+            AsyncSessionLocal, settings.wallet_stats_refresh_interval_seconds
+        )
+        _refresher.start()
+
+
+async def close_wallet_stats_refresher() -> None:
+    """Остановить пересчет сводки при остановке процесса."""
+    global _refresher
+    if _refresher is not None:
+        refresher, _refresher = _refresher, None
+        await refresher.stop()
@@ -0,0 +1,52 @@
+import secrets
+import threading
+import time
+from uuid import UUID, uuid4
+
+from app.config import settings
+
+# Версии uuid, которые принимаются как id кошелька
+WALLET_UUID_VERSIONS = (4, 7)
+# Счетчик в rand_a начинается со случайного значения не выше половины
+# диапазона, чтобы в одной миллисекунде оставалось место для роста
+UUID7_COUNTER_MAX = 0xFFF
+UUID7_COUNTER_SEED_BITS = 11
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7() -> UUID:
+    """
+    UUID версии 7 (RFC 9562): 48 бит времени Unix в миллисекундах,
+    12 бит счетчика (rand_a) и 62 случайных бита. Внутри процесса
+    значения строго возрастают: в одной миллисекунде растет счетчик,
+    при его переполнении время сдвигается на миллисекунду вперед.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _uuid7_last_ms:
+            _uuid7_last_ms = now_ms
+            _uuid7_counter = secrets.randbits(UUID7_COUNTER_SEED_BITS)
+        elif _uuid7_counter < UUID7_COUNTER_MAX:
+            _uuid7_counter += 1
+        else:
+            _uuid7_last_ms += 1
+            _uuid7_counter = secrets.randbits(UUID7_COUNTER_SEED_BITS)
+        timestamp_ms, counter = _uuid7_last_ms, _uuid7_counter
+    return UUID(int=(
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    ))
+
+
+def new_wallet_uuid() -> UUID:
+    """uuid нового кошелька версии WALLET_ID_VERSION."""
+    if settings.wallet_id_version == 'v7':
+        return uuid7()
+    return uuid4()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.asyncpg_pool import get_asyncpg_pool
+from app.config import settings
+from app.repositories.asyncpg_wallet_repository import AsyncpgWalletRepository
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+
+logger = logging.getLogger(__name__)
+
+# Несуществующий кошелек: запросы прогрева не находят и не меняют строк
+WARMUP_WALLET_UUID = UUID(int=0)
+WARMUP_RETRY_DELAY_SECONDS = 1
+
+
+class WarmupState:
+    """Состояние прогрева для /ready и /stats."""
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.connections = 0
+        self.duration_ms: Optional[float] = None
+
+    def snapshot(self) -> dict:
+        return {
+            'ready': self.ready,
+            'attempts': self.attempts,
+            'connections': self.connections,
+            'duration_ms': self.duration_ms,
+        }
+
+
+warmup_state = WarmupState()
+
+
+async def warm_up(database_engine: AsyncEngine, connections: int) -> int:
+    """
+    Открыть сразу connections соединений пула движка и на каждом
+    подготовить запросы горячих эндпоинтов (чтение кошелька и операция
+    в текущем BALANCE_UPDATE_MODE): asyncpg кеширует подготовленные
+    запросы по соединению, SQLAlchemy - скомпилированный SQL. Запросы
+    выполняются для несуществующего кошелька в откатываемой транзакции.
+    При бэкенде asyncpg так же прогревается его пул. Возвращает число
+    прогретых соединений.
+    """
+    if connections <= 0:
+        return 0
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(
+            stack.enter_async_context(database_engine.connect())
+            for _ in range(connections)
+        ))
+        await asyncio.gather(*map(_prepare_orm_statements, opened))
+    if (
+        settings.wallet_engine_mode == 'database'
+        and settings.wallet_repository_backend == 'asyncpg'
+    ):
+        pool = await get_asyncpg_pool()
+        async with AsyncExitStack() as stack:
+            acquired = await asyncio.gather(*(
+                stack.enter_async_context(pool.acquire())
+                for _ in range(connections)
+            ))
+            await asyncio.gather(*map(_prepare_asyncpg_statements, acquired))
+    return connections
+
+
+async def _prepare_orm_statements(connection: AsyncConnection) -> None:
+    async with AsyncSession(bind=connection) as session:
+        repository = WalletRepository(session)
+        await repository.get_balance(WARMUP_WALLET_UUID)
+        if settings.balance_update_mode == 'pessimistic':
+            await repository.get_by_uuid_with_lock(WARMUP_WALLET_UUID)
+        elif settings.balance_update_mode == 'optimistic':
+            await repository.get_versioned(WARMUP_WALLET_UUID)
+            await repository.compare_and_set_balance(
+                WARMUP_WALLET_UUID, 0, 0, OperationType.DEPOSIT, 1
+            )
+        else:
+            await repository.apply_operation(
+                WARMUP_WALLET_UUID, OperationType.DEPOSIT, 1
+            )
+        await session.rollback()
+
+
+async def _prepare_asyncpg_statements(
+    connection: asyncpg.Connection
+) -> None:
+    repository = AsyncpgWalletRepository(connection)
+    transaction = connection.transaction()
+    await transaction.start()
+    try:
+        await repository.get_by_uuid(WARMUP_WALLET_UUID)
+        await repository.apply_operation(
+            WARMUP_WALLET_UUID, OperationType.DEPOSIT, 1
+        )
+    finally:
+        await transaction.rollback()
+
+
+class Warmup:
+    """
+    Прогрев при запуске процесса в фоне: сервер сразу отвечает на
+    /health, а /ready возвращает 503, пока прогрев не закончится.
+    Пока база недоступна, прогрев повторяется.
+    """
+    def __init__(self, database_engine: AsyncEngine, connections: int):
+        self.database_engine = database_engine
+        self.connections = connections
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._warm_up_until_ready())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+            self._task = None
+
+    async def _warm_up_until_ready(self) -> None:
+        started = time.perf_counter()
+        while True:
+            warmup_state.attempts += 1
+            try:
+                warmup_state.connections = await warm_up(
+                    self.database_engine, self.connections
+                )
+                break
+            except Exception:
+                logger.exception('Warm-up failed, retrying')
+                await asyncio.sleep(WARMUP_RETRY_DELAY_SECONDS)
+        warmup_state.duration_ms = round(
+            (time.perf_counter() - started) * 1000, 3
+        )
+        warmup_state.ready = True
+
+
+_warmup: Optional[Warmup] = None
+
+
+def start_warmup(database_engine: AsyncEngine) -> None:
+    """
+    Запустить прогрев DATABASE_WARMUP_CONNECTIONS соединений (не больше
+    DATABASE_POOL_SIZE: лишние соединения пул закрыл бы при возврате).
+    """
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup(
+            database_engine,
+            min(
+                settings.database_warmup_connections,
+                settings.database_pool_size
+            )
+        )
+        _warmup.start()
+
+
+async def close_warmup() -> None:
+    """Остановить незаконченный прогрев при остановке процесса."""
+    global _warmup
+    if _warmup is not None:
+        warmup, _warmup = _warmup, None
+        await warmup.stop()
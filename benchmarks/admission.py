@@ -0,0 +1,112 @@
+"""
+Контроль допуска под нагрузкой на горячий кошелек: --hot-concurrency
+клиентов непрерывно шлют операции над одним кошельком, а
+--cold-concurrency клиентов - над случайными холодными кошельками.
+Сравниваются задержки холодных операций без горячей нагрузки, под ней
+без контроля допуска и под ней с контролем допуска
+(ADMISSION_CONTROL_ENABLED=true), а также ответы горячему кошельку
+(200/429/503); отклоненные клиенты ждут Retry-After. Пул соединений
+ограничен --pool-size, режим обновления - pessimistic
+(SELECT ... FOR UPDATE).
+
+    python -m benchmarks.admission --dsn postgresql+asyncpg://... \\
+        --hot-concurrency 64 --pool-size 10
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+
+from httpx import AsyncClient, Response
+
+from app.config import settings
+from app.schemas.wallet import OperationType
+from app.services import admission
+from benchmarks.common import (Timer, app_client, base_parser,
+                               benchmark_database, print_report, summarize)
+from benchmarks.load import create_wallets
+
+SCENARIOS = ('idle', 'hot', 'hot_admission')
+
+
+async def deposit(client: AsyncClient, wallet_id: str) -> Response:
+    return await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': OperationType.DEPOSIT, 'amount': 1}
+    )
+
+
+async def run_scenario(
+    client: AsyncClient, scenario: str, wallet_ids: list[str], args
+) -> dict:
+    """Холодные операции на фоне горячей нагрузки (кроме idle)."""
+    settings.admission_control_enabled = scenario == 'hot_admission'
+    admission._admission_controller = None
+    hot_wallet_id, cold_wallet_ids = wallet_ids[0], wallet_ids[1:]
+    stop = asyncio.Event()
+    hot_statuses: Counter = Counter()
+    cold_statuses: Counter = Counter()
+    latencies = []
+
+    async def hot_client() -> None:
+        while not stop.is_set():
+            response = await deposit(client, hot_wallet_id)
+            hot_statuses[str(response.status_code)] += 1
+            if 'Retry-After' in response.headers:
+                await asyncio.sleep(float(response.headers['Retry-After']))
+
+    async def cold_client() -> None:
+        for _ in range(args.cold_requests):
+            started = time.perf_counter()
+            response = await deposit(client, random.choice(cold_wallet_ids))
+            latencies.append(time.perf_counter() - started)
+            cold_statuses[str(response.status_code)] += 1
+
+    hot_clients = [] if scenario == 'idle' else [
+        asyncio.create_task(hot_client())
+        for _ in range(args.hot_concurrency)
+    ]
+    await asyncio.sleep(args.ramp_up_ms / 1000)
+    with Timer() as timer:
+        await asyncio.gather(*(
+            cold_client() for _ in range(args.cold_concurrency)
+        ))
+    stop.set()
+    await asyncio.gather(*hot_clients)
+    controller = admission.get_admission_controller()
+    return summarize(
+        scenario,
+        latencies,
+        timer.elapsed,
+        cold_statuses=dict(cold_statuses),
+        hot_statuses=dict(hot_statuses),
+        admission=controller.snapshot() if controller is not None else None
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS))
+    parser.add_argument('--hot-concurrency', type=int, default=64)
+    parser.add_argument('--cold-concurrency', type=int, default=4)
+    parser.add_argument('--cold-requests', type=int, default=100)
+    parser.add_argument('--wallets', type=int, default=100)
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--ramp-up-ms', type=float, default=200)
+    args = parser.parse_args()
+    random.seed(0)
+    settings.balance_update_mode = 'pessimistic'
+    results = []
+    async with benchmark_database(
+        args.dsn, pool_size=args.pool_size, max_overflow=0
+    ) as session_factory, app_client(session_factory) as client:
+        wallet_ids = await create_wallets(client, args.wallets + 1)
+        for scenario in args.scenarios:
+            results.append(
+                await run_scenario(client, scenario, wallet_ids, args)
+            )
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Задержка операций: движок балансов в памяти против блокировки строки
+на каждый запрос (pessimistic).
+
+    python -m benchmarks.balance_engine --dsn postgresql+asyncpg://...
+"""
+import asyncio
+import tempfile
+import time
+
+from app.config import settings
+from app.engine import balance_engine
+from app.engine.balance_engine import BalanceEngine
+from app.engine.partitioning import ConsistentHashRing
+from app.engine.wal import WriteAheadLog
+from app.schemas.wallet import (OperationType, WalletCreate,
+                                WalletOperationRequest)
+from app.services.wallet_service import WalletService
+from benchmarks.common import (Timer, base_parser, benchmark_database,
+                               print_report, summarize)
+
+MODES = ('pessimistic', 'memory')
+
+
+async def run_mode(session_factory, mode: str, wal_dir: str, args) -> dict:
+    """Прогнать операции над args.wallets кошельками в заданном режиме."""
+    settings.balance_update_mode = 'pessimistic'
+    settings.wallet_engine_mode = (
+        'memory' if mode == 'memory' else 'database'
+    )
+    engine = None
+    if mode == 'memory':
+        engine = BalanceEngine(
+            session_factory,
+            WriteAheadLog(
+                wal_dir, 'wallets-0', args.fsync_interval_ms / 1000
+            ),
+            ConsistentHashRing(1),
+            node_index=0,
+            persist_interval=args.persist_interval_ms / 1000
+        )
+        await engine.start()
+        balance_engine._engine = engine
+    async with session_factory() as session:
+        service = WalletService(session)
+        wallets = [
+            await service.create(
+                WalletCreate(balance=args.operations * args.amount)
+            )
+            for _ in range(args.wallets)
+        ]
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def operation(index: int) -> None:
+        operation_type = (
+            OperationType.DEPOSIT if index % 2 else OperationType.WITHDRAW
+        )
+        request = WalletOperationRequest(
+            operation_type=operation_type, amount=args.amount
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            async with session_factory() as session:
+                await WalletService(session).update_balance(
+                    request, wallets[index % len(wallets)].id
+                )
+            latencies.append(time.perf_counter() - started)
+
+    with Timer() as timer:
+        await asyncio.gather(*[
+            operation(index) for index in range(args.operations)
+        ])
+    if engine is not None:
+        await engine.stop()
+        balance_engine._engine = None
+    return summarize(
+        mode,
+        latencies,
+        timer.elapsed,
+        concurrency=args.concurrency,
+        wallets=args.wallets
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--wallets', type=int, default=10)
+    parser.add_argument('--amount', type=int, default=10)
+    parser.add_argument('--fsync-interval-ms', type=float, default=2)
+    parser.add_argument('--persist-interval-ms', type=float, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as wal_dir:
+        async with benchmark_database(
+            args.dsn, pool_size=args.concurrency
+        ) as session_factory:
+            results = [
+                await run_mode(session_factory, mode, wal_dir, args)
+                for mode in MODES
+            ]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
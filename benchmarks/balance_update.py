@@ -0,0 +1,116 @@
+"""
+Сравнение режимов обновления баланса: pessimistic, atomic, optimistic
+и coalesced (группировка операций поверх atomic) при высокой (один
+горячий кошелек) и низкой (много кошельков) конкуренции за строку.
+Для каждого прогона выводятся число повторов транзакций и ошибок.
+
+    python -m benchmarks.balance_update --dsn postgresql+asyncpg://... \\
+        --wallets 1 1000
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.schemas.wallet import (OperationType, WalletCreate,
+                                WalletOperationRequest)
+from app.services import operation_coalescer, retry
+from app.services.operation_coalescer import OperationCoalescer
+from app.services.retry import RetryStats
+from app.services.wallet_service import WalletService
+from benchmarks.common import (Timer, base_parser, benchmark_database,
+                               print_report, summarize)
+
+MODES = ('pessimistic', 'atomic', 'optimistic', 'coalesced')
+
+
+async def run_mode(session_factory, mode: str, wallets: int, args) -> dict:
+    """Прогнать операции над wallets кошельками в заданном режиме."""
+    retry.retry_stats = RetryStats()
+    settings.operation_coalescing_enabled = mode == 'coalesced'
+    if mode == 'coalesced':
+        operation_coalescer._coalescer = OperationCoalescer(
+            session_factory,
+            window=args.coalesce_window_ms / 1000,
+            max_batch_size=args.concurrency
+        )
+    else:
+        settings.balance_update_mode = mode
+    async with session_factory() as session:
+        wallet_ids = [
+            (await WalletService(session).create(
+                WalletCreate(balance=args.operations * args.amount)
+            )).id
+            for _ in range(wallets)
+        ]
+    latencies = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def operation(index: int) -> None:
+        operation_type = (
+            OperationType.DEPOSIT if index % 2 else OperationType.WITHDRAW
+        )
+        request = WalletOperationRequest(
+            operation_type=operation_type, amount=args.amount
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            async with session_factory() as session:
+                try:
+                    await WalletService(session).update_balance(
+                        request, random.choice(wallet_ids)
+                    )
+                    statuses['200'] += 1
+                except HTTPException as error:
+                    statuses[str(error.status_code)] += 1
+            latencies.append(time.perf_counter() - started)
+
+    with Timer() as timer:
+        await asyncio.gather(*[
+            operation(index) for index in range(args.operations)
+        ])
+    retries = retry.retry_stats.snapshot()
+    return summarize(
+        f'{mode}:w{wallets}',
+        latencies,
+        timer.elapsed,
+        concurrency=args.concurrency,
+        wallets=wallets,
+        statuses=dict(statuses),
+        retries=retries['retries'],
+        retries_exhausted=retries['exhausted'] + retries['budget_exhausted']
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--amount', type=int, default=10)
+    parser.add_argument('--coalesce-window-ms', type=float, default=2)
+    parser.add_argument(
+        '--wallets', type=int, nargs='+', default=[1, 1000],
+        help='число кошельков: 1 - высокая конкуренция, много - низкая'
+    )
+    parser.add_argument(
+        '--modes', nargs='+', choices=MODES, default=list(MODES)
+    )
+    args = parser.parse_args()
+    random.seed(0)
+    async with benchmark_database(
+        args.dsn, pool_size=args.concurrency
+    ) as session_factory:
+        results = [
+            await run_mode(session_factory, mode, wallets, args)
+            for wallets in args.wallets
+            for mode in args.modes
+        ]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
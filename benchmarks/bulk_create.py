@@ -0,0 +1,69 @@
+"""
+Скорость создания кошельков: по одному через WalletService.create,
+одним INSERT ... RETURNING и через COPY.
+
+    python -m benchmarks.bulk_create --dsn postgresql+asyncpg://...
+"""
+import asyncio
+
+from app.config import settings
+from app.schemas.wallet import WalletBulkCreate, WalletCreate
+from app.services.wallet_service import WalletService
+from benchmarks.common import (Timer, base_parser, benchmark_database,
+                               print_report)
+
+
+def wallets_report(name: str, count: int, elapsed: float) -> dict:
+    return {
+        'name': name,
+        'wallets': count,
+        'elapsed_s': round(elapsed, 4),
+        'wallets_per_s': round(count / elapsed, 2),
+    }
+
+
+async def one_by_one(session_factory, count: int) -> dict:
+    """Создание кошельков по одному в отдельных транзакциях."""
+    with Timer() as timer:
+        async with session_factory() as session:
+            service = WalletService(session)
+            for _ in range(count):
+                await service.create(WalletCreate())
+    return wallets_report('one_by_one', count, timer.elapsed)
+
+
+async def bulk(session_factory, count: int, name: str, threshold: int):
+    """Создание кошельков одним запросом WalletService.create_many."""
+    settings.wallet_bulk_copy_threshold = threshold
+    with Timer() as timer:
+        async with session_factory() as session:
+            await WalletService(session).create_many(
+                WalletBulkCreate(count=count)
+            )
+    return wallets_report(name, count, timer.elapsed)
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument(
+        '--one-by-one-count',
+        type=int,
+        default=2000,
+        help='Число кошельков для медленного пути (по одному)'
+    )
+    args = parser.parse_args()
+    async with benchmark_database(args.dsn) as session_factory:
+        results = [
+            await one_by_one(session_factory, args.one_by_one_count),
+            await bulk(
+                session_factory, args.count, 'insert_returning',
+                threshold=args.count + 1
+            ),
+            await bulk(session_factory, args.count, 'copy', threshold=1),
+        ]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+import argparse
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Sequence
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+import app.models.wallet  # noqa
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    """Общие аргументы командной строки бенчмарков."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--dsn',
+        default=settings.database_url,
+        help='URL базы данных (postgresql+asyncpg://...)'
+    )
+    return parser
+
+
+@asynccontextmanager
+async def benchmark_database(
+    dsn: str, **engine_kwargs
+) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """Подготовить схему и вернуть фабрику сессий."""
+    engine = create_async_engine(dsn, **engine_kwargs)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+    finally:
+        await engine.dispose()
+
+
+@asynccontextmanager
+async def app_client(
+    session_factory: async_sessionmaker[AsyncSession]
+) -> AsyncGenerator[AsyncClient, None]:
+    """Клиент к приложению в этом процессе поверх заданной базы."""
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://benchmark'
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(
+    name: str, latencies: Sequence[float], elapsed: float, **extra
+) -> dict:
+    """Сводка по одному прогону: пропускная способность и задержки в мс."""
+    count = len(latencies)
+    return {
+        'name': name,
+        'operations': count,
+        'elapsed_s': round(elapsed, 4),
+        'ops_per_s': round(count / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        **extra,
+    }
+
+
+class Timer:
+    """Секундомер для блока with."""
+    def __enter__(self) -> 'Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self.started
+
+
+def print_report(results: Sequence[dict]) -> None:
+    """Вывести результаты в JSON."""
+    print(json.dumps(list(results), indent=2, ensure_ascii=False))
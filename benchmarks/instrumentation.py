@@ -0,0 +1,109 @@
+"""
+Накладные расходы замеров запросов (middleware, события SQLAlchemy,
+гистограммы): те же запросы при REQUEST_METRICS_ENABLED=false и true.
+
+    python -m benchmarks.instrumentation --dsn postgresql+asyncpg://...
+"""
+import asyncio
+import json
+import random
+import time
+
+from app.config import settings
+from app.instrumentation import instrument_engine
+from app.schemas.wallet import OperationType
+from benchmarks.common import (Timer, app_client, base_parser,
+                               benchmark_database, print_report, summarize)
+
+SCENARIOS = ('health', 'get', 'operation')
+
+
+async def run_scenario(client, name: str, wallet_ids, args) -> dict:
+    """Прогнать запросы одного вида при текущей настройке замеров."""
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request() -> None:
+        wallet_id = random.choice(wallet_ids)
+        async with semaphore:
+            started = time.perf_counter()
+            if name == 'health':
+                await client.get('/health')
+            elif name == 'get':
+                await client.get(f'/api/v1/wallets/{wallet_id}')
+            else:
+                await client.post(
+                    f'/api/v1/wallets/{wallet_id}/operation',
+                    json={
+                        'operation_type': OperationType.DEPOSIT,
+                        'amount': 1
+                    }
+                )
+            latencies.append(time.perf_counter() - started)
+
+    with Timer() as timer:
+        await asyncio.gather(*[request() for _ in range(args.requests)])
+    enabled = 'on' if settings.request_metrics_enabled else 'off'
+    return summarize(
+        f'{name}:{enabled}',
+        latencies,
+        timer.elapsed,
+        concurrency=args.concurrency
+    )
+
+
+def overhead(results: list[dict]) -> list[dict]:
+    """Разница p50 и пропускной способности с замерами и без."""
+    by_name = {result['name']: result for result in results}
+    return [
+        {
+            'name': f'{scenario}:overhead',
+            'p50_ms': round(
+                by_name[f'{scenario}:on']['p50_ms']
+                - by_name[f'{scenario}:off']['p50_ms'], 3
+            ),
+            'ops_per_s_change': round(
+                by_name[f'{scenario}:on']['ops_per_s']
+                / by_name[f'{scenario}:off']['ops_per_s'] - 1, 4
+            ),
+        }
+        for scenario in SCENARIOS
+    ]
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--wallets', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=2)
+    args = parser.parse_args()
+    results = []
+    async with benchmark_database(
+        args.dsn, pool_size=args.concurrency
+    ) as session_factory, app_client(session_factory) as client:
+        instrument_engine(session_factory.kw['bind'])
+        create_response = await client.post(
+            '/api/v1/wallets:bulk', json={'count': args.wallets}
+        )
+        wallet_ids = [
+            json.loads(line)['id']
+            for line in create_response.text.splitlines()
+        ]
+        for scenario in SCENARIOS:
+            runs = {}
+            for _ in range(args.rounds):
+                for enabled in (False, True):
+                    settings.request_metrics_enabled = enabled
+                    result = await run_scenario(
+                        client, scenario, wallet_ids, args
+                    )
+                    best = runs.get(result['name'])
+                    if best is None or result['p50_ms'] < best['p50_ms']:
+                        runs[result['name']] = result
+            results.extend(runs.values())
+    print_report(results + overhead(results))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
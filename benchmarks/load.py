@@ -0,0 +1,266 @@
+"""
+Нагрузочный прогон API кошельков: смеси запросов, перебор уровней
+параллелизма, задержки p50/p95/p99, RPS, доля ошибок и время ожидания
+блокировок по выборкам pg_stat_activity.
+
+Приложение вызывается в этом же процессе через ASGI или, с --url, через
+запущенный сервер (uvicorn). Результат - JSON с ревизией git, который
+можно сравнить с результатом другого коммита через --baseline.
+
+    python -m benchmarks.load --dsn postgresql+asyncpg://... \\
+        --concurrency 1 8 32 128 --output load.json
+    python -m benchmarks.load --baseline load.json
+"""
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncGenerator, NamedTuple, Optional
+
+import asyncpg
+from httpx import AsyncClient
+
+from app.schemas.wallet import OperationType
+from benchmarks.common import (Timer, app_client, base_parser,
+                               benchmark_database, summarize)
+
+
+class Mix(NamedTuple):
+    name: str
+    read_ratio: float
+    hot_ratio: float
+
+
+MIXES = {
+    mix.name: mix for mix in (
+        Mix('read_heavy', read_ratio=0.9, hot_ratio=0.0),
+        Mix('write_heavy', read_ratio=0.1, hot_ratio=0.0),
+        Mix('hot_wallet', read_ratio=0.2, hot_ratio=0.9),
+        Mix('uniform', read_ratio=0.5, hot_ratio=0.0),
+    )
+}
+WALLET_BALANCE = 10 ** 9
+COMPARED_METRICS = {'ops_per_s': -1, 'p50_ms': 1, 'p95_ms': 1, 'p99_ms': 1}
+
+
+class LockWaitSampler:
+    """
+    Периодическая выборка числа сессий базы, ждущих блокировку.
+    Время ожидания оценивается как сумма (ждущих сессий * интервал).
+    """
+    def __init__(self, dsn: str, interval: float):
+        self.dsn = dsn
+        self.interval = interval
+        self.samples: list[int] = []
+
+    @asynccontextmanager
+    async def running(self) -> AsyncGenerator['LockWaitSampler', None]:
+        connection = await asyncpg.connect(self.dsn)
+        task = asyncio.create_task(self._sample(connection))
+        try:
+            yield self
+        finally:
+            task.cancel()
+            await asyncio.wait([task])
+            await connection.close()
+
+    async def _sample(self, connection: asyncpg.Connection) -> None:
+        while True:
+            self.samples.append(await connection.fetchval(
+                'SELECT count(*) FROM pg_stat_activity '
+                'WHERE datname = current_database() '
+                "AND wait_event_type = 'Lock'"
+            ))
+            await asyncio.sleep(self.interval)
+
+    def report(self) -> dict:
+        return {
+            'lock_wait_s': round(sum(self.samples) * self.interval, 4),
+            'lock_waiters_max': max(self.samples, default=0),
+        }
+
+
+async def run_mix(
+    client: AsyncClient,
+    mix: Mix,
+    concurrency: int,
+    wallet_ids: list[str],
+    args
+) -> dict:
+    """Прогнать args.requests запросов смеси mix с заданным параллелизмом."""
+    latencies = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    hot_wallet_id = wallet_ids[0]
+
+    async def request(index: int) -> None:
+        wallet_id = (
+            hot_wallet_id if random.random() < mix.hot_ratio
+            else random.choice(wallet_ids)
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if random.random() < mix.read_ratio:
+                    response = await client.get(
+                        f'/api/v1/wallets/{wallet_id}'
+                    )
+                else:
+                    response = await client.post(
+                        f'/api/v1/wallets/{wallet_id}/operation',
+                        json={
+                            'operation_type': (
+                                OperationType.DEPOSIT if index % 2
+                                else OperationType.WITHDRAW
+                            ),
+                            'amount': 1
+                        }
+                    )
+                statuses[str(response.status_code)] += 1
+            except Exception as error:
+                statuses[type(error).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    sampler = LockWaitSampler(args.dsn_asyncpg, args.sample_interval_ms / 1000)
+    async with sampler.running():
+        with Timer() as timer:
+            await asyncio.gather(*[
+                request(index) for index in range(args.requests)
+            ])
+    errors = sum(
+        count for status, count in statuses.items()
+        if not status.startswith('2')
+    )
+    return summarize(
+        f'{mix.name}:c{concurrency}',
+        latencies,
+        timer.elapsed,
+        mix=mix.name,
+        concurrency=concurrency,
+        errors=errors,
+        error_rate=round(errors / len(latencies), 4),
+        statuses=dict(statuses),
+        **sampler.report()
+    )
+
+
+async def create_wallets(client: AsyncClient, count: int) -> list[str]:
+    """Создать кошельки для прогона с большим балансом."""
+    response = await client.post(
+        '/api/v1/wallets:bulk',
+        json={'count': count, 'balance': WALLET_BALANCE}
+    )
+    response.raise_for_status()
+    return [json.loads(line)['id'] for line in response.text.splitlines()]
+
+
+@asynccontextmanager
+async def target_client(args) -> AsyncGenerator[AsyncClient, None]:
+    """Клиент к серверу по --url или к приложению в этом процессе."""
+    if args.url:
+        async with AsyncClient(base_url=args.url, timeout=60) as client:
+            yield client
+        return
+    async with benchmark_database(
+        args.dsn, pool_size=max(args.concurrency)
+    ) as session_factory, app_client(session_factory) as client:
+        yield client
+
+
+def git_revision() -> Optional[str]:
+    """Текущий коммит, чтобы результаты разных ревизий можно было сравнить."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Регрессии относительно baseline: RPS ниже или задержка выше
+    базовой больше чем на tolerance.
+    """
+    baseline_results = {
+        result['name']: result for result in baseline['results']
+    }
+    regressions = []
+    for result in report['results']:
+        previous = baseline_results.get(result['name'])
+        if previous is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            if not previous[metric]:
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            if change * direction > tolerance:
+                regressions.append(
+                    f'{result["name"]} {metric}: '
+                    f'{previous[metric]} -> {result[metric]} '
+                    f'({change:+.1%})'
+                )
+    return regressions
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument(
+        '--url', help='адрес запущенного сервера вместо ASGI в процессе'
+    )
+    parser.add_argument(
+        '--mixes', nargs='+', choices=MIXES, default=list(MIXES)
+    )
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 8, 32, 128]
+    )
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--wallets', type=int, default=1000)
+    parser.add_argument('--sample-interval-ms', type=float, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для JSON-отчета')
+    parser.add_argument('--baseline', help='JSON-отчет для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+    args.dsn_asyncpg = args.dsn.replace(
+        'postgresql+asyncpg://', 'postgresql://'
+    )
+    random.seed(args.seed)
+    results = []
+    async with target_client(args) as client:
+        wallet_ids = await create_wallets(client, args.wallets)
+        for mix_name in args.mixes:
+            for concurrency in args.concurrency:
+                results.append(await run_mix(
+                    client, MIXES[mix_name], concurrency, wallet_ids, args
+                ))
+    report = {
+        'revision': git_revision(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'target': args.url or 'asgi',
+        'requests': args.requests,
+        'wallets': args.wallets,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    print(output)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
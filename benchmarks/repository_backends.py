@@ -0,0 +1,92 @@
+"""
+Запросы в секунду на один процесс для горячих эндпоинтов при
+WALLET_REPOSITORY_BACKEND=orm и WALLET_REPOSITORY_BACKEND=asyncpg.
+Приложение вызывается в этом же процессе через ASGI.
+
+    python -m benchmarks.repository_backends --dsn postgresql+asyncpg://...
+"""
+import asyncio
+import json
+import random
+import time
+
+import asyncpg
+
+from app import asyncpg_pool
+from app.config import settings
+from app.schemas.wallet import OperationType
+from benchmarks.common import (Timer, app_client, base_parser,
+                               benchmark_database, print_report, summarize)
+
+BACKENDS = ('orm', 'asyncpg')
+
+
+async def run_scenario(client, name: str, wallet_ids, args) -> dict:
+    """Прогнать запросы одного вида с заданным параллелизмом."""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request() -> None:
+        nonlocal errors
+        wallet_id = random.choice(wallet_ids)
+        async with semaphore:
+            started = time.perf_counter()
+            if name == 'get':
+                response = await client.get(f'/api/v1/wallets/{wallet_id}')
+            else:
+                response = await client.post(
+                    f'/api/v1/wallets/{wallet_id}/operation',
+                    json={
+                        'operation_type': OperationType.DEPOSIT,
+                        'amount': 1
+                    }
+                )
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    with Timer() as timer:
+        await asyncio.gather(*[request() for _ in range(args.requests)])
+    return summarize(
+        f'{settings.wallet_repository_backend}:{name}',
+        latencies,
+        timer.elapsed,
+        errors=errors,
+        concurrency=args.concurrency
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--wallets', type=int, default=1000)
+    args = parser.parse_args()
+    results = []
+    async with benchmark_database(
+        args.dsn, pool_size=args.concurrency
+    ) as session_factory, app_client(session_factory) as client:
+        create_response = await client.post(
+            '/api/v1/wallets:bulk', json={'count': args.wallets}
+        )
+        wallet_ids = [
+            json.loads(line)['id']
+            for line in create_response.text.splitlines()
+        ]
+        asyncpg_pool._pool = await asyncpg.create_pool(
+            args.dsn.replace('postgresql+asyncpg://', 'postgresql://'),
+            min_size=args.concurrency,
+            max_size=args.concurrency
+        )
+        for backend in BACKENDS:
+            settings.wallet_repository_backend = backend
+            for scenario in ('get', 'operation'):
+                results.append(
+                    await run_scenario(client, scenario, wallet_ids, args)
+                )
+        await asyncpg_pool.close_asyncpg_pool()
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Стоимость сборки и сериализации одного ответа WalletResponse без сети
+и базы: путь response_model FastAPI (валидация в сервисе, повторная
+валидация и сериализация в FastAPI, json.dumps в JSONResponse) против
+быстрого пути (WalletResponse.of и FastJSONResponse).
+
+    python -m benchmarks.serialization --responses 100000
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.main import app
+from app.responses import FastJSONResponse, orjson
+from app.schemas.wallet import WalletResponse
+from benchmarks.common import print_report
+
+WALLET_PATH = '/api/v1/wallets/{wallet_uuid}'
+
+
+async def response_model_path(field, wallet_id, balance) -> bytes:
+    wallet = WalletResponse(id=wallet_id, balance=balance)
+    content = await serialize_response(field=field, response_content=wallet)
+    return JSONResponse(content).body
+
+
+async def fast_path(field, wallet_id, balance) -> bytes:
+    wallet = WalletResponse.of(wallet_id, balance)
+    return FastJSONResponse(wallet.model_dump()).body
+
+
+async def measure(name: str, build, field, count: int) -> dict:
+    wallet_ids = [uuid4() for _ in range(1000)]
+    started = time.perf_counter()
+    for index in range(count):
+        await build(field, wallet_ids[index % len(wallet_ids)], index)
+    elapsed = time.perf_counter() - started
+    return {
+        'name': name,
+        'responses': count,
+        'us_per_response': round(elapsed / count * 1_000_000, 3),
+        'responses_per_s': round(count / elapsed, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--responses', type=int, default=100_000)
+    args = parser.parse_args()
+    route = next(
+        route for route in app.routes
+        if isinstance(route, APIRoute) and route.path == WALLET_PATH
+    )
+    results = [
+        await measure(
+            name, build, route.response_field, args.responses
+        )
+        for name, build in (
+            ('response_model', response_model_path),
+            ('orjson' if orjson is not None else 'json', fast_path),
+        )
+    ]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Масштабирование пропускной способности по числу рабочих процессов
+uvicorn: для каждого значения --workers сервер запускается через run.py
+(SERVER_WORKERS=n), после чего смесь запросов из benchmarks.load идет
+через HTTP. Подключение к базе берется из .env / POSTGRES_*.
+
+    python -m benchmarks.server_workers --workers 1 2 4 8 --concurrency 64
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+from httpx import AsyncClient, HTTPError, Limits
+
+from benchmarks.common import base_parser, print_report
+from benchmarks.load import MIXES, create_wallets, run_mix
+
+STARTUP_TIMEOUT = 60
+POLL_INTERVAL = 0.2
+
+
+@asynccontextmanager
+async def running_server(
+    workers: int, port: int
+) -> AsyncGenerator[str, None]:
+    """Запустить run.py с заданным числом процессов и дождаться /health."""
+    url = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, 'run.py'],
+        env={
+            **os.environ,
+            'DEBUG': 'false',
+            'SERVER_HOST': '127.0.0.1',
+            'SERVER_PORT': str(port),
+            'SERVER_WORKERS': str(workers),
+            'REQUEST_METRICS_ENABLED': 'false',
+        },
+    )
+    try:
+        await wait_ready(url, server)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=STARTUP_TIMEOUT)
+
+
+async def wait_ready(
+    url: str, server: subprocess.Popen, path: str = '/health'
+) -> None:
+    """Дождаться ответа 200 от path запущенного сервера."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f'server exited with {server.returncode}')
+            try:
+                if (await client.get(path)).status_code == 200:
+                    return
+            except HTTPError:
+                pass
+            await asyncio.sleep(POLL_INTERVAL)
+    raise TimeoutError(f'server at {url} did not start')
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument(
+        '--mix', choices=MIXES, default='read_heavy'
+    )
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--wallets', type=int, default=1000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sample-interval-ms', type=float, default=50)
+    args = parser.parse_args()
+    args.dsn_asyncpg = args.dsn.replace(
+        'postgresql+asyncpg://', 'postgresql://'
+    )
+    random.seed(0)
+    results = []
+    for workers in args.workers:
+        async with running_server(workers, args.port) as url:
+            async with AsyncClient(
+                base_url=url, timeout=60,
+                limits=Limits(max_connections=args.concurrency),
+            ) as client:
+                wallet_ids = await create_wallets(client, args.wallets)
+                result = await run_mix(
+                    client, MIXES[args.mix], args.concurrency,
+                    wallet_ids, args
+                )
+        result['name'] = f'workers={workers}'
+        result['workers'] = workers
+        results.append(result)
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
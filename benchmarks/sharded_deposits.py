@@ -0,0 +1,104 @@
+"""
+Пропускная способность пополнений одного горячего кошелька в зависимости
+от числа шардов баланса в каждом режиме обновления: pessimistic, atomic,
+optimistic и coalesced (группировка операций), с числом ответов по
+статусам.
+
+    python -m benchmarks.sharded_deposits --dsn postgresql+asyncpg://... \\
+        --modes pessimistic coalesced
+"""
+import asyncio
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.schemas.wallet import (OperationType, WalletCreate,
+                                WalletOperationRequest)
+from app.services import operation_coalescer
+from app.services.operation_coalescer import OperationCoalescer
+from app.services.wallet_service import WalletService
+from benchmarks.common import (Timer, base_parser, benchmark_database,
+                               print_report, summarize)
+
+MODES = ('pessimistic', 'atomic', 'optimistic', 'coalesced')
+
+
+async def run_shards(
+    session_factory, mode: str, balance_shards: int, args
+) -> dict:
+    """
+    Прогнать параллельные пополнения кошелька с balance_shards шардами
+    в заданном режиме.
+    """
+    settings.operation_coalescing_enabled = mode == 'coalesced'
+    if mode == 'coalesced':
+        operation_coalescer._coalescer = OperationCoalescer(
+            session_factory,
+            window=args.coalesce_window_ms / 1000,
+            max_batch_size=args.concurrency
+        )
+    else:
+        settings.balance_update_mode = mode
+    async with session_factory() as session:
+        wallet = await WalletService(session).create(
+            WalletCreate(balance=0, balance_shards=balance_shards)
+        )
+    request = WalletOperationRequest(
+        operation_type=OperationType.DEPOSIT, amount=args.amount
+    )
+    latencies = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def deposit() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            async with session_factory() as session:
+                try:
+                    await WalletService(session).update_balance(
+                        request, wallet.id
+                    )
+                    statuses['200'] += 1
+                except HTTPException as error:
+                    statuses[str(error.status_code)] += 1
+            latencies.append(time.perf_counter() - started)
+
+    with Timer() as timer:
+        await asyncio.gather(*[deposit() for _ in range(args.operations)])
+    return summarize(
+        f'{mode}:shards={balance_shards}',
+        latencies,
+        timer.elapsed,
+        concurrency=args.concurrency,
+        statuses=dict(statuses)
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--amount', type=int, default=10)
+    parser.add_argument('--coalesce-window-ms', type=float, default=2)
+    parser.add_argument(
+        '--shards', type=int, nargs='+', default=[1, 2, 4, 8, 16]
+    )
+    parser.add_argument(
+        '--modes', nargs='+', choices=MODES, default=list(MODES)
+    )
+    args = parser.parse_args()
+    async with benchmark_database(
+        args.dsn, pool_size=args.concurrency
+    ) as session_factory:
+        results = [
+            await run_shards(session_factory, mode, balance_shards, args)
+            for mode in args.modes
+            for balance_shards in args.shards
+        ]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Холодный старт: время импорта приложения, время до ответа /health и
+/ready после запуска run.py и задержки первых запросов к кошелькам -
+с прогревом пула (DATABASE_WARMUP_CONNECTIONS) и без него. Сервер
+подключается к базе из .env / POSTGRES_*, --dsn должен указывать на
+ту же базу: в ней заранее создаются кошельки.
+
+    python -m benchmarks.startup --warmup-connections 0 10 --burst 32
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from statistics import median
+
+from httpx import AsyncClient, Limits
+
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+from benchmarks.common import (base_parser, benchmark_database, print_report,
+                               summarize)
+from benchmarks.server_workers import STARTUP_TIMEOUT, wait_ready
+
+IMPORT_SNIPPET = (
+    'import time; started = time.perf_counter(); import app.main; '
+    'print(time.perf_counter() - started)'
+)
+WALLET_BALANCE = 10 ** 9
+
+
+def measure_import(repeats: int) -> float:
+    """Медиана времени импорта app.main в новом процессе, мс."""
+    return round(median(
+        float(subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SNIPPET], text=True
+        )) * 1000
+        for _ in range(repeats)
+    ), 3)
+
+
+async def create_wallets(dsn: str, count: int) -> list[str]:
+    async with benchmark_database(dsn) as session_factory:
+        async with session_factory() as session:
+            wallets = await WalletRepository(session).create_many(
+                [WALLET_BALANCE] * count
+            )
+            await session.commit()
+    return [str(wallet_id) for wallet_id, _ in wallets]
+
+
+async def first_requests(
+    client: AsyncClient, wallet_ids: list[str], burst: int
+) -> list[float]:
+    """Задержки пачки параллельных первых запросов (чтение и депозит)."""
+    async def request(index: int) -> float:
+        wallet_id = random.choice(wallet_ids)
+        started = time.perf_counter()
+        if index % 2:
+            response = await client.get(f'/api/v1/wallets/{wallet_id}')
+        else:
+            response = await client.post(
+                f'/api/v1/wallets/{wallet_id}/operation',
+                json={
+                    'operation_type': OperationType.DEPOSIT, 'amount': 1
+                }
+            )
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*map(request, range(burst)))
+
+
+async def cold_start(
+    warmup_connections: int, wallet_ids: list[str], args
+) -> dict:
+    url = f'http://127.0.0.1:{args.port}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, 'run.py'],
+        env={
+            **os.environ,
+            'DEBUG': 'false',
+            'SERVER_HOST': '127.0.0.1',
+            'SERVER_PORT': str(args.port),
+            'SERVER_WORKERS': '1',
+            'REQUEST_METRICS_ENABLED': 'false',
+            'WALLET_STATS_REFRESH_INTERVAL_SECONDS': '0',
+            'DATABASE_WARMUP_CONNECTIONS': str(warmup_connections),
+        },
+    )
+    try:
+        await wait_ready(url, server, '/health')
+        health_ms = (time.perf_counter() - started) * 1000
+        await wait_ready(url, server, '/ready')
+        ready_ms = (time.perf_counter() - started) * 1000
+        async with AsyncClient(
+            base_url=url, timeout=60,
+            limits=Limits(max_connections=args.burst),
+        ) as client:
+            first_started = time.perf_counter()
+            latencies = await first_requests(client, wallet_ids, args.burst)
+            elapsed = time.perf_counter() - first_started
+    finally:
+        server.terminate()
+        server.wait(timeout=STARTUP_TIMEOUT)
+    return summarize(
+        f'warmup_connections={warmup_connections}',
+        latencies,
+        elapsed,
+        health_ms=round(health_ms, 3),
+        ready_ms=round(ready_ms, 3),
+        time_to_first_request_ms=round(ready_ms + min(latencies) * 1000, 3),
+    )
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument(
+        '--warmup-connections', type=int, nargs='+', default=[0, 10]
+    )
+    parser.add_argument('--burst', type=int, default=32)
+    parser.add_argument('--wallets', type=int, default=100)
+    parser.add_argument('--import-repeats', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    random.seed(0)
+    results = [{
+        'name': 'import app.main',
+        'import_ms': measure_import(args.import_repeats),
+    }]
+    wallet_ids = await create_wallets(args.dsn, args.wallets)
+    for warmup_connections in args.warmup_connections:
+        results.append(
+            await cold_start(warmup_connections, wallet_ids, args)
+        )
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
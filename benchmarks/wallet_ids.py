@@ -0,0 +1,79 @@
+"""
+Массовая вставка кошельков с uuid версии 4 и версии 7
+(WALLET_ID_VERSION=v4|v7): --rows строк пачками по --batch-size через
+WalletRepository.create_many (COPY для больших пачек). Для каждой версии
+выводятся строк в секунду, размер индекса первичного ключа и таблицы и
+объем WAL за прогон. Перед каждым прогоном таблица wallets очищается
+(TRUNCATE ... CASCADE) и выполняется CHECKPOINT, чтобы полные образы
+страниц в WAL считались одинаково: бенчмарк нужно запускать на отдельной
+базе от имени суперпользователя.
+
+    python -m benchmarks.wallet_ids --dsn postgresql+asyncpg://... \\
+        --rows 5000000
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.wallet import WALLET_BALANCE_DEFAULT
+from app.repositories.wallet_repository import WalletRepository
+from benchmarks.common import (Timer, base_parser, benchmark_database,
+                               print_report)
+
+VERSIONS = ('v4', 'v7')
+
+
+async def run_version(session_factory, version: str, args) -> dict:
+    """Вставить --rows кошельков с uuid версии version."""
+    settings.wallet_id_version = version
+    async with session_factory() as session:
+        await session.execute(text('TRUNCATE wallets CASCADE'))
+        await session.commit()
+    async with session_factory() as session:
+        await session.execute(text('CHECKPOINT'))
+        wal_started = await session.scalar(
+            text('SELECT pg_current_wal_insert_lsn()')
+        )
+        await session.commit()
+    with Timer() as timer:
+        for offset in range(0, args.rows, args.batch_size):
+            count = min(args.batch_size, args.rows - offset)
+            async with session_factory() as session:
+                await WalletRepository(session).create_many(
+                    [WALLET_BALANCE_DEFAULT] * count
+                )
+                await session.commit()
+    async with session_factory() as session:
+        sizes = (await session.execute(text(
+            'SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), :started), '
+            "pg_relation_size('wallets_pkey'), pg_relation_size('wallets')"
+        ), {'started': wal_started})).one()
+    wal_bytes, index_bytes, table_bytes = map(int, sizes)
+    return {
+        'name': version,
+        'rows': args.rows,
+        'batch_size': args.batch_size,
+        'elapsed_s': round(timer.elapsed, 4),
+        'rows_per_s': round(args.rows / timer.elapsed, 2),
+        'index_mb': round(index_bytes / 2 ** 20, 2),
+        'table_mb': round(table_bytes / 2 ** 20, 2),
+        'wal_mb': round(wal_bytes / 2 ** 20, 2),
+    }
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--versions', nargs='+', default=list(VERSIONS))
+    args = parser.parse_args()
+    results = []
+    async with benchmark_database(args.dsn) as session_factory:
+        for version in args.versions:
+            results.append(await run_version(session_factory, version, args))
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
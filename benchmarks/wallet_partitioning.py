@@ -0,0 +1,224 @@
+"""
+Задержки чтения баланса и атомарной операции (WalletRepository.get_balance
+и apply_operation) по случайным кошелькам таблицы wallets из --rows строк
+до и после переноса ее в секционированную по хешу id (миграция
+a81f3c6e2d90, --partitions секций). Миграция выполняется под фоновой
+нагрузкой --writers пополнений; после нее сверяется сумма балансов и
+выводятся длительность миграции, максимальная задержка пополнения и
+число ошибок пополнений за время миграции.
+
+Нужна пустая база: схема создается миграциями alembic.
+
+    python -m benchmarks.wallet_partitioning --dsn postgresql+asyncpg://... \\
+        --rows 10000000 --partitions 16
+"""
+import asyncio
+import random
+import time
+from argparse import Namespace
+from pathlib import Path
+from uuid import UUID
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+from benchmarks.common import Timer, base_parser, print_report, summarize
+
+MIGRATIONS_PATH = Path(__file__).resolve().parents[1] / 'migrations'
+UNPARTITIONED_REVISION = '3d9a61f4c2b8'
+PARTITIONED_REVISION = 'a81f3c6e2d90'
+DEPOSIT_AMOUNT = 1
+
+
+async def migrate(dsn: str, revision: str, **options) -> None:
+    """alembic upgrade с параметрами -x."""
+    config = Config()
+    config.set_main_option('script_location', str(MIGRATIONS_PATH))
+    config.cmd_opts = Namespace(x=[
+        f'dsn={dsn}',
+        *(f'{name}={value}' for name, value in options.items()),
+    ])
+    await asyncio.to_thread(command.upgrade, config, revision)
+
+
+async def fill_wallets(session_factory, rows: int, batch_size: int) -> None:
+    """Заполнить wallets пачками по batch_size строк."""
+    for offset in range(0, rows, batch_size):
+        async with session_factory() as session:
+            await session.execute(text(
+                'INSERT INTO wallets (id, balance) '
+                'SELECT gen_random_uuid(), (random() * 10000)::integer '
+                'FROM generate_series(1, :count)'
+            ), {'count': min(batch_size, rows - offset)})
+            await session.commit()
+    async with session_factory() as session:
+        await session.execute(text('ANALYZE wallets'))
+        await session.commit()
+
+
+async def sample_wallets(
+    session_factory, rows: int, count: int
+) -> list[UUID]:
+    """Случайные count кошельков без сортировки всей таблицы."""
+    async with session_factory() as session:
+        result = await session.execute(text(
+            'SELECT id FROM wallets TABLESAMPLE BERNOULLI (:percent) '
+            'LIMIT :count'
+        ), {'percent': min(100.0, 200.0 * count / rows), 'count': count})
+        return list(result.scalars())
+
+
+async def total_balance(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(text('SELECT sum(balance) FROM wallets'))
+
+
+async def measure(
+    session_factory, name: str, wallet_uuids: list[UUID], args
+) -> list[dict]:
+    """Задержки чтения баланса и операции по случайным кошелькам."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+    for operation in ('get_balance', 'apply_operation'):
+        latencies = []
+
+        async def run(wallet_uuid: UUID) -> None:
+            async with semaphore, session_factory() as session:
+                repository = WalletRepository(session)
+                started = time.perf_counter()
+                if operation == 'get_balance':
+                    await repository.get_balance(wallet_uuid)
+                else:
+                    await repository.apply_operation(
+                        wallet_uuid, OperationType.DEPOSIT, DEPOSIT_AMOUNT
+                    )
+                    await session.commit()
+                latencies.append(time.perf_counter() - started)
+
+        with Timer() as timer:
+            await asyncio.gather(*(
+                run(random.choice(wallet_uuids))
+                for _ in range(args.requests)
+            ))
+        results.append(summarize(
+            f'{name}:{operation}',
+            latencies,
+            timer.elapsed,
+            concurrency=args.concurrency
+        ))
+    return results
+
+
+async def migrate_under_load(
+    session_factory, wallet_uuids: list[UUID], args
+) -> dict:
+    """
+    Миграция на секционированную таблицу, пока --writers клиентов
+    пополняют случайные кошельки. Сумма балансов после миграции должна
+    совпасть с исходной плюс успешные пополнения.
+    """
+    balance_before = await total_balance(session_factory)
+    stop = asyncio.Event()
+    deposited = 0
+    errors = 0
+    latencies = []
+
+    async def writer() -> None:
+        nonlocal deposited, errors
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    row = await WalletRepository(session).apply_operation(
+                        random.choice(wallet_uuids),
+                        OperationType.DEPOSIT,
+                        DEPOSIT_AMOUNT
+                    )
+                    await session.commit()
+            except Exception:
+                errors += 1
+                await asyncio.sleep(args.writer_pause_ms / 1000)
+                continue
+            latencies.append(time.perf_counter() - started)
+            if row is not None:
+                deposited += DEPOSIT_AMOUNT
+            await asyncio.sleep(args.writer_pause_ms / 1000)
+
+    writers = [asyncio.create_task(writer()) for _ in range(args.writers)]
+    try:
+        with Timer() as timer:
+            await migrate(
+                args.dsn,
+                PARTITIONED_REVISION,
+                wallet_partitions=args.partitions,
+                copy_batch_size=args.copy_batch_size
+            )
+    finally:
+        stop.set()
+        await asyncio.gather(*writers)
+    balance_after = await total_balance(session_factory)
+    return {
+        'name': 'migration',
+        'elapsed_s': round(timer.elapsed, 4),
+        'partitions': args.partitions,
+        'copy_batch_size': args.copy_batch_size,
+        'writer_deposits': len(latencies),
+        'writer_errors': errors,
+        'writer_max_ms': round(max(latencies, default=0) * 1000, 3),
+        'balance_consistent': balance_after == balance_before + deposited,
+    }
+
+
+async def main() -> None:
+    parser = base_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--fill-batch-size', type=int, default=1_000_000)
+    parser.add_argument('--partitions', type=int, default=16)
+    parser.add_argument('--copy-batch-size', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sample', type=int, default=100_000)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--writer-pause-ms', type=float, default=5)
+    args = parser.parse_args()
+    random.seed(0)
+    await migrate(args.dsn, UNPARTITIONED_REVISION)
+    engine = create_async_engine(
+        args.dsn, pool_size=max(args.concurrency, args.writers)
+    )
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    results = []
+    try:
+        await fill_wallets(session_factory, args.rows, args.fill_batch_size)
+        wallet_uuids = await sample_wallets(
+            session_factory, args.rows, args.sample
+        )
+        results += await measure(
+            session_factory, 'plain', wallet_uuids, args
+        )
+        results.append(
+            await migrate_under_load(session_factory, wallet_uuids, args)
+        )
+        # Соединения со старыми подготовленными запросами к удаленной
+        # таблице закрываются, чтобы не мерить их перепланирование
+        await engine.dispose()
+        async with session_factory() as session:
+            await session.execute(text('ANALYZE wallets'))
+            await session.commit()
+        results += await measure(
+            session_factory, 'partitioned', wallet_uuids, args
+        )
+    finally:
+        await engine.dispose()
+    print_report(results)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
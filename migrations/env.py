@@ -8,7 +8,10 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.config import settings
 from app.database import Base
+from app.models.balance_engine_checkpoint import BalanceEngineCheckpoint  # noqa
 from app.models.wallet import Wallet  # noqa
+from app.models.wallet_balance_shard import WalletBalanceShard  # noqa
+from app.models.wallet_transaction import WalletTransaction  # noqa
 
 config = context.config
 
@@ -16,7 +19,13 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-config.set_main_option('sqlalchemy.url', settings.database_url)
+# alembic -x dsn=... переопределяет базу из настроек приложения
+config.set_main_option(
+    'sqlalchemy.url',
+    context.get_x_argument(as_dictionary=True).get(
+        'dsn', settings.database_url
+    )
+)
 
 
 target_metadata = Base.metadata
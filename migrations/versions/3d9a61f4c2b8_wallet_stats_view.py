@@ -0,0 +1,64 @@
+"""wallet stats view
+
+Revision ID: 3d9a61f4c2b8
+Revises: e5f80b2c7a39
+Create Date: 2026-10-18 19:05:31.905118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9a61f4c2b8'
+down_revision: Union[str, Sequence[str], None] = 'e5f80b2c7a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('''
+CREATE MATERIALIZED VIEW wallet_stats AS
+WITH balances AS (
+    SELECT wallets.balance + coalesce(shards.balance, 0) AS balance
+    FROM wallets
+    LEFT JOIN (
+        SELECT wallet_id, sum(balance) AS balance
+        FROM wallet_balance_shards
+        GROUP BY wallet_id
+    ) AS shards ON shards.wallet_id = wallets.id
+),
+buckets AS (
+    SELECT
+        CASE WHEN balance = 0 THEN 0
+        ELSE floor(log(balance))::integer + 1 END AS bucket,
+        count(*) AS wallets
+    FROM balances
+    GROUP BY 1
+)
+SELECT
+    1 AS id,
+    count(*) AS wallets_count,
+    coalesce(sum(balance), 0)::bigint AS total_balance,
+    coalesce(min(balance), 0)::bigint AS min_balance,
+    coalesce(max(balance), 0)::bigint AS max_balance,
+    coalesce(avg(balance), 0)::double precision AS avg_balance,
+    percentile_disc(ARRAY[0.5, 0.9, 0.99]::double precision[])
+        WITHIN GROUP (ORDER BY balance)::bigint[] AS percentiles,
+    (
+        SELECT coalesce(jsonb_object_agg(bucket, wallets), '{}'::jsonb)
+        FROM buckets
+    ) AS distribution,
+    now() AS refreshed_at
+FROM balances
+WITH DATA
+''')
+    op.execute(
+        'CREATE UNIQUE INDEX wallet_stats_id ON wallet_stats (id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP MATERIALIZED VIEW wallet_stats')
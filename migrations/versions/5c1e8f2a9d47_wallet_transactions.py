@@ -0,0 +1,48 @@
+"""wallet transactions
+
+Revision ID: 5c1e8f2a9d47
+Revises: 0a5da93c6998
+Create Date: 2026-10-18 12:04:31.118204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f2a9d47'
+down_revision: Union[str, Sequence[str], None] = '0a5da93c6998'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'wallet_transactions',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('wallet_id', sa.UUID(), nullable=False),
+        sa.Column('operation_type', sa.String(length=16), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('balance_after', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=255), nullable=True),
+        sa.Column(
+            'created_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'wallet_id',
+            'idempotency_key',
+            name='wallet_transactions_idempotency_key',
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('wallet_transactions')
@@ -0,0 +1,33 @@
+"""balance engine checkpoints
+
+Revision ID: 8b3d2e6f1a04
+Revises: 5c1e8f2a9d47
+Create Date: 2026-10-18 14:21:07.402915
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3d2e6f1a04'
+down_revision: Union[str, Sequence[str], None] = '5c1e8f2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'balance_engine_checkpoints',
+        sa.Column('node_index', sa.Integer(), autoincrement=False,
+                  nullable=False),
+        sa.Column('last_seq', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('node_index'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('balance_engine_checkpoints')
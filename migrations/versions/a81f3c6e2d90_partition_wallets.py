@@ -0,0 +1,235 @@
+"""partition wallets
+
+Revision ID: a81f3c6e2d90
+Revises: 3d9a61f4c2b8
+Create Date: 2026-10-18 21:14:52.118403
+
+Таблица wallets переносится в секционированную по хешу id без остановки
+записи: новая таблица создается рядом, триггер на wallets повторяет в
+ней каждое изменение, строки копируются пачками по id в отдельных
+транзакциях, после чего таблицы меняются местами в одной короткой
+транзакции под ACCESS EXCLUSIVE. Внешние ключи wallet_transactions и
+wallet_balance_shards создаются заново (NOT VALID и проверка отдельно),
+представление wallet_stats строится по новой таблице заранее и
+подменяется вместе с ней, поэтому сводка читается на всем протяжении
+миграции. Прерванную миграцию можно запустить повторно: уже
+скопированные строки пропускаются.
+
+    alembic -x wallet_partitions=64 -x copy_batch_size=10000 upgrade head
+
+В режиме --sql копирование идет одним INSERT ... SELECT.
+"""
+from typing import Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81f3c6e2d90'
+down_revision: Union[str, Sequence[str], None] = '3d9a61f4c2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WALLET_PARTITIONS_DEFAULT = 16
+COPY_BATCH_SIZE_DEFAULT = 10_000
+# Сколько миграция ждет блокировку wallets для подмены таблиц, прежде
+# чем упасть, не задерживая стоящие за ней запросы приложения
+SWAP_LOCK_TIMEOUT = '5s'
+REFERENCING_TABLES = ('wallet_transactions', 'wallet_balance_shards')
+
+MIRROR_FUNCTION_SQL = '''
+CREATE OR REPLACE FUNCTION wallets_mirror() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM {target} WHERE id = OLD.id;
+        RETURN OLD;
+    END IF;
+    INSERT INTO {target} SELECT NEW.*
+    ON CONFLICT (id) DO UPDATE SET
+        balance = EXCLUDED.balance,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        balance_shards = EXCLUDED.balance_shards,
+        version = EXCLUDED.version;
+    RETURN NEW;
+END
+$$
+'''
+# Следующая пачка строк по возрастанию id после :after; возвращает
+# последний скопированный id или NULL, когда строки закончились
+COPY_BATCH_SQL = '''
+WITH batch AS (
+    SELECT * FROM wallets
+    WHERE CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :batch_size
+),
+copied AS (
+    INSERT INTO {target} SELECT * FROM batch ON CONFLICT (id) DO NOTHING
+)
+SELECT id FROM batch ORDER BY id DESC LIMIT 1
+'''
+# Сводка по таблице {source}; после переименования {source} в wallets
+# представление ссылается уже на нее
+WALLET_STATS_VIEW_SQL = '''
+CREATE MATERIALIZED VIEW wallet_stats_next AS
+WITH balances AS (
+    SELECT wallets.balance + coalesce(shards.balance, 0) AS balance
+    FROM {source} AS wallets
+    LEFT JOIN (
+        SELECT wallet_id, sum(balance) AS balance
+        FROM wallet_balance_shards
+        GROUP BY wallet_id
+    ) AS shards ON shards.wallet_id = wallets.id
+),
+buckets AS (
+    SELECT
+        CASE WHEN balance = 0 THEN 0
+        ELSE floor(log(balance))::integer + 1 END AS bucket,
+        count(*) AS wallets
+    FROM balances
+    GROUP BY 1
+)
+SELECT
+    1 AS id,
+    count(*) AS wallets_count,
+    coalesce(sum(balance), 0)::bigint AS total_balance,
+    coalesce(min(balance), 0)::bigint AS min_balance,
+    coalesce(max(balance), 0)::bigint AS max_balance,
+    coalesce(avg(balance), 0)::double precision AS avg_balance,
+    percentile_disc(ARRAY[0.5, 0.9, 0.99]::double precision[])
+        WITHIN GROUP (ORDER BY balance)::bigint[] AS percentiles,
+    (
+        SELECT coalesce(jsonb_object_agg(bucket, wallets), '{{}}'::jsonb)
+        FROM buckets
+    ) AS distribution,
+    now() AS refreshed_at
+FROM balances
+'''
+
+
+def x_argument(name: str, default: int) -> int:
+    """Целочисленный параметр миграции из alembic -x name=value."""
+    return int(context.get_x_argument(as_dictionary=True).get(name, default))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = x_argument('wallet_partitions', WALLET_PARTITIONS_DEFAULT)
+    move_wallets('wallets_partitioned', [
+        'CREATE TABLE IF NOT EXISTS wallets_partitioned '
+        '(LIKE wallets INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        'PARTITION BY HASH (id)',
+        *(
+            f'CREATE TABLE IF NOT EXISTS wallets_p{remainder} '
+            f'PARTITION OF wallets_partitioned FOR VALUES WITH '
+            f'(MODULUS {partitions}, REMAINDER {remainder})'
+            for remainder in range(partitions)
+        ),
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    move_wallets('wallets_unpartitioned', [
+        'CREATE TABLE IF NOT EXISTS wallets_unpartitioned '
+        '(LIKE wallets INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+    ])
+
+
+def move_wallets(target: str, create_target: Sequence[str]) -> None:
+    """Перенести wallets в таблицу target и подменить ею wallets."""
+    for statement in create_target:
+        op.execute(statement)
+    op.execute(
+        f'ALTER TABLE {target} DROP CONSTRAINT IF EXISTS {target}_pkey'
+    )
+    op.execute(
+        f'ALTER TABLE {target} ADD CONSTRAINT {target}_pkey PRIMARY KEY (id)'
+    )
+    op.execute(MIRROR_FUNCTION_SQL.format(target=target))
+    op.execute('DROP TRIGGER IF EXISTS wallets_mirror ON wallets')
+    op.execute(
+        'CREATE TRIGGER wallets_mirror '
+        'AFTER INSERT OR UPDATE OR DELETE ON wallets '
+        'FOR EACH ROW EXECUTE FUNCTION wallets_mirror()'
+    )
+    copy_wallets(target)
+    build_wallet_stats(target)
+    swap_wallets(target)
+
+
+def copy_wallets(target: str) -> None:
+    """
+    Скопировать строки wallets в target. Каждая пачка - отдельная
+    транзакция: блокировки строк держатся недолго, а изменения,
+    сделанные во время копирования, переносит триггер.
+    """
+    if context.is_offline_mode():
+        op.execute(
+            f'INSERT INTO {target} SELECT * FROM wallets '
+            'ON CONFLICT (id) DO NOTHING'
+        )
+        return
+    batch_size = x_argument('copy_batch_size', COPY_BATCH_SIZE_DEFAULT)
+    copy_batch = sa.text(COPY_BATCH_SQL.format(target=target))
+    with op.get_context().autocommit_block():
+        after: Optional[str] = None
+        while True:
+            after = op.get_bind().execute(
+                copy_batch, {'after': after, 'batch_size': batch_size}
+            ).scalar()
+            if after is None:
+                break
+
+
+def build_wallet_stats(target: str) -> None:
+    """
+    Построить и заполнить сводку по таблице target до подмены, вне ее
+    транзакции: полный проход по таблице не держит блокировок wallets, а
+    старая сводка до подмены остается доступной для чтения.
+    """
+    with op.get_context().autocommit_block():
+        op.execute('DROP MATERIALIZED VIEW IF EXISTS wallet_stats_next')
+        op.execute(WALLET_STATS_VIEW_SQL.format(source=target))
+        op.execute(
+            'CREATE UNIQUE INDEX wallet_stats_next_id '
+            'ON wallet_stats_next (id)'
+        )
+
+
+def swap_wallets(target: str) -> None:
+    """
+    Подменить wallets таблицей target и wallet_stats заранее построенной
+    сводкой в одной транзакции. Внешние ключи проверяются уже после нее,
+    без блокировки записи в wallets.
+    """
+    op.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    op.execute('LOCK TABLE wallets IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP MATERIALIZED VIEW wallet_stats')
+    for table in REFERENCING_TABLES:
+        op.execute(
+            f'ALTER TABLE {table} DROP CONSTRAINT {table}_wallet_id_fkey'
+        )
+    op.execute('DROP TABLE wallets')
+    op.execute('DROP FUNCTION wallets_mirror()')
+    op.execute(f'ALTER TABLE {target} RENAME TO wallets')
+    op.execute(
+        f'ALTER TABLE wallets RENAME CONSTRAINT {target}_pkey TO wallets_pkey'
+    )
+    for table in REFERENCING_TABLES:
+        op.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {table}_wallet_id_fkey '
+            'FOREIGN KEY (wallet_id) REFERENCES wallets (id) NOT VALID'
+        )
+    op.execute(
+        'ALTER MATERIALIZED VIEW wallet_stats_next RENAME TO wallet_stats'
+    )
+    op.execute('ALTER INDEX wallet_stats_next_id RENAME TO wallet_stats_id')
+    with op.get_context().autocommit_block():
+        for table in REFERENCING_TABLES:
+            op.execute(
+                f'ALTER TABLE {table} '
+                f'VALIDATE CONSTRAINT {table}_wallet_id_fkey'
+            )
@@ -0,0 +1,55 @@
+"""wallet balance shards
+
+Revision ID: c47a9e0b5d13
+Revises: 8b3d2e6f1a04
+Create Date: 2026-10-18 15:02:44.618230
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e0b5d13'
+down_revision: Union[str, Sequence[str], None] = '8b3d2e6f1a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'wallets',
+        sa.Column(
+            'balance_shards',
+            sa.Integer(),
+            server_default='1',
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        'wallet_balance_shards',
+        sa.Column('wallet_id', sa.UUID(), nullable=False),
+        sa.Column('shard', sa.Integer(), autoincrement=False,
+                  nullable=False),
+        sa.Column('balance', sa.Integer(), nullable=False),
+        sa.CheckConstraint(
+            'balance >= 0', name='wallet_balance_shard_non_negative'
+        ),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id']),
+        sa.PrimaryKeyConstraint('wallet_id', 'shard'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Пополнения, лежащие на шардах, переносятся в основную строку
+    op.execute(
+        'UPDATE wallets SET balance = wallets.balance + shards.total '
+        'FROM (SELECT wallet_id, sum(balance) AS total '
+        'FROM wallet_balance_shards GROUP BY wallet_id) AS shards '
+        'WHERE wallets.id = shards.wallet_id'
+    )
+    op.drop_table('wallet_balance_shards')
+    op.drop_column('wallets', 'balance_shards')
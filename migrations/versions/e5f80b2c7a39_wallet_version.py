@@ -0,0 +1,35 @@
+"""wallet version
+
+Revision ID: e5f80b2c7a39
+Revises: c47a9e0b5d13
+Create Date: 2026-10-18 18:21:07.342915
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f80b2c7a39'
+down_revision: Union[str, Sequence[str], None] = 'c47a9e0b5d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'wallets',
+        sa.Column(
+            'version',
+            sa.BigInteger(),
+            server_default='1',
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wallets', 'version')
@@ -1,11 +1,31 @@
+import os
+
 import uvicorn
 
 from app.config import settings
 
+
+def server_workers() -> int:
+    """
+    Число рабочих процессов. В режиме движка в памяти каждый процесс -
+    отдельный узел со своим ENGINE_NODE_INDEX, поэтому процесс один.
+    """
+    if settings.debug or settings.wallet_engine_mode == 'memory':
+        return 1
+    return settings.server_workers or os.cpu_count() or 1
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
+        host=settings.server_host,
+        port=settings.server_port,
         reload=settings.debug,
+        workers=server_workers(),
+        loop=settings.server_loop,
+        http=settings.server_http,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive_timeout,
+        limit_concurrency=settings.server_limit_concurrency,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_timeout,
     )
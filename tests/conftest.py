@@ -1,5 +1,6 @@
 from typing import AsyncGenerator
 
+import asyncpg
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
@@ -7,6 +8,8 @@ from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
                                     async_sessionmaker, create_async_engine)
 from testcontainers.postgres import PostgresContainer
 
+from app import asyncpg_pool
+from app.config import settings
 from app.database import Base, get_db
 from app.main import app
 
@@ -15,6 +18,21 @@ CONCURRENT_OPERATIONS_COUNT = 10
 DEPOSIT_OPERATIONS_COUNT = 7
 WITHDRAW_OPERATIONS_COUNT = 12
 OPERATION_AMOUNT = 150
+OPTIMISTIC_MAX_ATTEMPTS = 50
+
+
+@pytest.fixture(params=['pessimistic', 'atomic', 'optimistic'])
+def balance_update_mode(request, monkeypatch) -> str:
+    """
+    Переключение режима обновления баланса. В оптимистичном режиме все
+    параллельные операции над одним кошельком конфликтуют, поэтому число
+    попыток не меньше числа операций.
+    """
+    monkeypatch.setattr(settings, 'balance_update_mode', request.param)
+    monkeypatch.setattr(
+        settings, 'transaction_retry_max_attempts', OPTIMISTIC_MAX_ATTEMPTS
+    )
+    return request.param
 
 
 @pytest.fixture
@@ -69,6 +87,23 @@ async def client(
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture
+async def asyncpg_backend(
+    db_engine: AsyncEngine, monkeypatch
+) -> AsyncGenerator[asyncpg.Pool, None]:
+    """Переключение горячих эндпоинтов на пул asyncpg тестовой базы."""
+    dsn = db_engine.url.set(drivername='postgresql').render_as_string(
+        hide_password=False
+    )
+    pool = await asyncpg.create_pool(dsn)
+    monkeypatch.setattr(settings, 'wallet_repository_backend', 'asyncpg')
+    monkeypatch.setattr(asyncpg_pool, '_pool', pool)
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
 @pytest_asyncio.fixture
 async def wallet(client: AsyncClient) -> dict:
     """Создание кошелька."""
@@ -0,0 +1,114 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.schemas.wallet import OperationType
+from app.services import admission
+from app.services.admission import RETRY_AFTER_SECONDS, AdmissionController
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT
+
+
+@pytest.fixture
+def controller(monkeypatch) -> AdmissionController:
+    """Включенный контроль допуска с маленькими лимитами."""
+    controller = AdmissionController(
+        max_in_flight=3, wallet_concurrency=1, wallet_max_queue=1
+    )
+    monkeypatch.setattr(settings, 'admission_control_enabled', True)
+    monkeypatch.setattr(admission, '_admission_controller', controller)
+    return controller
+
+
+async def deposit(client: AsyncClient, wallet_id: str):
+    return await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+
+
+@asynccontextmanager
+async def occupied(
+    controller: AdmissionController, wallet_uuids: list[UUID]
+) -> AsyncIterator[None]:
+    """Операции над кошельками, ждущие допуска или удерживающие его."""
+    release = asyncio.Event()
+
+    async def hold(wallet_uuid: UUID) -> None:
+        async with controller.admit(wallet_uuid):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold(uuid)) for uuid in wallet_uuids]
+    await asyncio.sleep(0)
+    try:
+        yield
+    finally:
+        release.set()
+        await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_operations_are_admitted(
+    client: AsyncClient, wallet: dict, controller: AdmissionController,
+    monkeypatch
+):
+    """Тест для параллельных операций в пределах очереди кошелька."""
+    monkeypatch.setattr(controller, 'max_in_flight', 100)
+    monkeypatch.setattr(controller, 'wallet_max_queue', 100)
+    responses = await asyncio.gather(*(
+        deposit(client, wallet['id'])
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ))
+    assert all(response.status_code == 200 for response in responses)
+    response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert response.json().get('balance') == (
+        wallet['balance'] + OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+    )
+    assert controller.snapshot() == {
+        'in_flight': 0,
+        'queued': 0,
+        'queued_wallets': 0,
+        'max_queue_depth': controller.max_queue_depth,
+        'admitted': CONCURRENT_OPERATIONS_COUNT,
+        'shed_wallet': 0,
+        'shed_global': 0,
+    }
+    assert controller.wallets == {}
+
+
+@pytest.mark.asyncio
+async def test_hot_wallet_is_shed(
+    client: AsyncClient, wallet: dict, controller: AdmissionController
+):
+    """Тест для отклонения операций сверх очереди кошелька."""
+    cold_wallet = (await client.post('/api/v1/wallets', json={})).json()
+    async with occupied(controller, [UUID(wallet['id'])] * 2):
+        assert controller.snapshot()['queued'] == 1
+
+        response = await deposit(client, wallet['id'])
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(RETRY_AFTER_SECONDS)
+        assert (await deposit(client, cold_wallet['id'])).status_code == 200
+        assert controller.snapshot()['shed_wallet'] == 1
+    assert controller.wallets == {}
+
+
+@pytest.mark.asyncio
+async def test_operations_over_global_limit_are_shed(
+    client: AsyncClient, wallet: dict, controller: AdmissionController
+):
+    """Тест для отклонения операций сверх общего лимита процесса."""
+    async with occupied(
+        controller, [uuid4() for _ in range(controller.max_in_flight)]
+    ):
+        response = await deposit(client, wallet['id'])
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(RETRY_AFTER_SECONDS)
+        assert controller.snapshot()['shed_global'] == 1
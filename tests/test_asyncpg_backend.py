@@ -0,0 +1,136 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import asyncpg
+import pytest
+from httpx import AsyncClient
+
+from app.schemas.wallet import OperationType
+from tests.conftest import (DEPOSIT_OPERATIONS_COUNT, OPERATION_AMOUNT,
+                            WITHDRAW_OPERATIONS_COUNT)
+
+
+def operation(client: AsyncClient, wallet_id: str, operation_type, amount):
+    return client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': operation_type, 'amount': amount}
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_wallet(
+    client: AsyncClient, wallet: dict, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для получения кошелька через asyncpg."""
+    response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert response.status_code == 200
+    assert response.json() == wallet
+
+
+@pytest.mark.asyncio
+async def test_get_wallet_not_found(
+    client: AsyncClient, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для получения несуществующего кошелька через asyncpg."""
+    response = await client.get(f'/api/v1/wallets/{uuid4()}')
+    assert response.status_code == 404
+    assert response.json().get('detail') == 'Wallet not found'
+
+
+@pytest.mark.asyncio
+async def test_operations(
+    client: AsyncClient, wallet: dict, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для операций и их ошибок через asyncpg."""
+    wallet_id = wallet.get('id')
+    initial_balance = wallet.get('balance')
+    deposit_response = await operation(
+        client, wallet_id, OperationType.DEPOSIT, OPERATION_AMOUNT
+    )
+    assert deposit_response.json() == {
+        'id': wallet_id, 'balance': initial_balance + OPERATION_AMOUNT
+    }
+    overdraft_response = await operation(
+        client, wallet_id, OperationType.WITHDRAW, initial_balance * 2
+    )
+    assert overdraft_response.status_code == 400
+    assert overdraft_response.json().get('detail') == 'Not enough balance'
+    missing_response = await operation(
+        client, str(uuid4()), OperationType.DEPOSIT, OPERATION_AMOUNT
+    )
+    assert missing_response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mixed_operations(
+    client: AsyncClient, wallet: dict, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для параллельных операций через asyncpg."""
+    wallet_id = wallet.get('id')
+    operations = (
+        [OperationType.DEPOSIT] * DEPOSIT_OPERATIONS_COUNT
+        + [OperationType.WITHDRAW] * WITHDRAW_OPERATIONS_COUNT
+    )
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, operation_type, OPERATION_AMOUNT)
+        for operation_type in operations
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert final_response.json().get('balance') == (
+        wallet.get('balance') + OPERATION_AMOUNT * (
+            DEPOSIT_OPERATIONS_COUNT - WITHDRAW_OPERATIONS_COUNT
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_idempotent_operation(
+    client: AsyncClient, wallet: dict, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для повтора операции с ключом идемпотентности через asyncpg."""
+    wallet_id = wallet.get('id')
+    responses = [
+        await client.post(
+            f'/api/v1/wallets/{wallet_id}/operation',
+            json={
+                'operation_type': OperationType.DEPOSIT,
+                'amount': OPERATION_AMOUNT
+            },
+            headers={'Idempotency-Key': 'asyncpg-replay'}
+        )
+        for _ in range(2)
+    ]
+    assert responses[0].json() == responses[1].json() == {
+        'id': wallet_id, 'balance': wallet.get('balance') + OPERATION_AMOUNT
+    }
+    ledger_size = await asyncpg_backend.fetchval(
+        'SELECT count(*) FROM wallet_transactions WHERE wallet_id = $1',
+        UUID(wallet_id)
+    )
+    assert ledger_size == 1
+
+
+@pytest.mark.asyncio
+async def test_sharded_wallet_operations(
+    client: AsyncClient, asyncpg_backend: asyncpg.Pool
+):
+    """Тест для операций над шардированным кошельком через asyncpg."""
+    create_response = await client.post(
+        '/api/v1/wallets', json={'balance': 0, 'balance_shards': 4}
+    )
+    wallet_id = create_response.json().get('id')
+    deposits = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.DEPOSIT, OPERATION_AMOUNT)
+        for _ in range(DEPOSIT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in deposits)
+    withdrawals = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.WITHDRAW, OPERATION_AMOUNT)
+        for _ in range(WITHDRAW_OPERATIONS_COUNT)
+    ])
+    assert [response.status_code for response in withdrawals].count(
+        200
+    ) == DEPOSIT_OPERATIONS_COUNT
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert final_response.json().get('balance') == 0
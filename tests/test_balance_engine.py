@@ -0,0 +1,256 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncGenerator, Callable
+from uuid import UUID, uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.engine import balance_engine
+from app.engine.balance_engine import BalanceEngine
+from app.engine.partitioning import ConsistentHashRing
+from app.engine.wal import WriteAheadLog
+from app.models.wallet import Wallet
+from app.models.wallet_transaction import WalletTransaction
+from app.schemas.wallet import OperationType, WalletOperationRequest
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT
+
+IDEMPOTENCY_KEY = 'payout-42'
+
+
+@pytest_asyncio.fixture
+async def start_engine(
+    session_factory: async_sessionmaker[AsyncSession], tmp_path: Path
+) -> AsyncGenerator[Callable, None]:
+    """Запуск движков балансов над общим каталогом журнала."""
+    engines = []
+
+    async def start(
+        node_index: int = 0, node_count: int = 1
+    ) -> BalanceEngine:
+        engine = BalanceEngine(
+            session_factory,
+            WriteAheadLog(tmp_path, f'wallets-{node_index}', 0.001),
+            ConsistentHashRing(node_count),
+            node_index,
+            persist_interval=3600
+        )
+        await engine.start()
+        engines.append(engine)
+        return engine
+
+    yield start
+    for engine in engines:
+        crash(engine)
+
+
+def crash(engine: BalanceEngine) -> None:
+    """Остановка движка без сохранения в базу, как при сбое процесса."""
+    engine._persister.cancel()
+    if not engine.wal._file.closed:
+        engine.wal._file.close()
+
+
+async def wallet_state(
+    session_factory: async_sessionmaker[AsyncSession], wallet_id: UUID
+) -> tuple[int, int]:
+    """Баланс кошелька и число записей журнала операций в базе."""
+    async with session_factory() as session:
+        balance = await session.scalar(
+            select(Wallet.balance).where(Wallet.id == wallet_id)
+        )
+        transactions = await session.scalar(
+            select(func.count())
+            .select_from(WalletTransaction)
+            .where(WalletTransaction.wallet_id == wallet_id)
+        )
+        return balance, transactions
+
+
+def deposit(amount: int = OPERATION_AMOUNT) -> WalletOperationRequest:
+    return WalletOperationRequest(
+        operation_type=OperationType.DEPOSIT, amount=amount
+    )
+
+
+@pytest.mark.asyncio
+async def test_engine_recovers_unpersisted_operations_after_crash(
+    start_engine: Callable,
+    session_factory: async_sessionmaker[AsyncSession],
+    wallet: dict
+):
+    """Тест для восстановления операций из журнала после сбоя."""
+    wallet_id = UUID(wallet.get('id'))
+    engine = await start_engine()
+    await asyncio.gather(*[
+        engine.apply(wallet_id, deposit())
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    await engine.apply(wallet_id, deposit(), IDEMPOTENCY_KEY)
+    expected_balance = (
+        wallet.get('balance')
+        + OPERATION_AMOUNT * (CONCURRENT_OPERATIONS_COUNT + 1)
+    )
+    assert (await engine.get(wallet_id)).balance == expected_balance
+    assert await wallet_state(session_factory, wallet_id) == (
+        wallet.get('balance'), 0
+    )
+
+    crash(engine)
+    recovered = await start_engine()
+    assert await wallet_state(session_factory, wallet_id) == (
+        expected_balance, CONCURRENT_OPERATIONS_COUNT + 1
+    )
+    replayed = await recovered.apply(wallet_id, deposit(), IDEMPOTENCY_KEY)
+    assert replayed.balance == expected_balance
+    assert list(recovered.wal.read()) == []
+
+
+@pytest.mark.asyncio
+async def test_engine_recovery_skips_persisted_records(
+    start_engine: Callable,
+    session_factory: async_sessionmaker[AsyncSession],
+    wallet: dict
+):
+    """Тест для восстановления без повторного сохранения операций."""
+    wallet_id = UUID(wallet.get('id'))
+    engine = await start_engine()
+    await engine.apply(wallet_id, deposit())
+    await engine.persist()
+    await engine.apply(wallet_id, deposit())
+    segments = engine.wal.segments()
+    segments[-1].write_text(
+        segments[-1].read_text() + '[999, "torn'
+    )
+
+    crash(engine)
+    await start_engine()
+    assert await wallet_state(session_factory, wallet_id) == (
+        wallet.get('balance') + OPERATION_AMOUNT * 2, 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_engine_keeps_operations_applied_during_persist(
+    start_engine: Callable,
+    session_factory: async_sessionmaker[AsyncSession],
+    wallet: dict
+):
+    """Тест для операции, подтвержденной во время сохранения в базу."""
+    wallet_id = UUID(wallet.get('id'))
+    engine = await start_engine()
+    await engine.apply(wallet_id, deposit())
+    # Журнал занят записью предыдущей группы: persist ждет rotate,
+    # а новая операция попадает в закрываемый сегмент
+    await engine.wal._lock.acquire()
+    persist = asyncio.create_task(engine.persist())
+    await asyncio.sleep(0)
+    applied = asyncio.create_task(engine.apply(wallet_id, deposit()))
+    await asyncio.sleep(0)
+    engine.wal._lock.release()
+    await asyncio.gather(persist, applied)
+
+    crash(engine)
+    await start_engine()
+    assert await wallet_state(session_factory, wallet_id) == (
+        wallet.get('balance') + OPERATION_AMOUNT * 2, 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_engine_rolls_back_operation_on_fsync_failure(
+    start_engine: Callable,
+    session_factory: async_sessionmaker[AsyncSession],
+    wallet: dict,
+    monkeypatch
+):
+    """Тест для отката операции в памяти, если fsync не удался."""
+    wallet_id = UUID(wallet.get('id'))
+    engine = await start_engine()
+    await engine.apply(wallet_id, deposit())
+    write = engine.wal._write
+
+    def fail_write(data: bytes) -> None:
+        raise OSError('fsync failed')
+
+    monkeypatch.setattr(engine.wal, '_write', fail_write)
+    with pytest.raises(HTTPException) as error:
+        await engine.apply(wallet_id, deposit(), IDEMPOTENCY_KEY)
+    assert error.value.status_code == 500
+    expected_balance = wallet.get('balance') + OPERATION_AMOUNT
+    assert (await engine.get(wallet_id)).balance == expected_balance
+
+    monkeypatch.setattr(engine.wal, '_write', write)
+    await engine.persist()
+    assert await wallet_state(session_factory, wallet_id) == (
+        expected_balance, 1
+    )
+    retried = await engine.apply(wallet_id, deposit(), IDEMPOTENCY_KEY)
+    assert retried.balance == expected_balance + OPERATION_AMOUNT
+
+
+@pytest.mark.asyncio
+async def test_engine_rejects_wallet_of_another_node(
+    start_engine: Callable
+):
+    """Тест для отказа в операции над кошельком чужого узла."""
+    engine = await start_engine(node_index=0, node_count=2)
+    wallet_id = next(
+        wallet_id for wallet_id in iter(uuid4, None)
+        if not engine.owns(wallet_id)
+    )
+    with pytest.raises(HTTPException) as error:
+        await engine.apply(wallet_id, deposit())
+    assert error.value.status_code == 421
+    assert error.value.headers == {'X-Wallet-Owner-Node': '1'}
+
+
+def test_consistent_hash_ring_moves_few_wallets():
+    """Тест для переезда малой доли кошельков при добавлении узла."""
+    wallet_ids = [uuid4() for _ in range(2000)]
+    ring, grown_ring = ConsistentHashRing(4), ConsistentHashRing(5)
+    moved = sum(
+        ring.owner(wallet_id) != grown_ring.owner(wallet_id)
+        for wallet_id in wallet_ids
+    )
+    assert moved < len(wallet_ids) * 0.35
+
+
+@pytest.mark.asyncio
+async def test_wallet_endpoints_in_memory_engine_mode(
+    client: AsyncClient,
+    wallet: dict,
+    start_engine: Callable,
+    monkeypatch
+):
+    """Тест для эндпоинтов кошелька в режиме движка в памяти."""
+    monkeypatch.setattr(settings, 'wallet_engine_mode', 'memory')
+    monkeypatch.setattr(balance_engine, '_engine', await start_engine())
+    wallet_id = wallet.get('id')
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.WITHDRAW,
+            'amount': wallet.get('balance') + 1
+        }
+    )
+    assert response.status_code == 400
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    assert response.status_code == 200
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == (
+        wallet.get('balance') + OPERATION_AMOUNT
+    )
+    response = await client.get(f'/api/v1/wallets/{uuid4()}')
+    assert response.status_code == 404
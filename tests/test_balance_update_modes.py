@@ -0,0 +1,101 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+from tests.conftest import (DEPOSIT_OPERATIONS_COUNT, OPERATION_AMOUNT,
+                            WITHDRAW_OPERATIONS_COUNT)
+
+
+@pytest.mark.asyncio
+async def test_mixed_operations_in_each_mode(
+    client: AsyncClient, wallet: dict, balance_update_mode: str
+):
+    """Тест для параллельных операций в каждом режиме обновления."""
+    wallet_id = wallet.get('id')
+    operations = (
+        [OperationType.DEPOSIT] * DEPOSIT_OPERATIONS_COUNT
+        + [OperationType.WITHDRAW] * WITHDRAW_OPERATIONS_COUNT
+    )
+    responses = await asyncio.gather(*[
+        client.post(
+            f'/api/v1/wallets/{wallet_id}/operation',
+            json={'operation_type': operation, 'amount': OPERATION_AMOUNT}
+        )
+        for operation in operations
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    expected_balance = wallet.get('balance') + OPERATION_AMOUNT * (
+        DEPOSIT_OPERATIONS_COUNT - WITHDRAW_OPERATIONS_COUNT
+    )
+    assert final_response.json().get('balance') == expected_balance
+
+
+@pytest.mark.asyncio
+async def test_withdrawals_never_overdraw(
+    client: AsyncClient, balance_update_mode: str
+):
+    """Тест для параллельных снятий, превышающих баланс."""
+    create_response = await client.post(
+        '/api/v1/wallets', json={'balance': OPERATION_AMOUNT * 3}
+    )
+    wallet_id = create_response.json().get('id')
+    responses = await asyncio.gather(*[
+        client.post(
+            f'/api/v1/wallets/{wallet_id}/operation',
+            json={
+                'operation_type': OperationType.WITHDRAW,
+                'amount': OPERATION_AMOUNT
+            }
+        )
+        for _ in range(5)
+    ])
+    status_codes = sorted(response.status_code for response in responses)
+    assert status_codes == [200, 200, 200, 400, 400]
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert final_response.json().get('balance') == 0
+
+
+@pytest.mark.asyncio
+async def test_operation_wallet_not_found(
+    client: AsyncClient, balance_update_mode: str
+):
+    """Тест для операции с несуществующим кошельком."""
+    response = await client.post(
+        f'/api/v1/wallets/{uuid4()}/operation',
+        json={
+            'operation_type': OperationType.WITHDRAW,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    assert response.status_code == 404
+    assert response.json().get('detail') == 'Wallet not found'
+
+
+@pytest.mark.asyncio
+async def test_compare_and_set_rejects_stale_version(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession]
+):
+    """Тест для отказа compare-and-swap после изменения кошелька."""
+    wallet_id = UUID(wallet.get('id'))
+    async with session_factory() as session:
+        stale = await WalletRepository(session).get_versioned(wallet_id)
+    await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': OperationType.DEPOSIT, 'amount': 1}
+    )
+    async with session_factory() as session:
+        repository = WalletRepository(session)
+        assert await repository.compare_and_set_balance(
+            wallet_id, stale.version, 0, OperationType.WITHDRAW, 1
+        ) is None
+        current = await repository.get_versioned(wallet_id)
+        assert current.version == stale.version + 1
+        assert current.balance == stale.balance + 1
@@ -0,0 +1,67 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app import main
+from app.config import settings
+from app.database import engine
+from app.pool import InstrumentedAsyncPool
+
+
+def test_engine_uses_pool_settings():
+    """Тест для настроек пула приложения."""
+    assert isinstance(engine.pool, InstrumentedAsyncPool)
+    assert engine.pool.size() == settings.database_pool_size
+    assert engine.pool.timeout() == settings.database_pool_timeout
+    assert engine.echo is settings.database_echo
+
+
+def instrumented_engine(db_engine: AsyncEngine, **options) -> AsyncEngine:
+    return create_async_engine(
+        db_engine.url, poolclass=InstrumentedAsyncPool, **options
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts_and_timeouts(
+    db_engine: AsyncEngine
+):
+    """Тест для метрик выдачи соединений и таймаутов пула."""
+    pool_engine = instrumented_engine(
+        db_engine, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+    metrics = pool_engine.pool.metrics
+    try:
+        async with pool_engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+            stats = pool_engine.pool.snapshot()
+            assert stats['checked_out'] == 1
+            with pytest.raises(exc.TimeoutError):
+                async with pool_engine.connect():
+                    pass
+    finally:
+        await pool_engine.dispose()
+    assert pool_engine.pool.metrics is metrics
+    assert metrics.checkouts == 1
+    assert metrics.timeouts == 1
+    assert metrics.wait_seconds_max >= 0
+
+
+@pytest.mark.asyncio
+async def test_stats_report_replica_pools_separately(
+    client: AsyncClient, db_engine: AsyncEngine, monkeypatch
+):
+    """Тест для раздельных метрик пулов основной базы и реплик."""
+    replica_engine = instrumented_engine(db_engine)
+    monkeypatch.setattr(main, 'replica_engines', [replica_engine])
+    primary_checkouts = engine.pool.metrics.checkouts
+    try:
+        for _ in range(2):
+            async with replica_engine.connect() as connection:
+                await connection.execute(text('SELECT 1'))
+        pools = (await client.get('/stats')).json()['database_pool']
+    finally:
+        await replica_engine.dispose()
+    assert pools['primary']['checkouts'] == primary_checkouts
+    assert [replica['checkouts'] for replica in pools['replicas']] == [2]
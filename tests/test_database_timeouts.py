@@ -0,0 +1,91 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+from app.services import timeouts
+from app.services.timeouts import RETRY_AFTER_SECONDS, TimeoutStats
+from tests.conftest import OPERATION_AMOUNT
+
+TIMEOUT_MS = 100
+
+
+@pytest.fixture
+def timeout_stats(balance_update_mode: str, monkeypatch) -> TimeoutStats:
+    """Чистые счетчики таймаутов в каждом режиме обновления баланса."""
+    stats = TimeoutStats()
+    monkeypatch.setattr(timeouts, 'timeout_stats', stats)
+    return stats
+
+
+@asynccontextmanager
+async def locked(
+    session_factory: async_sessionmaker[AsyncSession], wallet_id: str
+) -> AsyncIterator[None]:
+    """Строка кошелька, заблокированная другой транзакцией."""
+    async with session_factory() as session:
+        await WalletRepository(session).get_by_uuid_with_lock(UUID(wallet_id))
+        try:
+            yield
+        finally:
+            await session.rollback()
+
+
+async def deposit(client: AsyncClient, wallet_id: str):
+    return await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    timeout_stats: TimeoutStats,
+    monkeypatch
+):
+    """Тест для ответа 503 при ожидании блокировки дольше lock_timeout."""
+    monkeypatch.setattr(
+        settings, 'database_operation_lock_timeout_ms', TIMEOUT_MS
+    )
+    async with locked(session_factory, wallet['id']):
+        response = await deposit(client, wallet['id'])
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(RETRY_AFTER_SECONDS)
+    assert timeout_stats.snapshot() == {
+        'lock_timeout': 1, 'statement_timeout': 0
+    }
+    assert (await deposit(client, wallet['id'])).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    timeout_stats: TimeoutStats,
+    monkeypatch
+):
+    """Тест для ответа 504 при запросе дольше statement_timeout."""
+    monkeypatch.setattr(settings, 'database_operation_lock_timeout_ms', 0)
+    monkeypatch.setattr(
+        settings, 'database_operation_statement_timeout_ms', TIMEOUT_MS
+    )
+    async with locked(session_factory, wallet['id']):
+        response = await deposit(client, wallet['id'])
+    assert response.status_code == 504
+    assert response.headers['Retry-After'] == str(RETRY_AFTER_SECONDS)
+    assert timeout_stats.snapshot() == {
+        'lock_timeout': 0, 'statement_timeout': 1
+    }
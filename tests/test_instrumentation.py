@@ -0,0 +1,99 @@
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.instrumentation import instrument_engine
+from app.metrics import Histogram
+from app.schemas.wallet import OperationType
+from tests.conftest import OPERATION_AMOUNT
+
+OPERATION_ROUTE = '/api/v1/wallets/{wallet_uuid}/operation'
+
+
+@pytest.fixture
+def instrumented_engine(db_engine: AsyncEngine) -> AsyncEngine:
+    """Замеры SQL-выражений на движке тестовой базы."""
+    instrument_engine(db_engine)
+    return db_engine
+
+
+def server_timing(response) -> dict[str, str]:
+    return dict(
+        re.match(r'\s*(\w+);(.*)', entry).groups()
+        for entry in response.headers['server-timing'].split(',')
+    )
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(
+    client: AsyncClient,
+    wallet: dict,
+    instrumented_engine: AsyncEngine,
+    monkeypatch
+):
+    """Тест для заголовка Server-Timing с фазами запроса."""
+    monkeypatch.setattr(settings, 'balance_update_mode', 'pessimistic')
+    response = await client.post(
+        f'/api/v1/wallets/{wallet["id"]}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    timings = server_timing(response)
+    assert set(timings) == {'pool', 'db', 'lock', 'serialize', 'total'}
+    assert 'desc="4 statements"' in timings['db']
+    lock_ms = float(re.search(r'dur=([\d.]+)', timings['lock']).group(1))
+    assert lock_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(
+    client: AsyncClient, wallet: dict, instrumented_engine: AsyncEngine
+):
+    """Тест для гистограмм запросов на /metrics."""
+    await client.post(
+        f'/api/v1/wallets/{wallet["id"]}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    response = await client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        'wallet_http_request_phase_seconds_count'
+        f'{{route="{OPERATION_ROUTE}",phase="db"}}'
+    ) in response.text
+    assert (
+        'wallet_http_request_duration_seconds_count'
+        f'{{method="POST",route="{OPERATION_ROUTE}",status="200"}}'
+    ) in response.text
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_can_be_disabled(
+    client: AsyncClient, monkeypatch
+):
+    """Тест для отключения замеров запросов."""
+    monkeypatch.setattr(settings, 'request_metrics_enabled', False)
+    response = await client.get('/health')
+    assert 'server-timing' not in response.headers
+
+
+def test_histogram_render():
+    """Тест для накопительных корзин гистограммы."""
+    histogram = Histogram('test_seconds', 'Тест.', ('route',), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, '/')
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{route="/",le="0.1"} 2',
+        'test_seconds_bucket{route="/",le="1.0"} 3',
+        'test_seconds_bucket{route="/",le="+Inf"} 4',
+        'test_seconds_sum{route="/"} 2.65',
+        'test_seconds_count{route="/"} 4',
+    ]
@@ -1,7 +1,7 @@
 import pytest
 from httpx import AsyncClient
 
-from app.main import health, root
+from app.main import health, root, stats
 
 
 @pytest.mark.asyncio
@@ -20,3 +20,12 @@ async def test_health(client: AsyncClient):
     data = response.json()
     assert response.status_code == 200
     assert data == await health()
+
+
+@pytest.mark.asyncio
+async def test_stats(client: AsyncClient):
+    """Тест для страницы внутренних счетчиков сервиса."""
+    response = await client.get('/stats')
+    data = response.json()
+    assert response.status_code == 200
+    assert data == await stats()
@@ -0,0 +1,172 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker)
+
+from app.config import settings
+from app.main import app
+from app.schemas.wallet import OperationType, WalletOperationRequest
+from app.services import operation_coalescer, retry
+from app.services.operation_coalescer import OperationCoalescer
+from app.services.retry import RetryBudget, RetryStats
+from tests.conftest import (CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT,
+                            WITHDRAW_OPERATIONS_COUNT)
+
+COALESCING_WINDOW = 0.05
+
+
+@pytest.fixture
+def coalescer(
+    session_factory: async_sessionmaker[AsyncSession], monkeypatch
+) -> OperationCoalescer:
+    """Включение группировки операций на тестовой базе."""
+    coalescer = OperationCoalescer(
+        session_factory, window=COALESCING_WINDOW, max_batch_size=100
+    )
+    monkeypatch.setattr(settings, 'operation_coalescing_enabled', True)
+    monkeypatch.setattr(operation_coalescer, '_coalescer', coalescer)
+    return coalescer
+
+
+def operation(client: AsyncClient, wallet_id: str, operation_type, amount):
+    return client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': operation_type, 'amount': amount}
+    )
+
+
+@pytest.mark.asyncio
+async def test_coalesced_deposits_get_own_balances(
+    client: AsyncClient, wallet: dict, coalescer: OperationCoalescer
+):
+    """Тест для группировки пополнений: у каждого свой баланс."""
+    wallet_id = wallet.get('id')
+    initial_balance = wallet.get('balance')
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.DEPOSIT, OPERATION_AMOUNT)
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    balances = sorted(response.json().get('balance') for response in responses)
+    assert balances == [
+        initial_balance + OPERATION_AMOUNT * step
+        for step in range(1, CONCURRENT_OPERATIONS_COUNT + 1)
+    ]
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert final_response.json().get('balance') == balances[-1]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_withdrawals_reject_overdraft_individually(
+    client: AsyncClient, coalescer: OperationCoalescer
+):
+    """Тест для группировки снятий: лишние снятия получают 400."""
+    create_response = await client.post(
+        '/api/v1/wallets', json={'balance': OPERATION_AMOUNT * 3}
+    )
+    wallet_id = create_response.json().get('id')
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.WITHDRAW, OPERATION_AMOUNT)
+        for _ in range(WITHDRAW_OPERATIONS_COUNT)
+    ])
+    status_codes = [response.status_code for response in responses]
+    assert status_codes.count(200) == 3
+    assert status_codes.count(400) == WITHDRAW_OPERATIONS_COUNT - 3
+    final_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert final_response.json().get('balance') == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesced_operation_wallet_not_found(
+    client: AsyncClient, coalescer: OperationCoalescer
+):
+    """Тест для группировки операций над несуществующим кошельком."""
+    response = await operation(
+        client, str(uuid4()), OperationType.DEPOSIT, OPERATION_AMOUNT
+    )
+    assert response.status_code == 404
+    assert response.json().get('detail') == 'Wallet not found'
+
+
+@pytest.mark.asyncio
+async def test_coalescer_applies_batch_in_arrival_order(
+    wallet: dict, coalescer: OperationCoalescer
+):
+    """Тест для порядка применения операций внутри пачки."""
+    wallet_id = UUID(wallet.get('id'))
+    initial_balance = wallet.get('balance')
+    results = await asyncio.gather(
+        coalescer.submit(wallet_id, WalletOperationRequest(
+            operation_type=OperationType.WITHDRAW, amount=initial_balance
+        )),
+        coalescer.submit(wallet_id, WalletOperationRequest(
+            operation_type=OperationType.DEPOSIT, amount=OPERATION_AMOUNT
+        )),
+        coalescer.submit(wallet_id, WalletOperationRequest(
+            operation_type=OperationType.WITHDRAW, amount=OPERATION_AMOUNT
+        ))
+    )
+    assert [result.balance for result in results] == [0, OPERATION_AMOUNT, 0]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_applies_pending_operations(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    monkeypatch
+):
+    """Тест для применения накопленных операций при остановке."""
+    monkeypatch.setattr(settings, 'operation_coalescing_enabled', True)
+    monkeypatch.setattr(operation_coalescer, '_coalescer', OperationCoalescer(
+        session_factory, window=60, max_batch_size=100
+    ))
+    async with app.router.lifespan_context(app):
+        pending = asyncio.create_task(operation(
+            client, wallet['id'], OperationType.DEPOSIT, OPERATION_AMOUNT
+        ))
+        await asyncio.sleep(0.1)
+        assert not pending.done()
+    response = await pending
+    assert response.json().get('balance') == (
+        wallet['balance'] + OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_coalesced_batches_retried_after_conflicts(
+    wallet: dict, db_engine: AsyncEngine, monkeypatch
+):
+    """Тест для повтора пачек, отмененных из-за конфликта процессов."""
+    stats = RetryStats()
+    monkeypatch.setattr(retry, 'retry_stats', stats)
+    monkeypatch.setattr(retry, 'retry_budget', RetryBudget(1, 1000))
+    monkeypatch.setattr(settings, 'transaction_retry_max_attempts', 50)
+    session_factory = async_sessionmaker(
+        bind=db_engine.execution_options(isolation_level='REPEATABLE READ'),
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    # Группировщики разных процессов сервиса над одним кошельком
+    workers = [
+        OperationCoalescer(session_factory, window=0.001, max_batch_size=3)
+        for _ in range(3)
+    ]
+    wallet_id = UUID(wallet.get('id'))
+    results = await asyncio.gather(*(
+        worker.submit(wallet_id, WalletOperationRequest(
+            operation_type=OperationType.DEPOSIT, amount=OPERATION_AMOUNT
+        ))
+        for worker in workers
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ))
+    assert max(result.balance for result in results) == (
+        wallet.get('balance')
+        + OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT * len(workers)
+    )
+    assert stats.snapshot()['retries_by_error'].get(
+        'serialization_failure', 0
+    ) > 0
@@ -0,0 +1,139 @@
+from typing import AsyncGenerator
+from uuid import UUID
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from testcontainers.postgres import PostgresContainer
+
+from app import database
+from app.cache import wallet_cache
+from app.cache.backends import InMemoryCacheBackend
+from app.cache.wallet_cache import WalletCache
+from app.config import settings
+from app.database import Base
+from app.models.wallet import Wallet
+from app.read_routing import LAST_WRITE_COOKIE
+from app.schemas.wallet import OperationType
+from tests.conftest import OPERATION_AMOUNT
+
+REPLICA_BALANCE = 1
+
+
+@pytest.fixture
+def replica_container():
+    """Создание контейнера PostgreSQL для реплики."""
+    with PostgresContainer('postgres:13') as postgres:
+        yield postgres
+
+
+@pytest_asyncio.fixture
+async def replica_session_factory(
+    replica_container: PostgresContainer, monkeypatch
+) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """Подключение реплики к маршрутизации чтений."""
+    engine = create_async_engine(
+        replica_container.get_connection_url().replace(
+            'postgresql+psycopg2://', 'postgresql+asyncpg://'
+        )
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    monkeypatch.setattr(database, 'ReplicaSessionLocals', [session_factory])
+    try:
+        yield session_factory
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def lagging_wallet(
+    wallet: dict,
+    replica_session_factory: async_sessionmaker[AsyncSession]
+) -> dict:
+    """Кошелек, чей баланс на реплике отстает от основной базы."""
+    async with replica_session_factory() as session:
+        session.add(Wallet(id=UUID(wallet['id']), balance=REPLICA_BALANCE))
+        await session.commit()
+    return wallet
+
+
+async def get_balance(client: AsyncClient, wallet_id: str) -> int:
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    return response.json().get('balance')
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_except_after_own_writes(
+    client: AsyncClient, lagging_wallet: dict, monkeypatch
+):
+    """Тест для чтения с реплики и с основной базы после своей записи."""
+    wallet_id = lagging_wallet['id']
+    client.cookies.clear()
+    assert await get_balance(client, wallet_id) == REPLICA_BALANCE
+
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    assert LAST_WRITE_COOKIE in response.cookies
+    assert await get_balance(client, wallet_id) == (
+        lagging_wallet['balance'] + OPERATION_AMOUNT
+    )
+
+    monkeypatch.setattr(settings, 'read_your_writes_window_seconds', 0)
+    assert await get_balance(client, wallet_id) == REPLICA_BALANCE
+
+
+@pytest.mark.asyncio
+async def test_failed_write_keeps_reads_on_replica(
+    client: AsyncClient, lagging_wallet: dict
+):
+    """Тест для чтения с реплики после отклоненной записи."""
+    wallet_id = lagging_wallet['id']
+    client.cookies.clear()
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.WITHDRAW,
+            'amount': lagging_wallet['balance'] + 1
+        }
+    )
+    assert response.status_code == 400
+    assert LAST_WRITE_COOKIE not in response.cookies
+    assert await get_balance(client, wallet_id) == REPLICA_BALANCE
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_do_not_fill_cache(
+    client: AsyncClient, lagging_wallet: dict, monkeypatch
+):
+    """Тест для чтения своей записи при включенном кеше и репликах."""
+    monkeypatch.setattr(settings, 'wallet_cache_enabled', True)
+    monkeypatch.setattr(wallet_cache, '_wallet_cache', WalletCache(
+        InMemoryCacheBackend(ttl=60, max_entries=100)
+    ))
+    wallet_id = lagging_wallet['id']
+    await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    writer_cookies = dict(client.cookies)
+    client.cookies.clear()
+    assert await get_balance(client, wallet_id) == REPLICA_BALANCE
+
+    client.cookies.update(writer_cookies)
+    assert await get_balance(client, wallet_id) == (
+        lagging_wallet['balance'] + OPERATION_AMOUNT
+    )
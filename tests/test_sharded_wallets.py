@@ -0,0 +1,304 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import asyncpg
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.wallet_balance_shard import WalletBalanceShard
+from app.repositories.wallet_repository import WalletRepository
+from app.schemas.wallet import OperationType
+from app.services import operation_coalescer
+from app.services.operation_coalescer import OperationCoalescer
+from tests.conftest import (CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT,
+                            WITHDRAW_OPERATIONS_COUNT)
+
+BALANCE_SHARDS = 4
+LOCK_TIMEOUT_MS = 500
+
+
+@pytest_asyncio.fixture
+async def sharded_wallet(client: AsyncClient) -> dict:
+    """Создание шардированного кошелька с нулевым балансом."""
+    response = await client.post(
+        '/api/v1/wallets',
+        json={'balance': 0, 'balance_shards': BALANCE_SHARDS}
+    )
+    return response.json()
+
+
+def operation(client: AsyncClient, wallet_id: str, operation_type):
+    return client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': operation_type, 'amount': OPERATION_AMOUNT}
+    )
+
+
+async def shards_total(
+    session_factory: async_sessionmaker[AsyncSession], wallet_id: str
+) -> int:
+    async with session_factory() as session:
+        return await session.scalar(
+            select(func.sum(WalletBalanceShard.balance))
+            .where(WalletBalanceShard.wallet_id == UUID(wallet_id))
+        )
+
+
+@pytest.mark.asyncio
+async def test_deposits_land_on_shards(
+    client: AsyncClient,
+    sharded_wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    balance_update_mode: str
+):
+    """Тест для зачисления на шарды и агрегированного баланса."""
+    wallet_id = sharded_wallet.get('id')
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.DEPOSIT)
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    expected_balance = OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == expected_balance
+    if balance_update_mode == 'atomic':
+        assert await shards_total(
+            session_factory, wallet_id
+        ) == expected_balance
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('coalesced', [False, True])
+async def test_deposits_do_not_lock_wallet(
+    client: AsyncClient,
+    sharded_wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    monkeypatch,
+    coalesced: bool
+):
+    """
+    Тест для пополнения шардированного кошелька, строку которого
+    обновляет другая транзакция, в пессимистичном режиме и с
+    группировкой операций.
+    """
+    monkeypatch.setattr(settings, 'balance_update_mode', 'pessimistic')
+    if coalesced:
+        monkeypatch.setattr(settings, 'operation_coalescing_enabled', True)
+        monkeypatch.setattr(operation_coalescer, '_coalescer', (
+            OperationCoalescer(
+                session_factory, window=0.01, max_batch_size=100
+            )
+        ))
+    monkeypatch.setattr(
+        settings, 'database_operation_lock_timeout_ms', LOCK_TIMEOUT_MS
+    )
+    wallet_id = sharded_wallet.get('id')
+    async with session_factory() as session:
+        await session.execute(
+            text('SELECT 1 FROM wallets WHERE id = :id FOR NO KEY UPDATE'),
+            {'id': wallet_id}
+        )
+        responses = await asyncio.gather(*[
+            operation(client, wallet_id, OperationType.DEPOSIT)
+            for _ in range(CONCURRENT_OPERATIONS_COUNT)
+        ])
+        await session.rollback()
+    assert all(response.status_code == 200 for response in responses)
+    expected_balance = OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+    assert await shards_total(
+        session_factory, wallet_id
+    ) == expected_balance
+
+
+async def wait_for_lock_waiter(
+    session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    """Дождаться запроса, ждущего блокировку в тестовой базе."""
+    while True:
+        async with session_factory() as session:
+            if await session.scalar(text(
+                'SELECT count(*) FROM pg_stat_activity '
+                'WHERE datname = current_database() '
+                "AND wait_event_type = 'Lock'"
+            )):
+                return
+        await asyncio.sleep(0.01)
+
+
+async def deposit_during_merge(
+    client: AsyncClient,
+    session_factory: async_sessionmaker[AsyncSession],
+    wallet_id: str
+) -> None:
+    """
+    Пополнение шарда, которое ждет слияния шардов списанием всего
+    баланса: в ответе и журнале должен быть баланс уже после списания.
+    """
+    async with session_factory() as session:
+        await session.execute(
+            text(
+                'UPDATE wallet_balance_shards SET balance = :balance '
+                'WHERE wallet_id = :id'
+            ),
+            {'balance': OPERATION_AMOUNT, 'id': wallet_id}
+        )
+        await session.commit()
+    async with session_factory() as session:
+        repository = WalletRepository(session)
+        wallet = await repository.merge_shards(
+            await repository.get_by_uuid_with_lock(UUID(wallet_id))
+        )
+        await repository.update_balance(wallet, 0)
+        deposit = asyncio.create_task(
+            operation(client, wallet_id, OperationType.DEPOSIT)
+        )
+        await wait_for_lock_waiter(session_factory)
+        await session.commit()
+    response = await deposit
+    assert response.status_code == 200
+    assert response.json().get('balance') == OPERATION_AMOUNT
+    async with session_factory() as session:
+        assert await session.scalar(text(
+            'SELECT balance_after FROM wallet_transactions '
+            'WHERE wallet_id = :id'
+        ), {'id': wallet_id}) == OPERATION_AMOUNT
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == OPERATION_AMOUNT
+
+
+@pytest.mark.asyncio
+async def test_deposit_during_merge(
+    client: AsyncClient,
+    sharded_wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession]
+):
+    """Тест для пополнения шарда во время слияния шардов."""
+    await deposit_during_merge(
+        client, session_factory, sharded_wallet.get('id')
+    )
+
+
+@pytest.mark.asyncio
+async def test_deposit_during_merge_asyncpg(
+    client: AsyncClient,
+    sharded_wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    asyncpg_backend: asyncpg.Pool
+):
+    """Тест для пополнения шарда во время слияния шардов через asyncpg."""
+    await deposit_during_merge(
+        client, session_factory, sharded_wallet.get('id')
+    )
+
+
+@pytest.mark.asyncio
+async def test_withdrawals_consume_shards_without_overdraw(
+    client: AsyncClient, sharded_wallet: dict, balance_update_mode: str
+):
+    """Тест для параллельных снятий с шардированного кошелька."""
+    wallet_id = sharded_wallet.get('id')
+    deposits = WITHDRAW_OPERATIONS_COUNT // 2
+    await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.DEPOSIT)
+        for _ in range(deposits)
+    ])
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.WITHDRAW)
+        for _ in range(WITHDRAW_OPERATIONS_COUNT)
+    ])
+    status_codes = [response.status_code for response in responses]
+    assert status_codes.count(200) == deposits
+    assert status_codes.count(400) == WITHDRAW_OPERATIONS_COUNT - deposits
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == 0
+
+
+@pytest.mark.asyncio
+async def test_shard_existing_wallet(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    balance_update_mode: str
+):
+    """Тест для перевода существующего кошелька на шарды баланса."""
+    wallet_id = wallet.get('id')
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}:shard',
+        json={'balance_shards': BALANCE_SHARDS}
+    )
+    assert response.status_code == 200
+    assert response.json() == {**wallet, 'balance_shards': BALANCE_SHARDS}
+
+    responses = await asyncio.gather(*[
+        operation(client, wallet_id, OperationType.DEPOSIT)
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    deposited = OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+    assert await shards_total(session_factory, wallet_id) == deposited
+
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}:shard',
+        json={'balance_shards': BALANCE_SHARDS * 2}
+    )
+    assert response.json() == {
+        'id': wallet_id,
+        'balance': wallet.get('balance') + deposited,
+        'balance_shards': BALANCE_SHARDS * 2
+    }
+    assert await shards_total(session_factory, wallet_id) == 0
+    async with session_factory() as session:
+        assert await session.scalar(
+            select(func.count())
+            .where(WalletBalanceShard.wallet_id == UUID(wallet_id))
+        ) == BALANCE_SHARDS * 2
+
+    response = await client.post(
+        f'/api/v1/wallets/{wallet_id}:shard',
+        json={'balance_shards': BALANCE_SHARDS}
+    )
+    assert response.status_code == 400
+    response = await client.post(
+        f'/api/v1/wallets/{uuid4()}:shard',
+        json={'balance_shards': BALANCE_SHARDS}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_shard_balances(
+    client: AsyncClient, sharded_wallet: dict
+):
+    """Тест для пакетного списания средств, лежащих на шардах."""
+    wallet_id = sharded_wallet.get('id')
+    await operation(client, wallet_id, OperationType.DEPOSIT)
+    response = await client.post(
+        '/api/v1/wallets/operations:batch',
+        json={'operations': [{
+            'wallet_id': wallet_id,
+            'operation_type': OperationType.WITHDRAW,
+            'amount': OPERATION_AMOUNT
+        }]}
+    )
+    assert response.json().get('committed') is True
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == 0
+
+
+@pytest.mark.asyncio
+async def test_balance_shards_validation(client: AsyncClient):
+    """Тест для ограничений на число шардов баланса."""
+    response = await client.post(
+        '/api/v1/wallets',
+        json={'balance_shards': settings.wallet_max_balance_shards + 1}
+    )
+    assert response.status_code == 422
+    response = await client.post(
+        '/api/v1/wallets:bulk',
+        json={'wallets': [{'balance_shards': BALANCE_SHARDS}]}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,118 @@
+import asyncio
+from typing import AsyncGenerator
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker)
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.models.wallet_transaction import WalletTransaction
+from app.schemas.wallet import OperationType
+from app.services import retry
+from app.services.retry import (RetryBudget, RetryStats,
+                                TransientTransactionError, retry_transaction)
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT
+
+
+@pytest.fixture
+def retry_stats(monkeypatch) -> RetryStats:
+    """Чистые счетчики и бюджет повторов."""
+    stats = RetryStats()
+    monkeypatch.setattr(retry, 'retry_stats', stats)
+    monkeypatch.setattr(retry, 'retry_budget', RetryBudget(1, 1000))
+    monkeypatch.setattr(settings, 'transaction_retry_max_attempts', 50)
+    return stats
+
+
+@pytest.fixture(params=['pessimistic', 'atomic'])
+def repeatable_read(
+    request, client: AsyncClient, db_engine: AsyncEngine, monkeypatch
+):
+    """Сессии API в REPEATABLE READ, где конфликт записи дает 40001."""
+    monkeypatch.setattr(settings, 'balance_update_mode', request.param)
+    session_factory = async_sessionmaker(
+        bind=db_engine.execution_options(isolation_level='REPEATABLE READ'),
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+@pytest.mark.asyncio
+async def test_serialization_failures_are_retried(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    repeatable_read,
+    retry_stats: RetryStats
+):
+    """Тест для повтора операций, отмененных из-за конфликта записи."""
+    wallet_id = wallet.get('id')
+    responses = await asyncio.gather(*[
+        client.post(
+            f'/api/v1/wallets/{wallet_id}/operation',
+            json={
+                'operation_type': OperationType.DEPOSIT,
+                'amount': OPERATION_AMOUNT
+            }
+        )
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == (
+        wallet.get('balance') + OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+    )
+    async with session_factory() as session:
+        assert await session.scalar(
+            select(func.count())
+            .select_from(WalletTransaction)
+            .where(WalletTransaction.wallet_id == UUID(wallet_id))
+        ) == CONCURRENT_OPERATIONS_COUNT
+    snapshot = retry_stats.snapshot()
+    assert snapshot['retries'] > 0
+    assert snapshot['retries_by_error'].keys() == {'serialization_failure'}
+    assert snapshot['exhausted'] == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_are_limited_by_attempts_and_budget(
+    retry_stats: RetryStats, monkeypatch
+):
+    """Тест для 503 после исчерпания попыток и бюджета повторов."""
+    calls = 0
+
+    @retry_transaction
+    async def conflicting() -> None:
+        nonlocal calls
+        calls += 1
+        raise TransientTransactionError('deadlock_detected')
+
+    monkeypatch.setattr(settings, 'transaction_retry_max_attempts', 3)
+    monkeypatch.setattr(settings, 'transaction_retry_base_delay_ms', 0)
+    with pytest.raises(HTTPException) as error:
+        await conflicting()
+    assert error.value.status_code == 503
+    assert calls == 3
+    monkeypatch.setattr(retry, 'retry_budget', RetryBudget(0, 0))
+    with pytest.raises(HTTPException):
+        await conflicting()
+    assert calls == 4
+    assert retry_stats.snapshot() == {
+        'transactions': 2,
+        'retries': 2,
+        'retries_by_error': {'deadlock_detected': 2},
+        'exhausted': 1,
+        'budget_exhausted': 1,
+    }
@@ -0,0 +1,139 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.schemas.wallet import BatchMode, BatchOperationStatus, OperationType
+from tests.conftest import (CONCURRENT_OPERATIONS_COUNT, CUSTOM_BALANCE,
+                            OPERATION_AMOUNT)
+
+BATCH_URL = '/api/v1/wallets/operations:batch'
+
+
+async def create_wallets(client: AsyncClient, count: int) -> list[dict]:
+    responses = await asyncio.gather(*[
+        client.post('/api/v1/wallets', json={'balance': CUSTOM_BALANCE})
+        for _ in range(count)
+    ])
+    return [response.json() for response in responses]
+
+
+def batch_operation(wallet_id, operation_type, amount=OPERATION_AMOUNT):
+    return {
+        'wallet_id': str(wallet_id),
+        'operation_type': operation_type,
+        'amount': amount,
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_applies_operations_in_order(client: AsyncClient):
+    """Тест для пакета операций над несколькими кошельками."""
+    first, second = await create_wallets(client, 2)
+    response = await client.post(BATCH_URL, json={'operations': [
+        batch_operation(first['id'], OperationType.DEPOSIT),
+        batch_operation(second['id'], OperationType.WITHDRAW),
+        batch_operation(first['id'], OperationType.WITHDRAW),
+    ]})
+    data = response.json()
+    assert response.status_code == 200
+    assert data['committed'] is True
+    assert [result['balance'] for result in data['results']] == [
+        CUSTOM_BALANCE + OPERATION_AMOUNT,
+        CUSTOM_BALANCE - OPERATION_AMOUNT,
+        CUSTOM_BALANCE,
+    ]
+    second_response = await client.get(f'/api/v1/wallets/{second["id"]}')
+    assert second_response.json()['balance'] == (
+        CUSTOM_BALANCE - OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_atomic_batch_rolls_back_on_failure(client: AsyncClient):
+    """Тест для отмены всего пакета в режиме ATOMIC."""
+    (wallet,) = await create_wallets(client, 1)
+    response = await client.post(BATCH_URL, json={
+        'mode': BatchMode.ATOMIC,
+        'operations': [
+            batch_operation(wallet['id'], OperationType.DEPOSIT),
+            batch_operation(
+                wallet['id'], OperationType.WITHDRAW, CUSTOM_BALANCE * 2
+            ),
+            batch_operation(uuid4(), OperationType.DEPOSIT),
+        ]
+    })
+    data = response.json()
+    assert data['committed'] is False
+    assert [result['status'] for result in data['results']] == [
+        BatchOperationStatus.NOT_APPLIED,
+        BatchOperationStatus.REJECTED,
+        BatchOperationStatus.REJECTED,
+    ]
+    assert [result['detail'] for result in data['results']] == [
+        None, 'Not enough balance', 'Wallet not found'
+    ]
+    wallet_response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert wallet_response.json()['balance'] == CUSTOM_BALANCE
+
+
+@pytest.mark.asyncio
+async def test_best_effort_batch_applies_valid_operations(
+    client: AsyncClient
+):
+    """Тест для частичного применения пакета в режиме BEST_EFFORT."""
+    (wallet,) = await create_wallets(client, 1)
+    response = await client.post(BATCH_URL, json={
+        'mode': BatchMode.BEST_EFFORT,
+        'operations': [
+            batch_operation(
+                wallet['id'], OperationType.WITHDRAW, CUSTOM_BALANCE * 2
+            ),
+            batch_operation(wallet['id'], OperationType.DEPOSIT),
+        ]
+    })
+    data = response.json()
+    assert data['committed'] is True
+    assert [result['status'] for result in data['results']] == [
+        BatchOperationStatus.REJECTED, BatchOperationStatus.APPLIED
+    ]
+    wallet_response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert wallet_response.json()['balance'] == (
+        CUSTOM_BALANCE + OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_batches_with_overlapping_wallets(
+    client: AsyncClient
+):
+    """Тест для параллельных пакетов с кошельками в разном порядке."""
+    wallets = await create_wallets(client, 3)
+    ids = [wallet['id'] for wallet in wallets]
+    batches = [
+        [batch_operation(wallet_id, OperationType.DEPOSIT)
+         for wallet_id in (ids if index % 2 else reversed(ids))]
+        for index in range(CONCURRENT_OPERATIONS_COUNT)
+    ]
+    responses = await asyncio.gather(*[
+        client.post(BATCH_URL, json={'operations': operations})
+        for operations in batches
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    for wallet_id in ids:
+        wallet_response = await client.get(f'/api/v1/wallets/{wallet_id}')
+        assert wallet_response.json()['balance'] == (
+            CUSTOM_BALANCE + OPERATION_AMOUNT * CONCURRENT_OPERATIONS_COUNT
+        )
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit(client: AsyncClient, wallet: dict):
+    """Тест для ограничения размера пакета."""
+    response = await client.post(BATCH_URL, json={'operations': [
+        batch_operation(wallet['id'], OperationType.DEPOSIT)
+        for _ in range(settings.wallet_batch_max_operations + 1)
+    ]})
+    assert response.status_code == 422
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.models.wallet import WALLET_BALANCE_DEFAULT
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT, CUSTOM_BALANCE
+
+BULK_URL = '/api/v1/wallets:bulk'
+
+
+def parse_ndjson(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_from_payloads(client: AsyncClient):
+    """Тест для массового создания кошельков по списку."""
+    response = await client.post(BULK_URL, json={
+        'wallets': [{}, {'balance': CUSTOM_BALANCE}]
+    })
+    assert response.status_code == 201
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    wallets = parse_ndjson(response.text)
+    assert [wallet['balance'] for wallet in wallets] == [
+        WALLET_BALANCE_DEFAULT, CUSTOM_BALANCE
+    ]
+    get_response = await client.get(f'/api/v1/wallets/{wallets[1]["id"]}')
+    assert get_response.json() == wallets[1]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_by_count(client: AsyncClient):
+    """Тест для массового создания заданного числа кошельков."""
+    response = await client.post(BULK_URL, json={
+        'count': CONCURRENT_OPERATIONS_COUNT, 'balance': CUSTOM_BALANCE
+    })
+    wallets = parse_ndjson(response.text)
+    assert response.status_code == 201
+    assert len({wallet['id'] for wallet in wallets}) == (
+        CONCURRENT_OPERATIONS_COUNT
+    )
+    assert all(wallet['balance'] == CUSTOM_BALANCE for wallet in wallets)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_through_copy(client: AsyncClient, monkeypatch):
+    """Тест для массового создания кошельков через COPY."""
+    monkeypatch.setattr(settings, 'wallet_bulk_copy_threshold', 1)
+    response = await client.post(BULK_URL, json={
+        'count': CONCURRENT_OPERATIONS_COUNT
+    })
+    wallets = parse_ndjson(response.text)
+    assert response.status_code == 201
+    assert len(wallets) == CONCURRENT_OPERATIONS_COUNT
+    get_response = await client.get(f'/api/v1/wallets/{wallets[-1]["id"]}')
+    assert get_response.json() == wallets[-1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('payload', [
+    {},
+    {'count': 2, 'wallets': [{}]},
+    {'count': 0},
+    {'wallets': [{'balance': -CUSTOM_BALANCE}]},
+    {'count': settings.wallet_bulk_max_wallets + 1},
+])
+async def test_bulk_create_invalid_payload(client: AsyncClient, payload):
+    """Тест для некорректных запросов массового создания."""
+    response = await client.post(BULK_URL, json=payload)
+    assert response.status_code == 422
@@ -0,0 +1,128 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.cache import wallet_cache
+from app.cache.backends import InMemoryCacheBackend
+from app.cache.wallet_cache import WalletCache
+from app.config import settings
+from app.schemas.wallet import OperationType, WalletResponse
+from tests.conftest import CUSTOM_BALANCE, OPERATION_AMOUNT
+
+CACHE_MAX_ENTRIES = 2
+
+
+@pytest.fixture
+def cache(monkeypatch) -> WalletCache:
+    """Включение кеша кошельков."""
+    cache = WalletCache(InMemoryCacheBackend(ttl=60, max_entries=100))
+    monkeypatch.setattr(settings, 'wallet_cache_enabled', True)
+    monkeypatch.setattr(wallet_cache, '_wallet_cache', cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_get_wallet_served_from_cache(
+    client: AsyncClient, cache: WalletCache
+):
+    """Тест для чтения кошелька из кеша."""
+    create_response = await client.post('/api/v1/wallets', json={})
+    wallet_id = create_response.json().get('id')
+    for _ in range(3):
+        response = await client.get(f'/api/v1/wallets/{wallet_id}')
+        assert response.json() == create_response.json()
+    stats_response = await client.get('/stats')
+    cache_stats = stats_response.json().get('wallet_cache')
+    assert cache_stats['hits'] == 3
+    assert cache_stats['misses'] == 0
+
+
+@pytest.mark.asyncio
+async def test_operation_invalidates_cache(
+    client: AsyncClient, wallet: dict, cache: WalletCache
+):
+    """Тест для сброса кеша после операции."""
+    wallet_id = wallet.get('id')
+    await client.get(f'/api/v1/wallets/{wallet_id}')
+    await client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={
+            'operation_type': OperationType.DEPOSIT,
+            'amount': OPERATION_AMOUNT
+        }
+    )
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == (
+        wallet.get('balance') + OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_invalidates_cache(
+    client: AsyncClient, wallet: dict, cache: WalletCache
+):
+    """Тест для сброса кеша после пакета операций."""
+    wallet_id = wallet.get('id')
+    await client.get(f'/api/v1/wallets/{wallet_id}')
+    await client.post('/api/v1/wallets/operations:batch', json={
+        'operations': [{
+            'wallet_id': wallet_id,
+            'operation_type': OperationType.WITHDRAW,
+            'amount': OPERATION_AMOUNT,
+        }]
+    })
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert response.json().get('balance') == (
+        wallet.get('balance') - OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_missing_wallet_not_cached(
+    client: AsyncClient, cache: WalletCache
+):
+    """Тест для отсутствующего кошелька при включенном кеше."""
+    response = await client.get(f'/api/v1/wallets/{uuid4()}')
+    assert response.status_code == 404
+    assert cache.stats()['size'] == 0
+
+
+@pytest.mark.asyncio
+async def test_load_started_before_invalidation_is_not_cached():
+    """Тест для гонки чтения из базы и записи в кошелек."""
+    cache = WalletCache(InMemoryCacheBackend(ttl=60, max_entries=100))
+    wallet_uuid = uuid4()
+    loading = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_loader(_):
+        loading.set()
+        await release.wait()
+        return WalletResponse(id=wallet_uuid, balance=CUSTOM_BALANCE)
+
+    load = asyncio.create_task(cache.get_or_load(wallet_uuid, slow_loader))
+    await loading.wait()
+    await cache.invalidate(wallet_uuid)
+    release.set()
+    await load
+    assert await cache.backend.get(str(wallet_uuid)) is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_lru_and_ttl():
+    """Тест для вытеснения по LRU и истечения TTL."""
+    backend = InMemoryCacheBackend(ttl=60, max_entries=CACHE_MAX_ENTRIES)
+    await backend.set('first', 1)
+    await backend.set('second', 2)
+    await backend.get('first')
+    await backend.set('third', 3)
+    assert await backend.get('second') is None
+    assert await backend.get('first') == 1
+    assert backend.stats()['evictions'] == 1
+
+    backend.ttl = 0
+    await backend.set('expired', 4)
+    assert await backend.get('expired') is None
+    assert backend.stats()['expirations'] == 1
@@ -3,6 +3,8 @@ from uuid import UUID, uuid4
 import pytest
 from httpx import AsyncClient
 
+from app.config import settings
+from app.main import app
 from app.models.wallet import WALLET_BALANCE_DEFAULT
 from tests.conftest import CUSTOM_BALANCE
 
@@ -59,3 +61,21 @@ async def test_get_wallet_not_found(client: AsyncClient):
     data = response.json()
     assert response.status_code == 404
     assert data.get('detail') == 'Wallet not found'
+
+
+@pytest.mark.asyncio
+async def test_fast_json_responses_match_response_model(
+    client: AsyncClient, wallet: dict, monkeypatch
+):
+    """Тест для совпадения быстрых ответов с ответами через response_model."""
+    wallet_id = wallet.get('id')
+    fast = await client.get(f'/api/v1/wallets/{wallet_id}')
+    monkeypatch.setattr(settings, 'fast_json_responses', False)
+    default = await client.get(f'/api/v1/wallets/{wallet_id}')
+    assert fast.status_code == default.status_code == 200
+    assert fast.headers['content-type'] == default.headers['content-type']
+    assert fast.json() == default.json() == wallet
+    schema = app.openapi()['paths']['/api/v1/wallets/{wallet_uuid}']['get']
+    assert schema['responses']['200']['content']['application/json'] == {
+        'schema': {'$ref': '#/components/schemas/WalletResponse'}
+    }
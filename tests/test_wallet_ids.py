@@ -0,0 +1,60 @@
+import json
+import time
+from uuid import RFC_4122, UUID, uuid1
+
+import pytest
+from httpx import AsyncClient
+from pydantic import ValidationError
+
+from app.config import settings
+from app.schemas.wallet import WalletResponse
+from app.wallet_ids import uuid7
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT
+
+UUID7_COUNT = 10_000
+
+
+def test_uuid7():
+    """Тест для возрастающих uuid версии 7 с текущим временем."""
+    started_ms = time.time_ns() // 1_000_000
+    wallet_uuids = [uuid7() for _ in range(UUID7_COUNT)]
+    assert all(
+        wallet_uuid.version == 7 and wallet_uuid.variant == RFC_4122
+        for wallet_uuid in wallet_uuids
+    )
+    assert wallet_uuids == sorted(wallet_uuids)
+    assert len(set(wallet_uuids)) == UUID7_COUNT
+    assert wallet_uuids[0].int >> 80 >= started_ms
+
+
+def test_wallet_response_uuid_versions():
+    """Тест для id кошелька версий 4 и 7 в ответе."""
+    assert WalletResponse(id=uuid7(), balance=0).id.version == 7
+    with pytest.raises(ValidationError):
+        WalletResponse(id=uuid1(), balance=0)
+
+
+@pytest.mark.asyncio
+async def test_create_wallets_with_uuid7(
+    client: AsyncClient, wallet: dict, monkeypatch
+):
+    """Тест для создания кошельков с uuid версии 7 рядом с версией 4."""
+    monkeypatch.setattr(settings, 'wallet_id_version', 'v7')
+    monkeypatch.setattr(settings, 'fast_json_responses', False)
+    response = await client.post('/api/v1/wallets', json={})
+    assert response.status_code == 201
+    created = response.json()
+    assert UUID(created['id']).version == 7
+
+    response = await client.post('/api/v1/wallets:bulk', json={
+        'count': CONCURRENT_OPERATIONS_COUNT
+    })
+    assert all(
+        UUID(json.loads(line)['id']).version == 7
+        for line in response.text.splitlines()
+    )
+
+    for wallet_id in (wallet['id'], created['id']):
+        response = await client.get(f'/api/v1/wallets/{wallet_id}')
+        assert response.status_code == 200
+        assert response.json().get('id') == wallet_id
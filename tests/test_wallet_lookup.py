@@ -0,0 +1,50 @@
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.read_routing import LAST_WRITE_COOKIE
+
+
+@pytest.mark.asyncio
+async def test_lookup_wallets(client: AsyncClient, wallet: dict):
+    """Тест для получения нескольких кошельков с ненайденными uuid."""
+    sharded = (await client.post(
+        '/api/v1/wallets', json={'balance': 0, 'balance_shards': 4}
+    )).json()
+    await client.post(
+        f'/api/v1/wallets/{sharded["id"]}/operation',
+        json={'operation_type': 'DEPOSIT', 'amount': 50}
+    )
+    missing_id = str(uuid4())
+    response = await client.post(
+        '/api/v1/wallets:lookup',
+        json={'ids': [sharded['id'], missing_id, wallet['id'], sharded['id']]}
+    )
+    assert response.status_code == 200
+    assert LAST_WRITE_COOKIE not in response.cookies
+    assert response.json() == {
+        'wallets': [
+            {'id': sharded['id'], 'balance': 50},
+            {'id': wallet['id'], 'balance': wallet['balance']},
+        ],
+        'missing': [missing_id],
+    }
+
+
+@pytest.mark.asyncio
+async def test_lookup_wallets_batch_size(client: AsyncClient):
+    """Тест для ограничения числа uuid в запросе."""
+    response = await client.post('/api/v1/wallets:lookup', json={'ids': []})
+    assert response.status_code == 422
+
+    response = await client.post(
+        '/api/v1/wallets:lookup',
+        json={
+            'ids': [
+                str(uuid4()) for _ in range(settings.wallet_lookup_max_ids + 1)
+            ]
+        }
+    )
+    assert response.status_code == 422
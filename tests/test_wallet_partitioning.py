@@ -0,0 +1,210 @@
+import asyncio
+from argparse import Namespace
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from alembic import command
+from alembic.config import Config
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+from testcontainers.postgres import PostgresContainer
+
+from app.database import get_db
+from app.main import app
+
+MIGRATIONS_PATH = Path(__file__).resolve().parents[1] / 'migrations'
+UNPARTITIONED_REVISION = '3d9a61f4c2b8'
+WALLETS_COUNT = 7
+
+
+def database_url(postgres_container: PostgresContainer) -> str:
+    return postgres_container.get_connection_url().replace(
+        'postgresql+psycopg2://', 'postgresql+asyncpg://'
+    )
+
+
+async def migrate(
+    postgres_container: PostgresContainer, action, revision: str, **options
+) -> None:
+    """Запустить миграции alembic с параметрами -x."""
+    config = Config()
+    config.set_main_option('script_location', str(MIGRATIONS_PATH))
+    config.cmd_opts = Namespace(x=[
+        f'dsn={database_url(postgres_container)}',
+        *(f'{name}={value}' for name, value in options.items()),
+    ])
+    await asyncio.to_thread(action, config, revision)
+
+
+async def partitions(engine: AsyncEngine) -> int:
+    async with engine.connect() as connection:
+        return await connection.scalar(text(
+            "SELECT count(*) FROM pg_inherits "
+            "WHERE inhparent = 'wallets'::regclass"
+        ))
+
+
+async def lock_waiters(
+    engine: AsyncEngine, count: int, migration: asyncio.Task
+) -> None:
+    """Дождаться count запросов, ждущих блокировку, пока идет миграция."""
+    while not migration.done():
+        async with engine.connect() as connection:
+            if await connection.scalar(text(
+                'SELECT count(*) FROM pg_stat_activity '
+                'WHERE datname = current_database() '
+                "AND wait_event_type = 'Lock'"
+            )) >= count:
+                return
+        await asyncio.sleep(0.01)
+    migration.result()
+    pytest.fail('Миграция завершилась, не дойдя до подмены таблиц')
+
+
+async def get_stats_after_swap(
+    postgres_container: PostgresContainer, engine: AsyncEngine, action,
+    revision: str, **options
+):
+    """
+    Запустить миграцию и запросить сводку сразу после подмены таблиц, до
+    проверки внешних ключей. Подмена задерживается блокировкой
+    wallet_transactions, за ней в очередь встает SHARE UPDATE EXCLUSIVE,
+    которая затем не пускает VALIDATE CONSTRAINT, пока идет запрос.
+    """
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with engine.connect() as swap_blocker, \
+            engine.connect() as validate_blocker:
+        await swap_blocker.execute(text(
+            'LOCK TABLE wallet_transactions IN ACCESS SHARE MODE'
+        ))
+        migration = asyncio.create_task(
+            migrate(postgres_container, action, revision, **options)
+        )
+        try:
+            await lock_waiters(engine, 1, migration)
+            validate_lock = asyncio.create_task(validate_blocker.execute(
+                text('LOCK TABLE wallet_transactions '
+                     'IN SHARE UPDATE EXCLUSIVE MODE')
+            ))
+            await lock_waiters(engine, 2, migration)
+            await swap_blocker.rollback()
+            await validate_lock
+            async with AsyncClient(
+                transport=ASGITransport(app=app),
+                base_url='http://test'
+            ) as client:
+                response = await client.get('/api/v1/wallets/stats')
+            await validate_blocker.rollback()
+        finally:
+            app.dependency_overrides.clear()
+            await swap_blocker.rollback()
+            await validate_blocker.rollback()
+            await migration
+    return response
+
+
+@pytest_asyncio.fixture
+async def db_engine(
+    postgres_container: PostgresContainer,
+) -> AsyncGenerator[AsyncEngine, None]:
+    """База со схемой из миграций вместо create_all."""
+    await migrate(postgres_container, command.upgrade, 'head')
+    engine = create_async_engine(database_url(postgres_container))
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_partitioned_wallets(
+    client: AsyncClient, wallet: dict, db_engine: AsyncEngine
+):
+    """Тест для работы приложения с секционированной таблицей wallets."""
+    assert await partitions(db_engine) == 16
+    response = await client.post(
+        f'/api/v1/wallets/{wallet["id"]}/operation',
+        json={'operation_type': 'DEPOSIT', 'amount': 150}
+    )
+    assert response.status_code == 200
+    response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert response.json().get('balance') == wallet['balance'] + 150
+
+    with pytest.raises(IntegrityError):
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                text('UPDATE wallets SET balance = -1 WHERE id = :id'),
+                {'id': wallet['id']}
+            )
+
+
+@pytest.mark.asyncio
+async def test_partitioning_migration_keeps_wallets(
+    postgres_container: PostgresContainer,
+):
+    """Тест для переноса кошельков и проводок в секционированную таблицу."""
+    await migrate(
+        postgres_container, command.upgrade, UNPARTITIONED_REVISION
+    )
+    engine = create_async_engine(database_url(postgres_container))
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text(
+                'INSERT INTO wallets (id, balance) '
+                'SELECT gen_random_uuid(), n * 100 '
+                'FROM generate_series(1, :count) AS n'
+            ), {'count': WALLETS_COUNT})
+            await connection.execute(text(
+                "INSERT INTO wallet_transactions "
+                "(wallet_id, operation_type, amount, balance_after) "
+                "SELECT id, 'DEPOSIT', balance, balance "
+                "FROM wallets"
+            ))
+        async with engine.connect() as connection:
+            wallets = (await connection.execute(text(
+                'SELECT id, balance FROM wallets ORDER BY id'
+            ))).all()
+
+        response = await get_stats_after_swap(
+            postgres_container, engine, command.upgrade, 'head',
+            wallet_partitions=4, copy_batch_size=2
+        )
+        assert response.status_code == 200
+        assert response.json()['wallets_count'] == WALLETS_COUNT
+        assert await partitions(engine) == 4
+        async with engine.connect() as connection:
+            assert (await connection.execute(text(
+                'SELECT id, balance FROM wallets ORDER BY id'
+            ))).all() == wallets
+            assert await connection.scalar(text(
+                'SELECT bool_and(convalidated) FROM pg_constraint '
+                "WHERE confrelid = 'wallets'::regclass"
+            ))
+            assert await connection.scalar(text(
+                'SELECT wallets_count FROM wallet_stats'
+            )) == WALLETS_COUNT
+
+        response = await get_stats_after_swap(
+            postgres_container, engine, command.downgrade,
+            UNPARTITIONED_REVISION
+        )
+        assert response.status_code == 200
+        assert response.json()['wallets_count'] == WALLETS_COUNT
+        assert await partitions(engine) == 0
+        async with engine.connect() as connection:
+            assert (await connection.execute(text(
+                'SELECT id, balance FROM wallets ORDER BY id'
+            ))).all() == wallets
+    finally:
+        await engine.dispose()
@@ -0,0 +1,96 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.repositories.wallet_stats_repository import WalletStatsRepository
+from app.services.wallet_stats_service import WalletStatsService
+
+BALANCES = [0, 5, 150, 150, 5000]
+BALANCE_SHARDS = 4
+
+
+async def refresh(
+    session_factory: async_sessionmaker[AsyncSession], **kwargs
+) -> bool:
+    async with session_factory() as session:
+        return await WalletStatsService(session).refresh(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_wallet_stats(
+    client: AsyncClient, session_factory: async_sessionmaker[AsyncSession]
+):
+    """Тест для сводки по кошелькам, включая шардированные."""
+    response = await client.get('/api/v1/wallets/stats')
+    assert response.status_code == 200
+    assert response.json().get('wallets_count') == 0
+    assert response.json().get('percentiles') == {
+        'p50': None, 'p90': None, 'p99': None
+    }
+
+    for balance in BALANCES:
+        await client.post('/api/v1/wallets', json={'balance': balance})
+    sharded = (await client.post(
+        '/api/v1/wallets',
+        json={'balance': 0, 'balance_shards': BALANCE_SHARDS}
+    )).json()
+    await client.post(
+        f'/api/v1/wallets/{sharded["id"]}/operation',
+        json={'operation_type': 'DEPOSIT', 'amount': 50}
+    )
+    response = await client.get('/api/v1/wallets/stats')
+    assert response.json().get('wallets_count') == 0
+
+    assert await refresh(session_factory)
+    response = await client.get('/api/v1/wallets/stats')
+    stats = response.json()
+    assert stats['wallets_count'] == len(BALANCES) + 1
+    assert stats['total_balance'] == sum(BALANCES) + 50
+    assert stats['min_balance'] == 0
+    assert stats['max_balance'] == 5000
+    assert stats['percentiles'] == {'p50': 50, 'p90': 5000, 'p99': 5000}
+    assert stats['distribution'] == [
+        {'min_balance': 0, 'max_balance': 0, 'wallets': 1},
+        {'min_balance': 1, 'max_balance': 9, 'wallets': 1},
+        {'min_balance': 10, 'max_balance': 99, 'wallets': 1},
+        {'min_balance': 100, 'max_balance': 999, 'wallets': 2},
+        {'min_balance': 1000, 'max_balance': 9999, 'wallets': 1},
+    ]
+    assert 0 <= stats['staleness_seconds'] < 60
+
+
+@pytest.mark.asyncio
+async def test_wallet_stats_refresh_skips_fresh_summary(
+    client: AsyncClient, session_factory: async_sessionmaker[AsyncSession]
+):
+    """Тест для пропуска пересчета, если сводку недавно обновили."""
+    assert await refresh(session_factory)
+    assert not await refresh(session_factory, min_age_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_wallet_stats_refresh_timeouts(
+    client: AsyncClient,
+    session_factory: async_sessionmaker[AsyncSession],
+    monkeypatch
+):
+    """
+    Тест для таймаутов пересчета сводки: свой класс stats_refresh, по
+    умолчанию без statement_timeout.
+    """
+    timeouts = []
+    original_refresh = WalletStatsRepository.refresh
+
+    async def refresh_with_timeouts(repository, *args, **kwargs):
+        timeouts.append((
+            await repository.db.scalar(text('SHOW lock_timeout')),
+            await repository.db.scalar(text('SHOW statement_timeout')),
+        ))
+        return await original_refresh(repository, *args, **kwargs)
+
+    monkeypatch.setattr(
+        WalletStatsRepository, 'refresh', refresh_with_timeouts
+    )
+    assert await refresh(session_factory)
+    assert timeouts == [('10s', '0')]
@@ -0,0 +1,167 @@
+import asyncio
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.wallet_transaction import WalletTransaction
+from app.schemas.wallet import OperationType
+from app.services import operation_coalescer
+from app.services.operation_coalescer import OperationCoalescer
+from tests.conftest import CONCURRENT_OPERATIONS_COUNT, OPERATION_AMOUNT
+
+IDEMPOTENCY_KEY = 'payout-42'
+
+
+@pytest.fixture(params=['pessimistic', 'atomic', 'optimistic', 'coalesced'])
+def operation_mode(
+    request,
+    session_factory: async_sessionmaker[AsyncSession],
+    monkeypatch
+) -> str:
+    """Переключение способа применения операций."""
+    if request.param == 'coalesced':
+        monkeypatch.setattr(settings, 'operation_coalescing_enabled', True)
+        monkeypatch.setattr(operation_coalescer, '_coalescer', (
+            OperationCoalescer(
+                session_factory, window=0.01, max_batch_size=100
+            )
+        ))
+    else:
+        monkeypatch.setattr(settings, 'balance_update_mode', request.param)
+    return request.param
+
+
+async def get_transactions(
+    session_factory: async_sessionmaker[AsyncSession], wallet_id: str
+) -> list[WalletTransaction]:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(WalletTransaction)
+            .where(WalletTransaction.wallet_id == UUID(wallet_id))
+            .order_by(WalletTransaction.id)
+        )
+        return list(result.scalars())
+
+
+def operation(
+    client: AsyncClient,
+    wallet_id: str,
+    amount: int = OPERATION_AMOUNT,
+    idempotency_key: str = None
+):
+    headers = {}
+    if idempotency_key is not None:
+        headers['Idempotency-Key'] = idempotency_key
+    return client.post(
+        f'/api/v1/wallets/{wallet_id}/operation',
+        json={'operation_type': OperationType.DEPOSIT, 'amount': amount},
+        headers=headers
+    )
+
+
+@pytest.mark.asyncio
+async def test_operation_written_to_ledger(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    operation_mode: str
+):
+    """Тест для записи операции в журнал."""
+    response = await operation(client, wallet['id'])
+    transactions = await get_transactions(session_factory, wallet['id'])
+    assert len(transactions) == 1
+    assert transactions[0].operation_type == OperationType.DEPOSIT.value
+    assert transactions[0].amount == OPERATION_AMOUNT
+    assert transactions[0].balance_after == response.json()['balance']
+
+
+@pytest.mark.asyncio
+async def test_replayed_idempotency_key_returns_stored_result(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession],
+    operation_mode: str
+):
+    """Тест для повтора запроса с тем же ключом идемпотентности."""
+    first = await operation(
+        client, wallet['id'], idempotency_key=IDEMPOTENCY_KEY
+    )
+    await operation(client, wallet['id'])
+    replay = await operation(
+        client, wallet['id'], idempotency_key=IDEMPOTENCY_KEY
+    )
+    assert replay.status_code == 200
+    assert replay.json() == first.json()
+    wallet_response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert wallet_response.json()['balance'] == (
+        wallet['balance'] + OPERATION_AMOUNT * 2
+    )
+    assert len(await get_transactions(session_factory, wallet['id'])) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_with_same_key_applied_once(
+    client: AsyncClient, wallet: dict, operation_mode: str
+):
+    """Тест для параллельных запросов с одним ключом идемпотентности."""
+    responses = await asyncio.gather(*[
+        operation(client, wallet['id'], idempotency_key=IDEMPOTENCY_KEY)
+        for _ in range(CONCURRENT_OPERATIONS_COUNT)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    expected_balance = wallet['balance'] + OPERATION_AMOUNT
+    assert {response.json()['balance'] for response in responses} == {
+        expected_balance
+    }
+    wallet_response = await client.get(f'/api/v1/wallets/{wallet["id"]}')
+    assert wallet_response.json()['balance'] == expected_balance
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_reused_for_other_operation(
+    client: AsyncClient, wallet: dict, operation_mode: str
+):
+    """Тест для повторного использования ключа с другой суммой."""
+    await operation(client, wallet['id'], idempotency_key=IDEMPOTENCY_KEY)
+    response = await operation(
+        client,
+        wallet['id'],
+        amount=OPERATION_AMOUNT * 2,
+        idempotency_key=IDEMPOTENCY_KEY
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_written_to_ledger(
+    client: AsyncClient,
+    wallet: dict,
+    session_factory: async_sessionmaker[AsyncSession]
+):
+    """Тест для записи примененных операций пакета в журнал."""
+    await client.post('/api/v1/wallets/operations:batch', json={
+        'mode': 'BEST_EFFORT',
+        'operations': [
+            {
+                'wallet_id': wallet['id'],
+                'operation_type': OperationType.WITHDRAW,
+                'amount': wallet['balance'] * 2,
+            },
+            {
+                'wallet_id': wallet['id'],
+                'operation_type': OperationType.WITHDRAW,
+                'amount': OPERATION_AMOUNT,
+            },
+        ]
+    })
+    transactions = await get_transactions(session_factory, wallet['id'])
+    assert [
+        (transaction.operation_type, transaction.balance_after)
+        for transaction in transactions
+    ] == [
+        (OperationType.WITHDRAW.value, wallet['balance'] - OPERATION_AMOUNT)
+    ]
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from tests.conftest import CUSTOM_BALANCE, OPERATION_AMOUNT
+
+CONCURRENT_TRANSFERS_COUNT = 200
+
+
+@pytest_asyncio.fixture
+async def wallets(client: AsyncClient) -> list[dict]:
+    """Создание двух кошельков."""
+    return [
+        (await client.post(
+            '/api/v1/wallets', json={'balance': CUSTOM_BALANCE}
+        )).json()
+        for _ in range(2)
+    ]
+
+
+def transfer(
+    client: AsyncClient,
+    from_wallet_id: str,
+    to_wallet_id: str,
+    amount: int = OPERATION_AMOUNT
+):
+    return client.post(
+        '/api/v1/wallets/transfers',
+        json={
+            'from_wallet_id': from_wallet_id,
+            'to_wallet_id': to_wallet_id,
+            'amount': amount
+        }
+    )
+
+
+async def get_balance(client: AsyncClient, wallet_id: str) -> int:
+    response = await client.get(f'/api/v1/wallets/{wallet_id}')
+    return response.json().get('balance')
+
+
+@pytest.mark.asyncio
+async def test_transfer(client: AsyncClient, wallets: list[dict]):
+    """Тест для перевода между кошельками."""
+    source, target = wallets
+    response = await transfer(client, source['id'], target['id'])
+    assert response.status_code == 200
+    assert response.json() == {
+        'from_wallet': {
+            'id': source['id'], 'balance': CUSTOM_BALANCE - OPERATION_AMOUNT
+        },
+        'to_wallet': {
+            'id': target['id'], 'balance': CUSTOM_BALANCE + OPERATION_AMOUNT
+        },
+    }
+    assert await get_balance(client, source['id']) == (
+        CUSTOM_BALANCE - OPERATION_AMOUNT
+    )
+
+
+@pytest.mark.asyncio
+async def test_transfer_errors(client: AsyncClient, wallets: list[dict]):
+    """Тест для ошибок перевода: баланс, кошелек, один и тот же кошелек."""
+    source, target = wallets
+    response = await transfer(
+        client, source['id'], target['id'], CUSTOM_BALANCE + 1
+    )
+    assert response.status_code == 400
+    assert response.json().get('detail') == 'Not enough balance'
+    response = await transfer(client, source['id'], str(uuid4()))
+    assert response.status_code == 404
+    response = await transfer(client, source['id'], source['id'])
+    assert response.status_code == 422
+    assert await get_balance(client, source['id']) == CUSTOM_BALANCE
+    assert await get_balance(client, target['id']) == CUSTOM_BALANCE
+
+
+@pytest.mark.asyncio
+async def test_concurrent_opposite_transfers(
+    client: AsyncClient, wallets: list[dict], record_property
+):
+    """Тест для параллельных встречных переводов без взаимных блокировок."""
+    source, target = wallets
+    started = time.perf_counter()
+    responses = await asyncio.gather(*[
+        transfer(client, source['id'], target['id'])
+        if index % 2 else transfer(client, target['id'], source['id'])
+        for index in range(CONCURRENT_TRANSFERS_COUNT)
+    ])
+    elapsed = time.perf_counter() - started
+    record_property(
+        'transfers_per_s', round(CONCURRENT_TRANSFERS_COUNT / elapsed, 1)
+    )
+    assert all(response.status_code == 200 for response in responses)
+    assert await get_balance(client, source['id']) == CUSTOM_BALANCE
+    assert await get_balance(client, target['id']) == CUSTOM_BALANCE
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.warmup import Warmup, warm_up, warmup_state
+
+WARMUP_CONNECTIONS = 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['pessimistic', 'atomic', 'optimistic'])
+async def test_warm_up_opens_pool_connections(
+    db_engine: AsyncEngine, mode: str, monkeypatch
+):
+    """Тест для прогрева соединений пула без изменения данных."""
+    monkeypatch.setattr(settings, 'balance_update_mode', mode)
+    assert await warm_up(db_engine, WARMUP_CONNECTIONS) == WARMUP_CONNECTIONS
+    assert db_engine.pool.checkedin() == WARMUP_CONNECTIONS
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warm_up(
+    client: AsyncClient, db_engine: AsyncEngine, monkeypatch
+):
+    """Тест для /ready до и после прогрева."""
+    monkeypatch.setattr(warmup_state, 'ready', False)
+    response = await client.get('/ready')
+    assert response.status_code == 503
+    assert (await client.get('/health')).status_code == 200
+
+    warmup = Warmup(db_engine, WARMUP_CONNECTIONS)
+    warmup.start()
+    while not warmup_state.ready:
+        await asyncio.sleep(0.01)
+    await warmup.stop()
+    response = await client.get('/ready')
+    assert response.status_code == 200
+    assert response.json() == {'status': 'ready'}
+    stats = (await client.get('/stats')).json()['warmup']
+    assert stats['connections'] == WARMUP_CONNECTIONS